@@ -4,11 +4,15 @@ from .models import (
     Announcement,
     Chapter,
     Course,
+    CourseBatchTag,
+    CourseBatchTagHistory,
     CourseHistory,
     Notification,
     Page,
     Schedule,
+    SearchEntry,
     Section,
+    StorageUsage,
 )
 
 
@@ -49,6 +53,33 @@ class CourseHistoryAdmin(admin.ModelAdmin):
     )
 
 
+class CourseBatchTagAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "course",
+        "category",
+        "name",
+        "created_on",
+    )
+    search_fields = (
+        "category",
+        "name",
+    )
+
+
+class CourseBatchTagHistoryAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "batch_tag",
+        "user",
+        "created_on",
+    )
+    search_fields = (
+        "user__email",
+        "user__full_name",
+    )
+
+
 class ChapterAdmin(admin.ModelAdmin):
     list_display = (
         "id",
@@ -136,11 +167,37 @@ class AnnouncementAdmin(admin.ModelAdmin):
     search_fields = ("body",)
 
 
+class StorageUsageAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "user",
+        "course",
+        "category",
+        "size",
+        "modified_on",
+    )
+
+
+class SearchEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "course",
+        "content_type",
+        "object_id",
+        "title",
+    )
+    list_filter = ("content_type",)
+
+
 admin.site.register(Course, CourseAdmin)
 admin.site.register(CourseHistory, CourseHistoryAdmin)
+admin.site.register(CourseBatchTag, CourseBatchTagAdmin)
+admin.site.register(CourseBatchTagHistory, CourseBatchTagHistoryAdmin)
 admin.site.register(Chapter, ChapterAdmin)
 admin.site.register(Section, SectionAdmin)
 admin.site.register(Notification, NotificationAdmin)
 admin.site.register(Schedule, ScheduleAdmin)
 admin.site.register(Page, PageAdmin)
 admin.site.register(Announcement, AnnouncementAdmin)
+admin.site.register(StorageUsage, StorageUsageAdmin)
+admin.site.register(SearchEntry, SearchEntryAdmin)
@@ -1,18 +1,35 @@
+import csv
+import json
 import logging
 import os
-from datetime import datetime
+import re
+from collections import defaultdict
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core import signing
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_date
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
 from registration.models import Profile, SubscriptionHistory
 from utils import mixins as custom_mixins
+from utils.content import get_chapter_contents, get_content_titles
+from utils.media import serve_media_file
 from utils.pagination import StandardResultsSetPagination
 from utils.permissions import (
     IsInstructorOrTA,
@@ -22,20 +39,27 @@ from utils.permissions import (
     StrictIsInstructorOrTA,
 )
 from utils.subscription import SubscriptionView
-from utils.utils import CaseInsensitiveHeaderDictReader, get_course_folder
+from utils.thumbnails import THUMBNAIL_FORMATS, THUMBNAIL_SIZES, get_thumbnail
+from utils.utils import CaseInsensitiveHeaderDictReader, EchoBuffer, get_course_folder
 
+from .cache import get_latest_announcements, get_schedules_ics, set_schedules_ics
+from .ics import build_schedules_ics
 from .models import (
     Announcement,
     Chapter,
     Course,
+    CourseBatchTag,
+    CourseBatchTagHistory,
     CourseHistory,
     Page,
     Schedule,
     Section,
 )
+from .search import search_course_contents
 from .serializers import (
     AnnouncementSerializer,
     ChapterSerializer,
+    CourseBatchTagSerializer,
     CourseHistorySerializer,
     CourseSerializer,
     PageSerializer,
@@ -48,6 +72,40 @@ User = get_user_model()
 
 logger = logging.getLogger(__name__)
 
+# Column name and lookup of each field in the roster export
+ROSTER_COLUMNS = (
+    ("email", "user__email"),
+    ("full_name", "user__full_name"),
+    ("role", "role"),
+    ("status", "status"),
+    ("roll_no", "user__profile__roll_no"),
+    ("college", "user__profile__college__name"),
+    ("department", "user__profile__dept__name"),
+)
+
+# Extra csv columns (of bulk registration) which are not turned into batch tags as
+# their values are specific to a student
+BATCH_TAG_EXCLUDED_FIELDS = ("", "roll_no", "rollno", "rollnumber", "roll number")
+
+ROSTER_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Number of rows fetched per round trip from the server-side cursor
+ROSTER_CHUNK_SIZE = 2000
+
+# Default length (in days) of the date range of upcoming schedules
+UPCOMING_SCHEDULES_DAYS = 7
+
+# Number of past days whose schedules are included in the iCalendar feed
+SCHEDULES_ICS_PAST_DAYS = 30
+
+SCHEDULES_ICS_SALT = "course.schedules_ics"
+
+# Seconds browsers and proxies may use a course image thumbnail without revalidating
+THUMBNAIL_MAX_AGE = 60 * 60
+
 
 class CourseViewSet(
     viewsets.GenericViewSet,
@@ -55,6 +113,7 @@ class CourseViewSet(
     mixins.RetrieveModelMixin,
     custom_mixins.UpdateMixin,
     custom_mixins.DeleteMixin,
+    custom_mixins.IsRegisteredMixin,
 ):
     """ViewSet for `Course`."""
 
@@ -215,6 +274,116 @@ class CourseViewSet(
         """
         return self._delete(request, pk)
 
+    @action(detail=True, methods=["GET"])
+    def retrieve_image_thumbnail(self, request, pk):
+        """Serves a thumbnail of the image of the course with id as pk.
+
+        The thumbnail is rendered on first request (see `get_thumbnail()`) and
+        may be cached by browsers and proxies, revalidating it with its ETag.
+
+        Query params:
+            size (str): "small", "medium" (default) or "large"
+            image_format (str): "webp" (default), "jpeg" or "png" (not `format`,
+                which selects the DRF renderer)
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Course id
+
+        Returns:
+            `HttpResponse` with the thumbnail and status HTTP_200_OK (or
+            HTTP_304_NOT_MODIFIED).
+
+        Raises:
+            `HTTP_400_BAD_REQUEST`: Raised if the size or format is invalid
+            `HTTP_404_NOT_FOUND`: Raised if the course or its image does not exist,
+                or the image can not be read
+            `HTTP_503_SERVICE_UNAVAILABLE`: Raised if the thumbnail is not rendered
+                in time
+        """
+        size = request.query_params.get("size", "medium")
+        image_format = request.query_params.get("image_format", "webp")
+        if size not in THUMBNAIL_SIZES or image_format not in THUMBNAIL_FORMATS:
+            error = (
+                "The size must be one of `{}` and the image format one of `{}`.".format(
+                    ", ".join(THUMBNAIL_SIZES), ", ".join(THUMBNAIL_FORMATS)
+                )
+            )
+            logger.error(error)
+            return Response(error, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            course = Course.objects.get(id=pk)
+        except Course.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+        if not course.image:
+            error = "The course has no image."
+            logger.error(error)
+            return Response(error, status.HTTP_404_NOT_FOUND)
+
+        try:
+            thumbnail, digest = get_thumbnail(course.image, size, image_format)
+            response = serve_media_file(
+                request,
+                thumbnail,
+                etag='"{}-{}-{}"'.format(digest, size, image_format),
+            )
+        except FutureTimeoutError as e:
+            logger.exception(e)
+            response = Response(
+                "The thumbnail is being rendered.", status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+            response["Retry-After"] = 1
+            return response
+        except Exception as e:
+            # Unreadable image, e.g. not an image (`OSError`) or too large
+            # (`DecompressionBombError`)
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+        patch_cache_control(response, public=True, max_age=THUMBNAIL_MAX_AGE)
+        return response
+
+    @action(
+        detail=True, methods=["GET"], permission_classes=[IsInstructorOrTAOrStudent]
+    )
+    def search_contents(self, request, pk):
+        """Searches the contents of the course with id as pk.
+
+        Pages, chapters, sections, videos, documents, announcements and published
+        questions are searched with the full-text search index of the course
+        (see `course.search`), best matches first.
+
+        Query params:
+            q (str): Search query (words, "quoted phrases", `or`, `-excluded`)
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Course id
+
+        Returns:
+            `Response` with the matches (each with its `content_type`, `object_id`,
+            `title` and `rank`) and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_400_BAD_REQUEST`: Raised if the query is missing
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTAOrStudent` permission
+                class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_registered()` method
+            `HTTP_404_NOT_FOUND`: Raised by `_is_registered()` method
+        """
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            error = "The search query `q` is required."
+            logger.error(error)
+            return Response(error, status.HTTP_400_BAD_REQUEST)
+
+        check = self._is_registered(pk, request.user)
+        if check is not True:
+            return check
+
+        return Response(search_course_contents(pk, query), status.HTTP_200_OK)
+
     @action(detail=True, methods=["GET"], permission_classes=[StrictIsInstructorOrTA])
     def list_non_tas(self, request, pk):
         """Lists the non tas in the course with id as pk.
@@ -265,6 +434,120 @@ class CourseViewSet(
             tas.append(course_history.user.email)
         return Response(tas, status.HTTP_200_OK)
 
+    def _stream_roster(self, roster, export_type):
+        """Helper function to serialize roster rows one at a time.
+
+        Args:
+            roster (iterator): Iterator over roster rows (tuples in the order of
+                `ROSTER_COLUMNS`)
+            export_type (str): "csv" or "ndjson"
+
+        Yields:
+            A serialized roster row (csv header first).
+        """
+        fields = [field for field, _ in ROSTER_COLUMNS]
+        if export_type == "csv":
+            writer = csv.writer(EchoBuffer())
+            yield writer.writerow(fields)
+            for row in roster:
+                yield writer.writerow(row)
+        else:
+            for row in roster:
+                yield json.dumps(dict(zip(fields, row))) + "\n"
+
+    @action(detail=True, methods=["GET"], permission_classes=[StrictIsInstructorOrTA])
+    def export_roster(self, request, pk):
+        """Streams the roster of the course with id as pk as csv or ndjson.
+
+        The rows are read through a server-side cursor and written to the response
+        one at a time, so the memory used does not depend on the course size.
+
+        Query params:
+            type (str, optional): "csv" or "ndjson". Defaults to "csv".
+            role (str, optional): Only users with this role ("I", "T" or "S")
+            status (str, optional): Enrollment status. Defaults to "E".
+            batch_tag (int, optional): Only members of the batch tag with this id
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Course id
+
+        Returns:
+            `StreamingHttpResponse` with the roster and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_400_BAD_REQUEST`: Raised if the export type is not supported
+            `HTTP_401_UNAUTHORIZED`: Raised by `StrictIsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `StrictIsInstructorOrTA` permission class
+            `HTTP_404_NOT_FOUND`: Raised:
+                1. By `get_object()` method
+                2. If the batch tag does not exist in the course
+        """
+        course = self.get_object()
+        query_params = request.query_params
+
+        export_type = query_params.get("type", "csv")
+        if export_type not in ROSTER_CONTENT_TYPES:
+            error = "Roster export type `{}` is not supported.".format(export_type)
+            logger.error(error)
+            return Response(error, status.HTTP_400_BAD_REQUEST)
+
+        course_histories = CourseHistory.objects.filter(
+            course=course, status=query_params.get("status", "E")
+        )
+        if "role" in query_params:
+            course_histories = course_histories.filter(role=query_params["role"])
+        if "batch_tag" in query_params:
+            batch_tag_id = query_params["batch_tag"]
+            try:
+                CourseBatchTag.objects.get(id=batch_tag_id, course=course)
+            except (CourseBatchTag.DoesNotExist, ValueError) as e:
+                logger.exception(e)
+                return Response(str(e), status.HTTP_404_NOT_FOUND)
+            # Served by `unique_course_batch_tag_history` index
+            course_histories = course_histories.filter(
+                user__coursebatchtaghistory__batch_tag=batch_tag_id
+            )
+        roster = (
+            course_histories.order_by("id")
+            .values_list(*(lookup for _, lookup in ROSTER_COLUMNS))
+            .iterator(chunk_size=ROSTER_CHUNK_SIZE)
+        )
+
+        response = StreamingHttpResponse(
+            self._stream_roster(roster, export_type),
+            content_type=ROSTER_CONTENT_TYPES[export_type],
+        )
+        response["Content-Disposition"] = 'attachment; filename="{}"'.format(
+            "course_{}_roster.{}".format(course.id, export_type)
+        )
+        return response
+
+    @action(detail=True, methods=["GET"], permission_classes=[StrictIsInstructorOrTA])
+    def list_batch_tags(self, request, pk):
+        """Gets the batch tags of the course with id as pk with their member count.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Course id
+
+        Returns:
+            `Response` with the batch tags data and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `StrictIsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `StrictIsInstructorOrTA` permission class
+            `HTTP_404_NOT_FOUND`: Raised by `get_object()` method
+        """
+        course = self.get_object()
+        batch_tags = (
+            CourseBatchTag.objects.filter(course=course)
+            .annotate(member_count=Count("coursebatchtaghistory"))
+            .order_by("category", "name")
+        )
+        serializer = CourseBatchTagSerializer(batch_tags, many=True)
+        return Response(serializer.data, status.HTTP_200_OK)
+
     @action(
         detail=True,
         methods=["POST"],
@@ -303,6 +586,114 @@ class CourseViewSet(
                 course_history.save()
             return Response(status.HTTP_200_OK)
 
+    def _get_enrollment_request_filter(self, request_data):
+        """Helper function to build the filter for enrollment requests.
+
+        Args:
+            request_data (dict): Request data with optional `user_emails` (list) and
+                `roll_no_pattern` (str, `*` matches any sequence of characters)
+
+        Returns:
+            A `Q` object matching the selected enrollment requests (all if no filter
+            is given).
+        """
+        enrollment_filter = Q()
+        if request_data.get("user_emails"):
+            enrollment_filter &= Q(user__email__in=request_data["user_emails"])
+        if request_data.get("roll_no_pattern"):
+            roll_no_regex = ".*".join(
+                re.escape(part) for part in request_data["roll_no_pattern"].split("*")
+            )
+            enrollment_filter &= Q(
+                user__profile__roll_no__iregex="^{}$".format(roll_no_regex)
+            )
+        return enrollment_filter
+
+    @action(detail=True, methods=["POST"], permission_classes=[StrictIsInstructorOrTA])
+    def handle_enrollment_requests(self, request, pk):
+        """Approves/rejects pending enrollment requests in the course with id as pk.
+
+        The selected requests are updated by a single `UPDATE`. For approvals, the
+        student limit of the owner's subscription is checked with one aggregate
+        query in the same transaction, while the course row is locked so that
+        concurrent approvals can't exceed it.
+
+        Args:
+            request (Request): DRF `Request` object with:
+                1. `approve` or `reject` set to "true"
+                2. `user_emails` (optional): Emails of the users to handle
+                3. `roll_no_pattern` (optional): Roll number pattern (e.g. `17305*`)
+            pk (int): Course id
+
+        Returns:
+            `Response` with the number of approved/rejected requests, the enrolled
+            students and the remaining pending requests and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_400_BAD_REQUEST`: Raised if neither approve nor reject is given
+            `HTTP_401_UNAUTHORIZED`: Raised by `StrictIsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised:
+                1. By `StrictIsInstructorOrTA` permission class
+                2. If the student limit of the subscription is reached
+                3. By `SubscriptionHistory.DoesNotExist` exception
+            `HTTP_404_NOT_FOUND`: Raised by `get_object()` method
+        """
+        course = self.get_object()
+        request_data = request.data
+
+        if request_data.get("approve") == "true":
+            new_status, result_key = "E", "approved"
+        elif request_data.get("reject") == "true":
+            new_status, result_key = "U", "rejected"
+        else:
+            error = "Either approve or reject must be given."
+            logger.error(error)
+            return Response(error, status.HTTP_400_BAD_REQUEST)
+
+        enrollment_filter = self._get_enrollment_request_filter(request_data)
+        with transaction.atomic():
+            Course.objects.select_for_update().get(id=course.id)
+            course_histories = CourseHistory.objects.filter(course=course, role="S")
+            counts = course_histories.aggregate(
+                enrolled=Count("id", filter=Q(status="E")),
+                pending=Count("id", filter=Q(status="P")),
+                selected=Count("id", filter=Q(status="P") & enrollment_filter),
+            )
+
+            if new_status == "E":
+                try:
+                    subscription_history = SubscriptionHistory.objects.select_related(
+                        "subscription"
+                    ).get(user_id=course.owner_id)
+                except SubscriptionHistory.DoesNotExist as e:
+                    logger.exception(e)
+                    return Response(str(e), status.HTTP_403_FORBIDDEN)
+                limit = subscription_history.subscription.no_of_students_per_course
+                if counts["enrolled"] + counts["selected"] > limit:
+                    error = (
+                        "For course: `{}`, the limit of number of students ({}) "
+                        "will be exceeded.".format(course, limit)
+                    )
+                    logger.warning(error)
+                    return Response(error, status.HTTP_403_FORBIDDEN)
+
+            # `update()` skips `auto_now`, so `modified_on` is set explicitly
+            updated = (
+                course_histories.filter(status="P")
+                .filter(enrollment_filter)
+                .update(status=new_status, modified_on=timezone.now())
+            )
+
+        enrolled = counts["enrolled"] + (updated if new_status == "E" else 0)
+        return Response(
+            {
+                result_key: updated,
+                "enrolled": enrolled,
+                "pending": counts["pending"] - updated,
+            },
+            status.HTTP_200_OK,
+        )
+
     def _store_file(self, request, course):
         """Helper function to store the attached file in the server.
 
@@ -424,9 +815,56 @@ class CourseViewSet(
             msg += "{} user(s) newly enrolled in this course.\n\n".format(
                 pending_enrollments_count + new_enrollments_count
             )
+        batch_tags_count = enrollment_stats["batch_tags_count"]
+        if batch_tags_count:
+            msg += "{} batch tag(s) assigned in this course.\n\n".format(
+                batch_tags_count
+            )
 
         return Response(msg, status=status.HTTP_200_OK)
 
+    def _create_batch_tags(self, course, batch_tag_members):
+        """Helper function to bulk create batch tags and their memberships, which
+        replace the memberships of the users in the other batch tags of the same
+        categories.
+
+        Args:
+            course (Course): `Course` model object
+            batch_tag_members (dict): Users (`User` model objects) by (category,
+                name) of the batch tag
+
+        Returns:
+            Number of batch tags assigned.
+        """
+        CourseBatchTag.objects.bulk_create(
+            [
+                CourseBatchTag(course=course, category=category, name=name)
+                for category, name in batch_tag_members
+            ],
+            ignore_conflicts=True,
+        )
+        batch_tag_ids = {
+            (category, name): batch_tag_id
+            for batch_tag_id, category, name in CourseBatchTag.objects.filter(
+                course=course
+            ).values_list("id", "category", "name")
+        }
+        # A user is in one batch tag of a category, so the other memberships of
+        # the users in the category (from an earlier upload) are removed
+        for key, users in batch_tag_members.items():
+            CourseBatchTagHistory.objects.filter(
+                batch_tag__course=course, batch_tag__category=key[0], user__in=users
+            ).exclude(batch_tag=batch_tag_ids[key]).delete()
+        CourseBatchTagHistory.objects.bulk_create(
+            [
+                CourseBatchTagHistory(batch_tag_id=batch_tag_ids[key], user=user)
+                for key, users in batch_tag_members.items()
+                for user in users
+            ],
+            ignore_conflicts=True,
+        )
+        return len(batch_tag_members)
+
     @action(detail=True, methods=["POST"])
     def bulk_register_into_course(self, request, pk):
         """Bulk rgeister users from csv in a course with primary key as pk.
@@ -457,11 +895,25 @@ class CourseViewSet(
 
             try:
                 extra_fields = self._validate_and_get_extra_fields(header_fields)
-                print(extra_fields)
             except KeyError as e:
                 return (str(e), status.HTTP_404_NOT_FOUND)
 
+            # Each extra field is a batch tag category, e.g. "group" or "house"
+            batch_tag_fields = [
+                field
+                for field in extra_fields
+                if field not in BATCH_TAG_EXCLUDED_FIELDS
+            ]
+
             for student in reader:
+                for field in batch_tag_fields:
+                    name = student.get(field) or ""
+                    if max(len(field), len(name)) > settings.MAX_CHARFIELD_LENGTH:
+                        error = (
+                            "The batch tag `{}: {}` is longer than {} characters."
+                        ).format(field, name, settings.MAX_CHARFIELD_LENGTH)
+                        logger.error(error)
+                        return Response(error, status.HTTP_400_BAD_REQUEST)
                 student_list.append(student)
                 student_email = student["email"]
                 email_count[student_email] = email_count.get(student_email, 0) + 1
@@ -474,6 +926,8 @@ class CourseViewSet(
         existing_enrollments_count = 0
         pending_enrollments_count = 0
 
+        batch_tag_members = defaultdict(list)
+
         for student in student_list:
             try:
                 student = self._clean_and_validate_student_data(student, header_fields)
@@ -513,17 +967,27 @@ class CourseViewSet(
                 course_history = CourseHistory(user=user, course=course, status="E")
                 new_enrollment_list.append(course_history)
 
-        # Bulk creation for `User`
-        created_user_list = User.objects.bulk_create(new_user_list)
+            for field in batch_tag_fields:
+                if student.get(field):
+                    batch_tag_members[(field, student[field])].append(user)
+
+        # The users, enrollments and batch tags are all created or none of them
+        with transaction.atomic():
+            # Bulk creation for `User`
+            created_user_list = User.objects.bulk_create(new_user_list)
 
-        # Bulk creation for  `CourseHistory`
-        CourseHistory.objects.bulk_create(new_enrollment_list)
+            # Bulk creation for  `CourseHistory`
+            CourseHistory.objects.bulk_create(new_enrollment_list)
 
-        # Bulk creation for  `Profile`
-        Profile.objects.bulk_create([Profile(user=user) for user in created_user_list])
-        # TODO: handle roll no mismatch if profile exists
+            # Bulk creation for  `Profile`
+            Profile.objects.bulk_create(
+                [Profile(user=user) for user in created_user_list]
+            )
+            # TODO: handle roll no mismatch if profile exists
 
-        # TODO: Bulk creation for CourseBatchTag & CourseBatchTagHistory
+            # Bulk creation for `CourseBatchTag` & `CourseBatchTagHistory` (after the
+            # users are created so that their ids are set)
+            batch_tags_count = self._create_batch_tags(course, batch_tag_members)
 
         # TODO: send email
 
@@ -534,6 +998,7 @@ class CourseViewSet(
         enrollment_stats["existing_enrollments_count"] = existing_enrollments_count
         enrollment_stats["pending_enrollments_count"] = pending_enrollments_count
         enrollment_stats["new_enrollments_count"] = len(new_enrollment_list)
+        enrollment_stats["batch_tags_count"] = batch_tags_count
 
         return self._handle_message(enrollment_stats)
 
@@ -681,6 +1146,42 @@ class ChapterViewSet(
     def delete_chapter(self, request, pk):
         return self._delete(request, pk)
 
+    @action(detail=True, methods=["GET"])
+    def list_chapter_contents(self, request, pk):
+        """Gets the videos, documents, quizzes and sections of the chapter with id
+        as pk, with the contents of the sections, in `content_sequence` order.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Chapter id
+
+        Returns:
+            `Response` with the chapter and its contents and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_registered()` method
+            `HTTP_404_NOT_FOUND`: Raised if the chapter does not exist
+        """
+        try:
+            chapter = Chapter.objects.only(
+                "id", "course", "title", "content_sequence"
+            ).get(id=pk)
+        except Chapter.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        check = self._is_registered(chapter.course_id, request.user)
+        if check is not True:
+            return check
+
+        data = {
+            "id": chapter.id,
+            "title": chapter.title,
+            "contents": get_chapter_contents(chapter),
+        }
+        return Response(data, status.HTTP_200_OK)
+
 
 class SectionViewSet(
     viewsets.GenericViewSet,
@@ -891,7 +1392,10 @@ class AnnouncementViewSet(
 
     @action(detail=True, methods=["GET"])
     def list_latest_announcements(self, request, pk):
-        """Gets all the latest announcements in the course with primary key as pk.
+        """Gets the latest announcements in the course with primary key as pk.
+
+        The announcements are served from the cache, which is refreshed whenever an
+        announcement of the course is written.
 
         Args:
             request (Request): DRF `Request` object
@@ -909,15 +1413,7 @@ class AnnouncementViewSet(
         if check is not True:
             return check
 
-        queryset = Announcement.objects.filter(course=pk).order_by("-is_pinned", "-id")[
-            :2
-        ]
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(get_latest_announcements(pk))
 
     @action(detail=True, methods=["GET"])
     def retrieve_announcement(self, request, pk):
@@ -972,6 +1468,172 @@ class ScheduleViewSet(
     def list_schedules(self, request, pk):
         return self.list(request, pk)
 
+    def _get_user_schedules(self, user, start_date, end_date=None):
+        """Gets the schedules overlapping a date range in all the user's courses.
+
+        Args:
+            user (User): `User` model object
+            start_date (date): Start of the date range
+            end_date (date, optional): End of the date range (unbounded if None)
+
+        Returns:
+            A queryset of the schedules, ordered by end date & start date.
+        """
+        schedules = Schedule.objects.filter(
+            course__in=CourseHistory.objects.filter(user=user, status="E").values(
+                "course"
+            ),
+            end_date__gte=start_date,
+        )
+        if end_date is not None:
+            schedules = schedules.filter(start_date__lte=end_date)
+        return schedules.select_related("course").order_by("end_date", "start_date")
+
+    def _get_date_param(self, request, name):
+        """Parses a date query parameter.
+
+        Args:
+            request (Request): DRF `Request` object
+            name (str): Name of the query parameter
+
+        Returns:
+            The date, or None if the query parameter is not given.
+
+        Raises:
+            ValueError: Raised if the query parameter is not a valid date
+        """
+        value = request.query_params.get(name)
+        if value is None:
+            return None
+        date = parse_date(value)
+        if date is None:
+            raise ValueError("`{}` is not a valid date: `{}`.".format(name, value))
+        return date
+
+    @action(detail=False, methods=["GET"])
+    def list_upcoming_schedules(self, request):
+        """Gets the schedules overlapping a date range in all the user's courses.
+
+        Query params:
+            start_date (str, optional): Start date (YYYY-MM-DD). Defaults to today.
+            end_date (str, optional): End date (YYYY-MM-DD). Defaults to
+                `UPCOMING_SCHEDULES_DAYS` days after the start date.
+
+        Args:
+            request (Request): DRF `Request` object
+
+        Returns:
+            `Response` with the schedules data (with the course title and the titles
+            of the contents) and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_400_BAD_REQUEST`: Raised if a date is invalid or the end date is
+                before the start date
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+        """
+        try:
+            start_date = self._get_date_param(request, "start_date")
+            end_date = self._get_date_param(request, "end_date")
+        except ValueError as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_400_BAD_REQUEST)
+        start_date = start_date or timezone.localdate()
+        end_date = end_date or start_date + timedelta(days=UPCOMING_SCHEDULES_DAYS)
+        check = self.schedule_date_check(start_date, end_date)
+        if check is not True:
+            return check
+
+        schedules = list(self._get_user_schedules(request.user, start_date, end_date))
+        content_titles = get_content_titles(
+            schedule.content_list for schedule in schedules
+        )
+        schedules_data = self.get_serializer(schedules, many=True).data
+        for schedule, schedule_data in zip(schedules, schedules_data):
+            schedule_data["course_title"] = schedule.course.title
+            schedule_data["contents"] = [
+                {
+                    "content_type": content_type,
+                    "id": content_id,
+                    "title": content_titles.get((content_type, content_id)),
+                }
+                for content_type, content_id in schedule.content_list or []
+            ]
+        return Response(schedules_data)
+
+    @action(detail=False, methods=["GET"])
+    def ics_feed_url(self, request):
+        """Gets the url of the user's iCalendar feed of schedules.
+
+        The url carries a signed token identifying the user, since calendar clients
+        can't authenticate otherwise. The token also carries the session auth hash
+        of the user, so that changing the password revokes the leaked urls.
+
+        Args:
+            request (Request): DRF `Request` object
+
+        Returns:
+            `Response` with the feed url and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+        """
+        user = request.user
+        token = signing.dumps(
+            [user.id, user.get_session_auth_hash()], salt=SCHEDULES_ICS_SALT
+        )
+        url = "{}?{}".format(
+            reverse("course:schedule-ics-feed"), urlencode({"token": token})
+        )
+        return Response({"url": request.build_absolute_uri(url)})
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        permission_classes=[AllowAny],
+        authentication_classes=[],
+    )
+    def ics_feed(self, request):
+        """Gets the iCalendar feed of the schedules in all the user's courses.
+
+        Calendar clients poll the feed constantly, so it is cached per user and
+        rebuilt only after a `Schedule` is written or the cache entry expires.
+
+        Query params:
+            token (str): Signed token given by `ics_feed_url()`
+
+        Args:
+            request (Request): DRF `Request` object
+
+        Returns:
+            `HttpResponse` with the iCalendar feed and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_403_FORBIDDEN`: Raised if the token is invalid or revoked
+        """
+        try:
+            user_id, auth_hash = signing.loads(
+                request.query_params.get("token", ""), salt=SCHEDULES_ICS_SALT
+            )
+            user = User.objects.get(id=user_id, is_active=True)
+        except (signing.BadSignature, TypeError, ValueError, User.DoesNotExist) as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_403_FORBIDDEN)
+        if not constant_time_compare(auth_hash, user.get_session_auth_hash()):
+            error = "The token of the user `{}` is revoked.".format(user)
+            logger.error(error)
+            return Response(error, status.HTTP_403_FORBIDDEN)
+
+        ics = get_schedules_ics(user_id)
+        if ics is None:
+            start_date = timezone.localdate() - timedelta(days=SCHEDULES_ICS_PAST_DAYS)
+            schedules = list(self._get_user_schedules(user, start_date))
+            content_titles = get_content_titles(
+                schedule.content_list for schedule in schedules
+            )
+            ics = build_schedules_ics(schedules, content_titles)
+            set_schedules_ics(user_id, ics)
+        return HttpResponse(ics, content_type="text/calendar; charset=utf-8")
+
     @action(detail=True, methods=["GET"])
     def retrieve_schedule(self, request, pk):
         return self.retrieve(request, pk)
@@ -1,5 +1,26 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 
 
 class CourseConfig(AppConfig):
     name = "course"
+
+    def ready(self):
+        from . import signals
+        from .models import StorageTrackedModel
+        from .search import SEARCH_CONTENT_TYPE_BY_MODEL
+
+        # Connected to the tracked models only, as any delete listener of a model
+        # disables the fast deletes of its rows
+        for model in self.apps.get_models():
+            if issubclass(model, StorageTrackedModel):
+                pre_save.connect(signals.remember_stored_files, sender=model)
+                post_save.connect(signals.update_storage_usage_on_save, sender=model)
+                pre_delete.connect(signals.remember_deleted_storage, sender=model)
+                post_delete.connect(
+                    signals.update_storage_usage_on_delete, sender=model
+                )
+
+        for model in SEARCH_CONTENT_TYPE_BY_MODEL:
+            post_save.connect(signals.update_search_entry, sender=model)
+            post_delete.connect(signals.delete_search_entry, sender=model)
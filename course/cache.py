@@ -0,0 +1,125 @@
+import time
+
+from django.core.cache import cache
+
+from .models import Announcement
+from .serializers import AnnouncementSerializer
+
+
+# Number of announcements shown as the latest announcements of a course
+LATEST_ANNOUNCEMENTS_COUNT = 2
+
+LATEST_ANNOUNCEMENTS_VERSION_CACHE_KEY = "course:{}:latest_announcements_version"
+
+LATEST_ANNOUNCEMENTS_CACHE_KEY = "course:{}:latest_announcements:{}"
+
+# Safety net for writes which bypass the signals (e.g. `QuerySet.update()`)
+LATEST_ANNOUNCEMENTS_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _get_latest_announcements_version(course_id):
+    """Gets the version of the announcements of a course, which changes on every
+    committed `Announcement` write.
+
+    Args:
+        course_id (int): Course id
+
+    Returns:
+        The version of the announcements of the course.
+    """
+    key = LATEST_ANNOUNCEMENTS_VERSION_CACHE_KEY.format(course_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.set(key, version, None)
+    return version
+
+
+def bump_latest_announcements_version(course_id):
+    """Changes the version of the announcements of a course, so that its cached
+    latest announcements are stale.
+
+    Args:
+        course_id (int): Course id
+    """
+    cache.set(
+        LATEST_ANNOUNCEMENTS_VERSION_CACHE_KEY.format(course_id), time.time_ns(), None
+    )
+
+
+def get_latest_announcements(course_id):
+    """Gets the latest announcements of a course from the cache.
+
+    The announcements are cached under the version read before them, so that a
+    value read before a write is committed is never served after it.
+
+    Args:
+        course_id (int): Course id
+
+    Returns:
+        A list of serialized announcements (pinned first, then newest first).
+    """
+    key = LATEST_ANNOUNCEMENTS_CACHE_KEY.format(
+        course_id, _get_latest_announcements_version(course_id)
+    )
+    data = cache.get(key)
+    if data is None:
+        # Served by `announcement_latest_idx` index
+        announcements = Announcement.objects.filter(course=course_id).order_by(
+            "-is_pinned", "-id"
+        )[:LATEST_ANNOUNCEMENTS_COUNT]
+        data = list(AnnouncementSerializer(announcements, many=True).data)
+        cache.set(key, data, LATEST_ANNOUNCEMENTS_CACHE_TIMEOUT)
+    return data
+
+
+SCHEDULES_VERSION_CACHE_KEY = "course:schedules_version"
+
+SCHEDULES_ICS_CACHE_KEY = "course:user:{}:schedules_ics:{}"
+
+# Also bounds the staleness of a feed after the user's enrollments change
+SCHEDULES_ICS_CACHE_TIMEOUT = 15 * 60
+
+
+def _get_schedules_version():
+    """Gets the version of the schedules, which changes on every `Schedule` write.
+
+    Returns:
+        The version of the schedules.
+    """
+    version = cache.get(SCHEDULES_VERSION_CACHE_KEY)
+    if version is None:
+        version = time.time_ns()
+        cache.set(SCHEDULES_VERSION_CACHE_KEY, version, None)
+    return version
+
+
+def bump_schedules_version():
+    """Changes the version of the schedules, so that all cached feeds are stale."""
+    cache.set(SCHEDULES_VERSION_CACHE_KEY, time.time_ns(), None)
+
+
+def get_schedules_ics(user_id):
+    """Gets the cached iCalendar feed of the schedules of a user.
+
+    Args:
+        user_id (int): User id
+
+    Returns:
+        The iCalendar feed or None if it is not cached.
+    """
+    return cache.get(SCHEDULES_ICS_CACHE_KEY.format(user_id, _get_schedules_version()))
+
+
+def set_schedules_ics(user_id, ics):
+    """Caches the iCalendar feed of the schedules of a user.
+
+    Args:
+        user_id (int): User id
+        ics (str): iCalendar feed
+    """
+    cache.set(
+        SCHEDULES_ICS_CACHE_KEY.format(user_id, _get_schedules_version()),
+        ics,
+        SCHEDULES_ICS_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+
+# Lines longer than this (in octets) are folded as required by RFC 5545
+ICS_LINE_LENGTH = 75
+
+
+def _escape_text(text):
+    """Escapes a text value of an iCalendar property.
+
+    Args:
+        text (str): Text value
+
+    Returns:
+        The escaped text.
+    """
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold_line(line):
+    """Folds a content line into lines of at most `ICS_LINE_LENGTH` octets.
+
+    Args:
+        line (str): Content line
+
+    Returns:
+        The folded content line.
+    """
+    folded = []
+    current = ""
+    for char in line:
+        limit = ICS_LINE_LENGTH if not folded else ICS_LINE_LENGTH - 1
+        if len((current + char).encode()) > limit:
+            folded.append(current)
+            current = ""
+        current += char
+    folded.append(current)
+    return "\r\n ".join(folded)
+
+
+def build_schedules_ics(schedules, content_titles):
+    """Builds an iCalendar feed with an all-day event for every schedule.
+
+    Args:
+        schedules (iterable): `Schedule` model objects (with `course` selected)
+        content_titles (dict): Content titles by (content type, content id), as
+            returned by `get_content_titles()`
+
+    Returns:
+        The iCalendar feed as a string.
+    """
+    dtstamp = timezone.now().strftime("%Y%m%dT%H%M%SZ")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//BodhiTree//Schedules//EN",
+        "CALSCALE:GREGORIAN",
+        "X-WR-CALNAME:BodhiTree",
+    ]
+    for schedule in schedules:
+        titles = [
+            content_titles[(content_type, content_id)]
+            for content_type, content_id in schedule.content_list or []
+            if (content_type, content_id) in content_titles
+        ]
+        description = "\n".join(filter(None, [schedule.description] + titles))
+        lines += [
+            "BEGIN:VEVENT",
+            "UID:schedule-{}@bodhitree".format(schedule.id),
+            "DTSTAMP:{}".format(dtstamp),
+            "DTSTART;VALUE=DATE:{}".format(schedule.start_date.strftime("%Y%m%d")),
+            # End date of an all-day event is exclusive
+            "DTEND;VALUE=DATE:{}".format(
+                (schedule.end_date + timedelta(days=1)).strftime("%Y%m%d")
+            ),
+            "SUMMARY:{}".format(_escape_text(str(schedule.course))),
+            "DESCRIPTION:{}".format(_escape_text(description)),
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "".join(_fold_line(line) + "\r\n" for line in lines)
@@ -0,0 +1,47 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.storage import BLOB_DIR, UPLOAD_STAGING_DIR, ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = (
+        "Links the media files stored before content-addressed storage to their "
+        "blobs and deletes the blobs no longer referenced by any file."
+    )
+
+    def _get_file_names(self):
+        """Gets the logical names of the media files.
+
+        Yields:
+            The name of every file, except the blobs and the in-progress uploads.
+        """
+        root = default_storage.location
+        for dir_path, dir_names, file_names in os.walk(root):
+            if dir_path == root:
+                dir_names[:] = [
+                    name
+                    for name in dir_names
+                    if name not in (BLOB_DIR, UPLOAD_STAGING_DIR)
+                ]
+            for file_name in file_names:
+                yield os.path.relpath(os.path.join(dir_path, file_name), root)
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            raise CommandError("The default storage is not content-addressed.")
+
+        reclaimed = 0
+        for name in self._get_file_names():
+            if default_storage.deduplicate(name):
+                reclaimed += default_storage.size(name)
+        freed = default_storage.collect_blobs()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Reclaimed {} bytes of duplicates and {} bytes of unused blobs.".format(
+                    reclaimed, freed
+                )
+            )
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from course.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index of the course contents."
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index()
+        self.stdout.write(
+            self.style.SUCCESS("Rebuilt {} search entries.".format(count))
+        )
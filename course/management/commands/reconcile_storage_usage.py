@@ -0,0 +1,78 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from course.models import StorageTrackedModel, StorageUsage
+from course.storage import get_file_names, get_file_size, get_local_storage_fields
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the storage usage ledger from the files on disk."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=16,
+            help="Number of threads reading the file sizes.",
+        )
+
+    def _get_stored_files(self):
+        """Gets the stored files of all the `StorageTrackedModel` objects.
+
+        Yields:
+            (user id, course id, storage category, storage, file name) of every file.
+        """
+        for model in apps.get_models():
+            if not issubclass(model, StorageTrackedModel):
+                continue
+            fields = get_local_storage_fields(model)
+            rows = (
+                model._base_manager.annotate(
+                    storage_user_id=model.storage_user,
+                    storage_course_id=model.storage_course,
+                )
+                .values_list("storage_user_id", "storage_course_id", *fields)
+                .iterator()
+            )
+            for user_id, course_id, *values in rows:
+                if user_id is None or course_id is None:
+                    continue
+                for field_name, value in zip(fields, values):
+                    field = model._meta.get_field(field_name)
+                    storage = getattr(field, "base_field", field).storage
+                    category = model.storage_fields[field_name]
+                    for name in get_file_names(value):
+                        yield user_id, course_id, category, storage, name
+
+    def handle(self, *args, **options):
+        usage = defaultdict(int)
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            sizes = executor.map(
+                lambda stored_file: (
+                    stored_file[:3],
+                    get_file_size(stored_file[3], stored_file[4]),
+                ),
+                self._get_stored_files(),
+            )
+            for key, size in sizes:
+                usage[key] += size
+
+        with transaction.atomic():
+            StorageUsage.objects.all().delete()
+            StorageUsage.objects.bulk_create(
+                StorageUsage(
+                    user_id=user_id, course_id=course_id, category=category, size=size
+                )
+                for (user_id, course_id, category), size in usage.items()
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Rebuilt the storage usage of {} (user, course, category).".format(
+                    len(usage)
+                )
+            )
+        )
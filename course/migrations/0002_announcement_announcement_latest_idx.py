@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-19 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['course', 'is_pinned', 'id'], name='announcement_latest_idx'),
+        ),
+    ]
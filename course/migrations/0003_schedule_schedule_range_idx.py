@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-19 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0002_announcement_announcement_latest_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['course', 'end_date', 'start_date'], name='schedule_range_idx'),
+        ),
+    ]
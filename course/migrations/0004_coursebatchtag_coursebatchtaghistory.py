@@ -0,0 +1,43 @@
+# Generated by Django 3.2 on 2026-10-19 06:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('course', '0003_schedule_schedule_range_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseBatchTag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100)),
+                ('name', models.CharField(max_length=100)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='course.course')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseBatchTagHistory',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('batch_tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='course.coursebatchtag')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='coursebatchtaghistory',
+            constraint=models.UniqueConstraint(fields=('batch_tag', 'user'), name='unique_course_batch_tag_history'),
+        ),
+        migrations.AddConstraint(
+            model_name='coursebatchtag',
+            constraint=models.UniqueConstraint(fields=('course', 'category', 'name'), name='unique_course_batch_tag'),
+        ),
+    ]
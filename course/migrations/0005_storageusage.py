@@ -0,0 +1,31 @@
+# Generated by Django 3.2 on 2026-10-19 06:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('course', '0004_coursebatchtag_coursebatchtaghistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageUsage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('V', 'Video'), ('C', 'Content'), ('S', 'Submission')], max_length=1)),
+                ('size', models.BigIntegerField(default=0)),
+                ('modified_on', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='course.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='storageusage',
+            constraint=models.UniqueConstraint(fields=('user', 'course', 'category'), name='unique_storage_usage'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2 on 2026-10-19 07:04
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0005_storageusage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(choices=[('page', 'Page'), ('chapter', 'Chapter'), ('section', 'Section'), ('video', 'Video'), ('document', 'Document'), ('announcement', 'Announcement'), ('single_correct_question', 'Single Correct Question'), ('multiple_correct_question', 'Multiple Correct Question'), ('fixed_answer_question', 'Fixed Answer Question')], max_length=32)),
+                ('object_id', models.IntegerField()),
+                ('title', models.CharField(max_length=100)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='course.course')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchentry',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='search_entry_vector_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_search_entry'),
+        ),
+    ]
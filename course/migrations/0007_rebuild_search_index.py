@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-19 09:12
+
+from django.db import migrations
+
+
+def rebuild_search_index(apps, schema_editor):
+    # The search vectors are computed by `course.search` from the current models,
+    # hence the dependencies on the latest migrations of the searchable contents
+    from course.search import rebuild_search_index
+
+    rebuild_search_index()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0006_searchentry'),
+        ('document', '0002_document_doc_text'),
+        ('quiz', '0004_gradebookentry'),
+        ('video', '0008_video_doc_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
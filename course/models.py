@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 
 from registration.models import College, Department
 
@@ -29,6 +31,24 @@ CONTENT_TYPES = (
     ("S", "Section"),
 )
 
+STORAGE_CATEGORIES = (
+    ("V", "Video"),
+    ("C", "Content"),
+    ("S", "Submission"),
+)
+
+SEARCH_CONTENT_TYPES = (
+    ("page", "Page"),
+    ("chapter", "Chapter"),
+    ("section", "Section"),
+    ("video", "Video"),
+    ("document", "Document"),
+    ("announcement", "Announcement"),
+    ("single_correct_question", "Single Correct Question"),
+    ("multiple_correct_question", "Multiple Correct Question"),
+    ("fixed_answer_question", "Fixed Answer Question"),
+)
+
 
 class Course(models.Model):
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -80,6 +100,40 @@ class CourseHistory(models.Model):
         return "{}: {}".format(self.user, self.course)
 
 
+class CourseBatchTag(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    category = models.CharField(max_length=settings.MAX_CHARFIELD_LENGTH)
+    name = models.CharField(max_length=settings.MAX_CHARFIELD_LENGTH)
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["course", "category", "name"], name="unique_course_batch_tag"
+            )
+        ]
+
+    def __str__(self):
+        return "{}: {}".format(self.category, self.name)
+
+
+class CourseBatchTagHistory(models.Model):
+    batch_tag = models.ForeignKey(CourseBatchTag, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Also serves as the index on the members of a batch tag
+        constraints = [
+            models.UniqueConstraint(
+                fields=["batch_tag", "user"], name="unique_course_batch_tag_history"
+            )
+        ]
+
+    def __str__(self):
+        return "{}: {}".format(self.user, self.batch_tag)
+
+
 class Chapter(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     title = models.CharField(max_length=settings.MAX_CHARFIELD_LENGTH)
@@ -152,6 +206,12 @@ class Schedule(models.Model):
                 name="unique_schedule",
             )
         ]
+        indexes = [
+            # Schedules of a course overlapping a date range
+            models.Index(
+                fields=["course", "end_date", "start_date"], name="schedule_range_idx"
+            )
+        ]
 
     def __str__(self):
         return "{}: From:- {} To:- {}".format(
@@ -182,5 +242,74 @@ class Announcement(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     modified_on = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Latest (pinned first) announcements of a course
+            models.Index(
+                fields=["course", "is_pinned", "id"], name="announcement_latest_idx"
+            )
+        ]
+
     def __str__(self):
         return self.body
+
+
+class StorageUsage(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    category = models.CharField(max_length=1, choices=STORAGE_CATEGORIES)
+    size = models.BigIntegerField(default=0)
+    modified_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "course", "category"], name="unique_storage_usage"
+            )
+        ]
+
+    def __str__(self):
+        return "{}: {} ({})".format(self.user, self.course, self.category)
+
+
+class SearchEntry(models.Model):
+    """Full-text search index entry of a content of a course (see `course.search`)."""
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    content_type = models.CharField(max_length=32, choices=SEARCH_CONTENT_TYPES)
+    object_id = models.IntegerField()
+    title = models.CharField(max_length=settings.MAX_CHARFIELD_LENGTH)
+    search_vector = SearchVectorField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id"], name="unique_search_entry"
+            )
+        ]
+        indexes = [GinIndex(fields=["search_vector"], name="search_entry_vector_idx")]
+
+    def __str__(self):
+        return "{}: {}".format(self.content_type, self.title)
+
+
+class StorageTrackedModel(models.Model):
+    """Base class of the models whose files are counted in `StorageUsage`.
+
+    Subclasses define:
+        storage_fields (dict): Storage category by file field name
+        storage_user (Expression): The user charged for the files
+        storage_course (Expression): The course of the files
+    """
+
+    storage_fields = {}
+    storage_user = None
+    storage_course = None
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # `StorageUsage` is updated by the save signals, in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
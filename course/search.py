@@ -0,0 +1,248 @@
+"""Full-text search of the contents of the courses.
+
+Every searchable content has a `SearchEntry` with the course, a title to show
+and a weighted `tsvector` (title words rank above body words, above the text of
+the document files) computed by PostgreSQL. The entries are maintained on write
+by the signals of `course.signals` and may be rebuilt with the
+`rebuild_search_index` management command (e.g. after writes which bypass the
+signals, like `QuerySet.update()`). The text of the document files is extracted
+in the background by the `extract_doc_texts` management command.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Substr
+
+from document.models import Document
+from quiz.models import (
+    FixedAnswerQuestion,
+    MultipleCorrectQuestion,
+    SingleCorrectQuestion,
+)
+from video.models import Video
+
+from .models import Announcement, Chapter, Page, SearchEntry, Section
+
+
+# Text search configuration of the vectors and the queries
+SEARCH_CONFIG = "english"
+
+# Maximum number of results of a search
+SEARCH_RESULTS_LIMIT = 50
+
+SearchSource = namedtuple(
+    "SearchSource",
+    [
+        "model",
+        "course",
+        "title",
+        "title_fields",
+        "body_fields",
+        "filters",
+        "text_fields",
+    ],
+    defaults=([],),
+)
+
+
+def _get_content_course():
+    """Gets the course of a content of a chapter or section (video, document)."""
+    return Coalesce(F("chapter__course"), F("section__chapter__course"))
+
+
+def _get_question_source(model):
+    """Gets the search source of a question model (only published questions)."""
+    return SearchSource(
+        model,
+        Coalesce(
+            F("question_module__quiz__chapter__course"),
+            F("question_module__quiz__section__chapter__course"),
+        ),
+        Substr("question_description", 1, settings.MAX_CHARFIELD_LENGTH),
+        [],
+        ["question_description"],
+        {"is_published": True},
+    )
+
+
+SEARCH_SOURCES = {
+    "page": SearchSource(Page, F("course"), F("title"), ["title"], ["description"], {}),
+    "chapter": SearchSource(
+        Chapter, F("course"), F("title"), ["title"], ["description"], {}
+    ),
+    "section": SearchSource(
+        Section, F("chapter__course"), F("title"), ["title"], ["description"], {}
+    ),
+    "video": SearchSource(
+        Video,
+        _get_content_course(),
+        F("title"),
+        ["title"],
+        ["description"],
+        {},
+        ["doc_text"],
+    ),
+    "document": SearchSource(
+        Document,
+        _get_content_course(),
+        F("title"),
+        ["title"],
+        ["description"],
+        {},
+        ["doc_text"],
+    ),
+    "announcement": SearchSource(
+        Announcement,
+        F("course"),
+        Substr("body", 1, settings.MAX_CHARFIELD_LENGTH),
+        [],
+        ["body"],
+        {},
+    ),
+    "single_correct_question": _get_question_source(SingleCorrectQuestion),
+    "multiple_correct_question": _get_question_source(MultipleCorrectQuestion),
+    "fixed_answer_question": _get_question_source(FixedAnswerQuestion),
+}
+
+SEARCH_CONTENT_TYPE_BY_MODEL = {
+    source.model: content_type for content_type, source in SEARCH_SOURCES.items()
+}
+
+
+def _get_search_vector(source):
+    """Gets the weighted search vector of a search source.
+
+    Args:
+        source (SearchSource): Search source
+
+    Returns:
+        The `SearchVector` expression.
+    """
+    vectors = [
+        SearchVector(*fields, weight=weight, config=SEARCH_CONFIG)
+        for fields, weight in [
+            (source.title_fields, "A"),
+            (source.body_fields, "B"),
+            (source.text_fields, "C"),
+        ]
+        if fields
+    ]
+    vector = vectors[0]
+    for other in vectors[1:]:
+        vector = vector + other
+    return vector
+
+
+def _get_contents(content_type, ids=None):
+    """Gets the searchable contents of a type.
+
+    Args:
+        content_type (str): Content type (a key of `SEARCH_SOURCES`)
+        ids (list): Ids of the contents, by default all of them
+
+    Returns:
+        A queryset of the contents.
+    """
+    source = SEARCH_SOURCES[content_type]
+    contents = source.model._base_manager.filter(**source.filters)
+    if ids is not None:
+        contents = contents.filter(id__in=ids)
+    return contents
+
+
+def index_contents(content_type, ids=None):
+    """Creates or updates the search entries of contents in a single query.
+
+    The vectors are computed by the database from the contents, and the entries
+    of the given contents which are no longer searchable (e.g. unpublished
+    questions) are removed.
+
+    Args:
+        content_type (str): Content type (a key of `SEARCH_SOURCES`)
+        ids (list): Ids of the contents, by default all of them
+    """
+    source = SEARCH_SOURCES[content_type]
+    contents = _get_contents(content_type, ids)
+    # Annotations only, so that the columns are selected in this order
+    rows = (
+        contents.annotate(
+            search_content_type=Value(content_type, output_field=models.CharField()),
+            search_object_id=F("id"),
+            search_course_id=source.course,
+            search_title=source.title,
+            search_vector=_get_search_vector(source),
+        )
+        .values_list(
+            "search_content_type",
+            "search_object_id",
+            "search_course_id",
+            "search_title",
+            "search_vector",
+        )
+        .order_by()
+    )
+    select_sql, params = rows.query.sql_with_params()
+    sql = (
+        "INSERT INTO {table} (content_type, object_id, course_id, title, "
+        "search_vector) {select} "
+        "ON CONFLICT (content_type, object_id) DO UPDATE SET "
+        "course_id = EXCLUDED.course_id, title = EXCLUDED.title, "
+        "search_vector = EXCLUDED.search_vector"
+    ).format(table=SearchEntry._meta.db_table, select=select_sql)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+        if ids is not None:
+            SearchEntry.objects.filter(
+                content_type=content_type, object_id__in=ids
+            ).exclude(object_id__in=contents.values("id")).delete()
+
+
+def remove_contents(content_type, ids):
+    """Removes the search entries of contents.
+
+    Args:
+        content_type (str): Content type (a key of `SEARCH_SOURCES`)
+        ids (list): Ids of the contents
+    """
+    SearchEntry.objects.filter(content_type=content_type, object_id__in=ids).delete()
+
+
+def rebuild_search_index():
+    """Rebuilds the search entries of all the contents.
+
+    Returns:
+        The number of search entries.
+    """
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        for content_type in SEARCH_SOURCES:
+            index_contents(content_type)
+        return SearchEntry.objects.count()
+
+
+def search_course_contents(course_id, query):
+    """Searches the contents of a course.
+
+    The query is parsed like a web search query (quoted phrases, `or`, `-`),
+    matched with the GIN index of the vectors and ranked with the weights of
+    the title and body words.
+
+    Args:
+        course_id (int): Course id
+        query (str): Search query
+
+    Returns:
+        A list of the `SEARCH_RESULTS_LIMIT` best matches, each a dictionary with
+        the `content_type`, `object_id`, `title` and `rank`.
+    """
+    search_query = SearchQuery(query, search_type="websearch", config=SEARCH_CONFIG)
+    return list(
+        SearchEntry.objects.filter(course=course_id, search_vector=search_query)
+        .annotate(rank=SearchRank(F("search_vector"), search_query))
+        .order_by("-rank", "content_type", "object_id")
+        .values("content_type", "object_id", "title", "rank")[:SEARCH_RESULTS_LIMIT]
+    )
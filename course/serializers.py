@@ -8,6 +8,7 @@ from .models import (
     Announcement,
     Chapter,
     Course,
+    CourseBatchTag,
     CourseHistory,
     Page,
     Schedule,
@@ -61,6 +62,14 @@ class CourseHistorySerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class CourseBatchTagSerializer(serializers.ModelSerializer):
+    member_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = CourseBatchTag
+        fields = "__all__"
+
+
 class ChapterSerializer(serializers.ModelSerializer):
     class Meta:
         model = Chapter
@@ -0,0 +1,142 @@
+from collections import defaultdict
+
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_latest_announcements_version, bump_schedules_version
+from .models import Announcement, Schedule
+from .search import SEARCH_CONTENT_TYPE_BY_MODEL, index_contents, remove_contents
+from .storage import (
+    get_file_names,
+    get_local_storage_fields,
+    get_storage_owner,
+    get_storage_owners,
+    get_storage_sizes,
+    update_storage_usage,
+)
+
+
+@receiver([post_save, post_delete], sender=Announcement)
+def update_latest_announcements_version(sender, instance, **kwargs):
+    """Makes the cached latest announcements of the announcement's course stale.
+
+    The version is changed once the transaction is committed, so that the latest
+    announcements are never cached from uncommitted rows under the new version.
+    """
+    course_id = instance.course_id
+    transaction.on_commit(lambda: bump_latest_announcements_version(course_id))
+
+
+@receiver([post_save, post_delete], sender=Schedule)
+def update_schedules_version(sender, instance, **kwargs):
+    """Makes the cached schedule feeds stale.
+
+    The version is changed once the transaction is committed, so that a feed is
+    never cached from uncommitted rows under the new version.
+    """
+    transaction.on_commit(bump_schedules_version)
+
+
+def remember_stored_files(sender, instance, raw, update_fields, **kwargs):
+    """Remembers the files of a `StorageTrackedModel` object before it is saved."""
+    if raw:
+        return
+    fields = list(sender.storage_fields)
+    instance._stored_file_names = None
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return
+
+    instance._stored_file_names = {}
+    if instance.pk is not None:
+        values = sender._base_manager.filter(pk=instance.pk).values(*fields).first()
+        if values is not None:
+            instance._stored_file_names = {
+                field: get_file_names(value) for field, value in values.items()
+            }
+
+
+def update_storage_usage_on_save(sender, instance, raw, **kwargs):
+    """Adds the size change of the files of a saved `StorageTrackedModel` object."""
+    old_file_names = getattr(instance, "_stored_file_names", None)
+    if raw or old_file_names is None:
+        return
+    added, removed = {}, {}
+    for field in sender.storage_fields:
+        new_names = get_file_names(getattr(instance, field))
+        old_names = old_file_names.get(field, [])
+        added[field] = [name for name in new_names if name not in old_names]
+        removed[field] = [name for name in old_names if name not in new_names]
+    if not any(added.values()) and not any(removed.values()):
+        return
+
+    added_sizes = get_storage_sizes(sender, added)
+    removed_sizes = get_storage_sizes(sender, removed)
+    sizes = {
+        category: added_sizes[category] - removed_sizes[category]
+        for category in set(added_sizes) | set(removed_sizes)
+    }
+    user_id, course_id = get_storage_owner(instance)
+    if user_id is not None and course_id is not None:
+        update_storage_usage(user_id, course_id, sizes)
+
+
+def remember_deleted_storage(sender, instance, using, **kwargs):
+    """Remembers the size of the files of a `StorageTrackedModel` object which is
+    being deleted.
+
+    The parents of a multi-table inherited model get their own signals, so only
+    the local fields are counted.
+    """
+    file_names = {
+        field: get_file_names(getattr(instance, field))
+        for field in get_local_storage_fields(sender)
+    }
+    instance._deleted_storage_sizes = get_storage_sizes(sender, file_names)
+    connection = connections[using]
+    if not hasattr(connection, "deleted_storage_objects"):
+        connection.deleted_storage_objects = defaultdict(list)
+    connection.deleted_storage_objects[sender].append(instance)
+
+
+def update_storage_usage_on_delete(sender, instance, using, **kwargs):
+    """Subtracts the size of the files of deleted `StorageTrackedModel` objects.
+
+    The objects of the model deleted together are all handled on the first signal
+    (as every pre-delete signal is sent before the first row is deleted): their
+    owners are fetched at once from their related objects, which are deleted
+    after them, and the usage of each owner is updated once.
+    """
+    instances = getattr(connections[using], "deleted_storage_objects", {}).pop(
+        sender, []
+    )
+    if not instances:
+        return
+    # The objects remembered by a deletion which was rolled back still exist
+    existing_ids = set(
+        sender._base_manager.using(using)
+        .filter(pk__in=[obj.pk for obj in instances])
+        .values_list("pk", flat=True)
+    )
+    instances = [obj for obj in instances if obj.pk not in existing_ids]
+
+    sizes = defaultdict(lambda: defaultdict(int))
+    owners = get_storage_owners(sender, instances)
+    for obj, (user_id, course_id) in zip(instances, owners):
+        if user_id is not None and course_id is not None:
+            for category, size in obj._deleted_storage_sizes.items():
+                sizes[user_id, course_id][category] -= size
+    for (user_id, course_id), owner_sizes in sizes.items():
+        update_storage_usage(user_id, course_id, owner_sizes)
+
+
+def update_search_entry(sender, instance, raw, **kwargs):
+    """Indexes a saved searchable content (see `course.search`)."""
+    if raw:
+        return
+    index_contents(SEARCH_CONTENT_TYPE_BY_MODEL[sender], [instance.pk])
+
+
+def delete_search_entry(sender, instance, **kwargs):
+    """Removes a deleted searchable content from the search index."""
+    remove_contents(SEARCH_CONTENT_TYPE_BY_MODEL[sender], [instance.pk])
@@ -0,0 +1,197 @@
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import F, prefetch_related_objects
+
+from .models import StorageUsage
+
+
+def get_file_names(value):
+    """Gets the names of the files stored in the value of a file field.
+
+    Args:
+        value: Value of a `FileField` (or an `ArrayField` of them), either as a
+            `FieldFile` or as stored in the database
+
+    Returns:
+        A list of file names.
+    """
+    values = value if isinstance(value, list) else [value]
+    return [str(getattr(value, "name", value)) for value in values if value]
+
+
+def get_local_storage_fields(model):
+    """Gets the storage fields of a model which are stored in its own table.
+
+    The rows of a multi-table inherited model are deleted (and read) along with
+    the rows of its parents, so each model only counts its local fields.
+
+    Args:
+        model (class): `StorageTrackedModel` subclass
+
+    Returns:
+        A list of file field names.
+    """
+    return [
+        field_name
+        for field_name in model.storage_fields
+        if model._meta.get_field(field_name).model is model
+    ]
+
+
+def get_file_size(storage, name):
+    """Gets the size of a stored file.
+
+    Args:
+        storage (Storage): Storage of the file
+        name (str): File name
+
+    Returns:
+        The file size (in bytes), 0 if the file does not exist.
+    """
+    try:
+        return storage.size(name)
+    except OSError:
+        return 0
+
+
+def get_storage_sizes(model, file_names):
+    """Gets the size of the files of a model object by storage category.
+
+    Args:
+        model (class): `StorageTrackedModel` subclass
+        file_names (dict): Lists of file names by file field name
+
+    Returns:
+        A dictionary of sizes (in bytes) by storage category.
+    """
+    sizes = defaultdict(int)
+    for field_name, names in file_names.items():
+        field = model._meta.get_field(field_name)
+        # The storage of an `ArrayField` of files is the one of its base field
+        storage = getattr(field, "base_field", field).storage
+        category = model.storage_fields[field_name]
+        sizes[category] += sum(get_file_size(storage, name) for name in names)
+    return sizes
+
+
+def get_storage_owner(instance):
+    """Gets the user charged for and the course of the files of a model object.
+
+    Args:
+        instance (StorageTrackedModel): Model object (which exists in the database)
+
+    Returns:
+        (user id, course id), either of which can be None.
+    """
+    model = type(instance)
+    return (
+        model._base_manager.filter(pk=instance.pk)
+        .annotate(
+            storage_user_id=model.storage_user, storage_course_id=model.storage_course
+        )
+        .values_list("storage_user_id", "storage_course_id")
+        .get()
+    )
+
+
+def _get_expression_paths(expression):
+    """Gets the lookup paths referenced by an owner expression.
+
+    Args:
+        expression (Expression): `F()` object, or function (e.g. `Coalesce()`) of
+            them
+
+    Returns:
+        A list of lookup paths, in order.
+    """
+    if isinstance(expression, F):
+        return [expression.name]
+    return [
+        path
+        for source in expression.get_source_expressions()
+        for path in _get_expression_paths(source)
+    ]
+
+
+def _get_path_value(instance, path):
+    """Gets the value of a lookup path from a model object and its cached related
+    objects.
+
+    Args:
+        instance (Model): Model object
+        path (str): Lookup path, e.g. `section__chapter__course`
+
+    Returns:
+        The value (the id for a foreign key), or None.
+    """
+    *relations, field_name = path.split("__")
+    for relation in relations:
+        instance = getattr(instance, relation)
+        if instance is None:
+            return None
+    return getattr(instance, instance._meta.get_field(field_name).attname)
+
+
+def _get_owner_value(instance, paths):
+    """Gets the first non-null value of lookup paths, like `Coalesce()`."""
+    for path in paths:
+        value = _get_path_value(instance, path)
+        if value is not None:
+            return value
+    return None
+
+
+def get_storage_owners(model, instances):
+    """Gets the users charged for and the courses of the files of model objects.
+
+    Unlike `get_storage_owner()`, the owners are read from the related objects,
+    which are fetched in bulk, so that it also works for objects whose rows are
+    already deleted (and whose related objects are deleted after them).
+
+    Args:
+        model (class): `StorageTrackedModel` subclass
+        instances (list): Model objects
+
+    Returns:
+        A list of (user id, course id), either of which can be None, in order.
+    """
+    paths = [
+        _get_expression_paths(model.storage_user),
+        _get_expression_paths(model.storage_course),
+    ]
+    relations = {
+        path.rpartition("__")[0] for owner_paths in paths for path in owner_paths
+    }
+    prefetch_related_objects(instances, *sorted(relations - {""}))
+    return [
+        tuple(_get_owner_value(instance, owner_paths) for owner_paths in paths)
+        for instance in instances
+    ]
+
+
+def update_storage_usage(user_id, course_id, sizes):
+    """Adds size changes to the storage usage of a user in a course.
+
+    Args:
+        user_id (int): User id
+        course_id (int): Course id
+        sizes (dict): Size changes (in bytes) by storage category
+    """
+    for category, size in sizes.items():
+        if size > 0:
+            table = StorageUsage._meta.db_table
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO {table} (user_id, course_id, category, size, "
+                    "modified_on) VALUES (%s, %s, %s, %s, NOW()) "
+                    "ON CONFLICT (user_id, course_id, category) DO UPDATE SET "
+                    "size = {table}.size + EXCLUDED.size, "
+                    "modified_on = EXCLUDED.modified_on".format(table=table),
+                    [user_id, course_id, category, size],
+                )
+        elif size < 0:
+            # Never inserts, as the course may be being deleted along with the files
+            StorageUsage.objects.filter(
+                user=user_id, course=course_id, category=category
+            ).update(size=F("size") + size)
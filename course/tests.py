@@ -1,9 +1,24 @@
+import datetime
+import io
+import json
 import os
 import shutil
+import struct
+import zlib
 
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.db import transaction
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, pre_delete
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
@@ -12,16 +27,26 @@ from course.models import (
     Announcement,
     Chapter,
     Course,
+    CourseBatchTag,
+    CourseBatchTagHistory,
     CourseHistory,
     Page,
     Schedule,
+    SearchEntry,
     Section,
+    StorageUsage,
 )
 from discussion_forum.models import DiscussionForum
-from registration.models import SubscriptionHistory
+from document.models import Document
+from programming_assignments.models import AdvancedProgrammingAssignment
+from quiz.models import FixedAnswerQuestion, QuestionModule, Quiz
+from registration.models import Profile, SubscriptionHistory
 from utils import credentials
+from video.models import Video
 
 
+User = get_user_model()
+
 ins_cred = credentials.TEST_INSTRUCTOR_CREDENTIALS
 ta_cred = credentials.TEST_TA_CREDENTIALS
 stu_cred = credentials.TEST_STUDENT_CREDENTIALS
@@ -305,6 +330,158 @@ class CourseViewSetTest(APITestCase):
         self._delete_course_helper(status.HTTP_403_FORBIDDEN, "Course 19", 3, "S")
         self.logout()
 
+    def test_search_contents(self):
+        """Test: search the contents of a course."""
+        chapter = Chapter.objects.create(
+            course_id=1, title="Graphs", description="Shortest paths and trees"
+        )
+        Page.objects.create(
+            course_id=1, title="Reading", description="Dijkstra's original paper"
+        )
+        video = Video.objects.create(
+            chapter=chapter,
+            title="Dijkstra's algorithm",
+            video_duration=datetime.timedelta(minutes=10),
+        )
+        Announcement.objects.create(course_id=1, body="Dijkstra is in the quiz")
+        quiz = Quiz.objects.create(chapter=chapter, title="Quiz")
+        question_module = QuestionModule.objects.create(quiz=quiz, title="Graphs")
+        question = FixedAnswerQuestion.objects.create(
+            question_module=question_module,
+            question_description="Run Dijkstra from A. What is the cost to B?",
+            answer_description="7",
+            answer="7",
+            max_no_of_attempts=1,
+            is_published=True,
+        )
+        FixedAnswerQuestion.objects.create(
+            question_module=question_module,
+            question_description="Unpublished Dijkstra question",
+            answer_description="7",
+            answer="7",
+            max_no_of_attempts=1,
+        )
+        # Not in the searched course
+        Page.objects.create(course_id=3, title="Dijkstra", description="")
+        url = reverse("course:course-search-contents", args=[1])
+
+        self.login(**stu_cred)
+        response = self.client.get(url, {"q": "dijkstra"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = [
+            (result["content_type"], result["object_id"]) for result in response.data
+        ]
+        # Matches of the title rank first
+        self.assertEqual(results[0], ("video", video.id))
+        self.assertEqual(
+            sorted(content_type for content_type, _ in results),
+            ["announcement", "fixed_answer_question", "page", "video"],
+        )
+        self.assertEqual(response.data[0]["title"], "Dijkstra's algorithm")
+        response = self.client.get(url, {"q": '"shortest path" -trees'})
+        self.assertEqual(response.data, [])
+        response = self.client.get(url, {"q": "shortest path"})
+        self.assertEqual(
+            [(result["content_type"], result["title"]) for result in response.data],
+            [("chapter", "Graphs")],
+        )
+
+        # The index is maintained on write
+        question.is_published = False
+        question.save()
+        video.delete()
+        response = self.client.get(url, {"q": "dijkstra"})
+        self.assertEqual(
+            sorted(result["content_type"] for result in response.data),
+            ["announcement", "page"],
+        )
+
+        # `HTTP_400_BAD_REQUEST` due to the missing query
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # `HTTP_403_FORBIDDEN` due to `_is_registered()` method
+        response = self.client.get(
+            reverse("course:course-search-contents", args=[3]), {"q": "dijkstra"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTAOrStudent` permission class
+        response = self.client.get(url, {"q": "dijkstra"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Rebuilt from the contents
+        SearchEntry.objects.all().delete()
+        call_command("rebuild_search_index", stdout=io.StringIO())
+        self.assertEqual(
+            SearchEntry.objects.filter(course=1).count(),
+            Chapter.objects.filter(course=1).count()
+            + Page.objects.filter(course=1).count()
+            + Announcement.objects.filter(course=1).count(),
+        )
+
+    def test_retrieve_image_thumbnail(self):
+        """Test: retrieve thumbnails of the course image."""
+        image = io.BytesIO()
+        Image.new("RGB", (800, 600), "red").save(image, "PNG")
+        course = Course.objects.get(id=1)
+        course.image.save("course.png", File(image))
+        url = reverse("course:course-retrieve-image-thumbnail", args=[1])
+
+        # Rendered on first request (anonymous users may view the catalog)
+        response = self.client.get(url, {"size": "small", "image_format": "jpeg"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("public", response["Cache-Control"])
+        self.assertNotIn("private", response["Cache-Control"])
+        thumbnail = Image.open(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual((thumbnail.format, thumbnail.size), ("JPEG", (120, 90)))
+        etag = response["ETag"]
+
+        # Stored by the image content, size and format
+        response = self.client.get(
+            url, {"size": "small", "image_format": "jpeg"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        thumbnail = Image.open(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual((thumbnail.format, thumbnail.size), ("WEBP", (240, 180)))
+        self.assertEqual(
+            len(os.listdir(os.path.join(settings.MEDIA_ROOT, "thumbnails"))), 1
+        )
+
+        # `HTTP_400_BAD_REQUEST` due to invalid size
+        response = self.client.get(url, {"size": "huge"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # `HTTP_404_NOT_FOUND` due to the course having no image
+        response = self.client.get(
+            reverse("course:course-retrieve-image-thumbnail", args=[2])
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # `HTTP_404_NOT_FOUND` due to an image with too many pixels (only the PNG
+        # header is needed, the size is checked before the pixels are decoded)
+        header = struct.pack(">IIBBBBB", 20000, 10000, 1, 0, 0, 0, 0)
+        image = b"\x89PNG\r\n\x1a\n" + b"".join(
+            struct.pack(">I", len(data))
+            + chunk_type
+            + data
+            + struct.pack(">I", zlib.crc32(chunk_type + data))
+            for chunk_type, data in [(b"IHDR", header), (b"IEND", b"")]
+        )
+        course.image.save("bomb.png", ContentFile(image))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        try:
+            shutil.rmtree(settings.MEDIA_ROOT)
+        except OSError:
+            pass
+
     def _list_tas_non_tas_helper(self, status_code, course_id, tas=False):
         """Helper function for `test_list_non_tas()` and `test_list_tas()`.
 
@@ -378,6 +555,60 @@ class CourseViewSetTest(APITestCase):
         self._list_tas_non_tas_helper(status.HTTP_403_FORBIDDEN, 1, True)
         self.logout()
 
+    def _export_roster_helper(self, status_code, course_id, export_type):
+        """Helper function for `test_export_roster()`.
+
+        Args:
+            status_code (int): Expected status code of the API call
+            course_id (int): Course id
+            export_type (str): "csv" or "ndjson"
+        """
+        url = reverse("course:course-export-roster", args=[course_id])
+
+        response = self.client.get(url, {"type": export_type})
+        self.assertEqual(response.status_code, status_code)
+        if status_code == status.HTTP_200_OK:
+            content = b"".join(response.streaming_content).decode()
+            rows = content.splitlines()
+            count = CourseHistory.objects.filter(course=course_id, status="E").count()
+            if export_type == "csv":
+                self.assertEqual(rows[0].split(",")[0], "email")
+                self.assertEqual(len(rows), count + 1)
+            else:
+                rows = [json.loads(row) for row in rows]
+                self.assertEqual(len(rows), count)
+                student = next(row for row in rows if row["email"] == stu_cred["email"])
+                self.assertEqual(student["roll_no"], "17305R001")
+                self.assertEqual(student["role"], "S")
+
+    def test_export_roster(self):
+        """Test: export the roster of the course."""
+        Profile.objects.create(user_id=3, roll_no="17305R001", college_id=1)
+
+        # Export by owner
+        self.login(**ins_cred)
+        self._export_roster_helper(status.HTTP_200_OK, 1, "csv")
+        self._export_roster_helper(status.HTTP_200_OK, 1, "ndjson")
+        self.logout()
+
+        # Export by ta
+        self.login(**ta_cred)
+        self._export_roster_helper(status.HTTP_200_OK, 1, "ndjson")
+        self.logout()
+
+        # `HTTP_400_BAD_REQUEST` due to unsupported export type
+        self.login(**ins_cred)
+        self._export_roster_helper(status.HTTP_400_BAD_REQUEST, 1, "xlsx")
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `StrictIsInstructorOrTA` permission class
+        self._export_roster_helper(status.HTTP_401_UNAUTHORIZED, 1, "csv")
+
+        # `HTTP_403_FORBIDDEN` due to `StrictIsInstructorOrTA` permission class
+        self.login(**stu_cred)
+        self._export_roster_helper(status.HTTP_403_FORBIDDEN, 1, "csv")
+        self.logout()
+
     def _ta_permission_helper(self, status_code, remove_ta="false"):
         """Helper function for `test_grant_ta_permission()` and `test_remove_ta_permission()`.
 
@@ -453,6 +684,103 @@ class CourseViewSetTest(APITestCase):
         self._ta_permission_helper(status.HTTP_403_FORBIDDEN, "true")
         self.logout()
 
+    def _create_enrollment_requests(self, course_id, count):
+        """Helper function to create pending enrollment requests.
+
+        Args:
+            course_id (int): Course id
+            count (int): Number of pending enrollment requests
+        """
+        for i in range(count):
+            user = User.objects.create(email="pending{}@bodhitree.com".format(i))
+            Profile.objects.create(user=user, roll_no="1730{}R00{}".format(i % 2, i))
+            CourseHistory.objects.create(user=user, course_id=course_id, status="P")
+
+    def _enrollment_requests_helper(self, status_code, course_id, data, expected=None):
+        """Helper function for `test_handle_enrollment_requests()`.
+
+        Args:
+            status_code (int): Expected status code of the API call
+            course_id (int): Course id
+            data (dict): Request data
+            expected (dict): Expected response data
+        """
+        url = reverse("course:course-handle-enrollment-requests", args=[course_id])
+
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status_code)
+        if status_code == status.HTTP_200_OK:
+            self.assertEqual(response.data, expected)
+
+    def test_handle_enrollment_requests(self):
+        """Test: approve/reject pending enrollment requests."""
+        self._create_enrollment_requests(1, 6)
+
+        # Approve by email list (1 student is already enrolled)
+        self.login(**ins_cred)
+        data = {
+            "approve": "true",
+            "user_emails": ["pending0@bodhitree.com", "pending1@bodhitree.com"],
+        }
+        expected = {"approved": 2, "enrolled": 3, "pending": 4}
+        self._enrollment_requests_helper(status.HTTP_200_OK, 1, data, expected)
+        self.logout()
+
+        # Reject by roll number pattern (by ta)
+        self.login(**ta_cred)
+        data = {"reject": "true", "roll_no_pattern": "17301*"}
+        expected = {"rejected": 2, "enrolled": 3, "pending": 2}
+        self._enrollment_requests_helper(status.HTTP_200_OK, 1, data, expected)
+        self.logout()
+        self.assertEqual(
+            CourseHistory.objects.filter(course=1, status="U").count(),
+            2,
+        )
+
+        # Approve all
+        self.login(**ins_cred)
+        expected = {"approved": 2, "enrolled": 5, "pending": 0}
+        self._enrollment_requests_helper(
+            status.HTTP_200_OK, 1, {"approve": "true"}, expected
+        )
+        self.logout()
+
+        # `HTTP_400_BAD_REQUEST` due to neither approve nor reject is given
+        self.login(**ins_cred)
+        self._enrollment_requests_helper(status.HTTP_400_BAD_REQUEST, 1, {})
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `StrictIsInstructorOrTA` permission class
+        self._enrollment_requests_helper(
+            status.HTTP_401_UNAUTHORIZED, 1, {"approve": "true"}
+        )
+
+        # `HTTP_403_FORBIDDEN` due to `StrictIsInstructorOrTA` permission class
+        self.login(**stu_cred)
+        self._enrollment_requests_helper(
+            status.HTTP_403_FORBIDDEN, 1, {"approve": "true"}
+        )
+        self.logout()
+
+    def test_handle_enrollment_requests_student_limit(self):
+        """Test: student limit of the subscription while approving requests."""
+        # Owner of course 3 has a subscription with the limit of 5 students
+        course_id = 3
+        self._create_enrollment_requests(course_id, 6)
+
+        self.login(**ta_cred)
+        self._enrollment_requests_helper(
+            status.HTTP_403_FORBIDDEN, course_id, {"approve": "true"}
+        )
+        self.assertEqual(
+            CourseHistory.objects.filter(course=course_id, status="P").count(), 6
+        )
+
+        data = {"approve": "true", "roll_no_pattern": "17300*"}
+        expected = {"approved": 3, "enrolled": 3, "pending": 3}
+        self._enrollment_requests_helper(status.HTTP_200_OK, course_id, data, expected)
+        self.logout()
+
     def test_bulk_register_into_course(self):
 
         file = os.path.join(settings.BASE_DIR, "main/test_data", "test.csv")
@@ -472,6 +800,110 @@ class CourseViewSetTest(APITestCase):
         except OSError:
             pass
 
+    def test_bulk_register_batch_tags(self):
+        """Test: batch tags built from the extra columns of the bulk registration."""
+        content = (
+            "Name,Email,Roll Number,Group,House\n"
+            "Student,student@bodhitree.com,17305R001,B1,Slytherin\n"
+            "Student One,student1@bodhitree.com,17305R002,B2,Slytherin\n"
+            "New Student,new@bodhitree.com,17305R003,B2,\n"
+        )
+        url = reverse("course:course-bulk-register-into-course", args=[1])
+
+        self.login(**ins_cred)
+        # Registering twice does not duplicate the batch tags or their members
+        for _ in range(2):
+            file = SimpleUploadedFile(
+                "students.csv", content.encode(), content_type="text/csv"
+            )
+            response = self.client.post(
+                url, {"enrollment_file": file}, format="multipart"
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse("course:course-list-batch-tags", args=[1]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [
+                (tag["category"], tag["name"], tag["member_count"])
+                for tag in response.data
+            ],
+            [("group", "B1", 1), ("group", "B2", 2), ("house", "Slytherin", 2)],
+        )
+
+        # Moved to another batch tag of the category on a new upload
+        file = SimpleUploadedFile(
+            "students.csv",
+            b"Name,Email,Group\nStudent,student@bodhitree.com,B2\n",
+            content_type="text/csv",
+        )
+        response = self.client.post(url, {"enrollment_file": file}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(
+                CourseBatchTagHistory.objects.filter(
+                    batch_tag__course=1, user__email="student@bodhitree.com"
+                ).values_list("batch_tag__category", "batch_tag__name")
+            ),
+            [("group", "B2"), ("house", "Slytherin")],
+        )
+
+        # Roster of a batch tag
+        batch_tag = CourseBatchTag.objects.get(course=1, category="group", name="B1")
+        response = self.client.get(
+            reverse("course:course-export-roster", args=[1]),
+            {"type": "ndjson", "batch_tag": batch_tag.id},
+        )
+        self.assertEqual(b"".join(response.streaming_content), b"")
+        batch_tag = CourseBatchTag.objects.get(course=1, category="group", name="B2")
+        response = self.client.get(
+            reverse("course:course-export-roster", args=[1]),
+            {"type": "ndjson", "batch_tag": batch_tag.id},
+        )
+        rows = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            sorted(json.loads(row)["email"] for row in rows),
+            ["new@bodhitree.com", "student1@bodhitree.com", "student@bodhitree.com"],
+        )
+
+        # `HTTP_404_NOT_FOUND` due to the batch tag of another course
+        batch_tag = CourseBatchTag.objects.create(
+            course_id=3, category="group", name="B1"
+        )
+        response = self.client.get(
+            reverse("course:course-export-roster", args=[1]),
+            {"type": "ndjson", "batch_tag": batch_tag.id},
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # `HTTP_400_BAD_REQUEST` due to a too long batch tag, before any user is created
+        file = SimpleUploadedFile(
+            "students.csv",
+            (
+                "Name,Email,Group\n"
+                "Other Student,other@bodhitree.com,B3\n"
+                "Long Student,long@bodhitree.com,{}\n".format(
+                    "B" * (settings.MAX_CHARFIELD_LENGTH + 1)
+                )
+            ).encode(),
+            content_type="text/csv",
+        )
+        response = self.client.post(url, {"enrollment_file": file}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(User.objects.filter(email="other@bodhitree.com").exists())
+        self.logout()
+
+        # `HTTP_403_FORBIDDEN` due to `StrictIsInstructorOrTA` permission class
+        self.login(**stu_cred)
+        response = self.client.get(reverse("course:course-list-batch-tags", args=[1]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.logout()
+
+        try:
+            shutil.rmtree(settings.MEDIA_ROOT)
+        except OSError:
+            pass
+
 
 class CourseHistoryViewSetTest(APITestCase):
     """Test for `CourseHistoryViewSet`."""
@@ -767,6 +1199,10 @@ class ChapterViewSetTest(APITestCase):
         "courses.test.yaml",
         "coursehistories.test.yaml",
         "chapters.test.yaml",
+        "sections.test.yaml",
+        "videos.test.yaml",
+        "documents.test.yaml",
+        "quiz.test.yaml",
     ]
 
     def login(self, email, password):
@@ -1067,6 +1503,58 @@ class ChapterViewSetTest(APITestCase):
         self._delete_chapter_helper("Chapter 4", status.HTTP_403_FORBIDDEN)
         self.logout()
 
+    def test_list_chapter_contents(self):
+        """Test: list the contents of a chapter and of its sections."""
+        Chapter.objects.filter(id=1).update(
+            content_sequence=[[3, 2], [2, 2], [0, 1], [3, 1]]
+        )
+        Section.objects.filter(id=1).update(
+            content_sequence=[[1, 3], [2, 1], [0, 2], [9, 9]]
+        )
+        url = reverse("course:chapter-list-chapter-contents", args=[1])
+
+        self.login(**stu_cred)
+        # Session, user, chapter, registration (2) and one per content type (4)
+        with self.assertNumQueries(9):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        contents = response.data["contents"]
+        self.assertEqual(
+            [(content["content_type"], content["id"]) for content in contents],
+            [(3, 2), (2, 2), (0, 1), (3, 1), (1, 1)],
+        )
+        self.assertEqual(contents[0]["contents"], [])
+        self.assertEqual(
+            [
+                (content["content_type"], content["id"])
+                for content in contents[3]["contents"]
+            ],
+            [(1, 3), (2, 1), (0, 2), (0, 3), (1, 2)],
+        )
+        self.assertEqual(
+            set(contents[2]),
+            {"content_type", "id", "title", "description", "video_duration"},
+        )
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTA` permission class
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # `HTTP_403_FORBIDDEN` due to the student not registered in course 3
+        self.login(**stu_cred)
+        response = self.client.get(
+            reverse("course:chapter-list-chapter-contents", args=[3])
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        # `HTTP_404_NOT_FOUND` due to the chapter not existing
+        response = self.client.get(
+            reverse("course:chapter-list-chapter-contents", args=[99])
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.logout()
+
 
 class PageViewSetTest(APITestCase):
     """Test for PageViewSetTest."""
@@ -1685,6 +2173,9 @@ class AnnouncementViewSetTest(APITestCase):
         "announcement.test.yaml",
     ]
 
+    def setUp(self):
+        cache.clear()
+
     def login(self, email, password):
         self.client.login(email=email, password=password)
 
@@ -2017,6 +2508,43 @@ class AnnouncementViewSetTest(APITestCase):
         self._delete_announcement_helper("Body 4", status.HTTP_403_FORBIDDEN)
         self.logout()
 
+    def test_latest_announcements_cache(self):
+        """Test: latest announcements are served from the cache and refreshed."""
+        course_id = 1  # course with id 1 is created by django fixture
+        url = reverse("course:announcement-list-latest-announcements", args=[course_id])
+
+        self.login(**stu_cred)
+        response = self.client.get(url)
+        self.assertEqual([a["id"] for a in response.data], [2, 1])
+
+        # Served without touching the announcements table
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual([a["id"] for a in response.data], [2, 1])
+        for query in context.captured_queries:
+            self.assertNotIn("course_announcement", query["sql"])
+
+        # Stale until the `Announcement` write is committed, then refreshed
+        with self.captureOnCommitCallbacks(execute=True):
+            announcement = Announcement.objects.create(course_id=course_id, body="New")
+            response = self.client.get(url)
+            self.assertEqual([a["id"] for a in response.data], [2, 1])
+        response = self.client.get(url)
+        self.assertEqual([a["id"] for a in response.data], [announcement.id, 2])
+
+        announcement_1 = Announcement.objects.get(id=1)
+        announcement_1.is_pinned = True
+        with self.captureOnCommitCallbacks(execute=True):
+            announcement_1.save()
+        response = self.client.get(url)
+        self.assertEqual([a["id"] for a in response.data], [1, announcement.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            announcement_1.delete()
+        response = self.client.get(url)
+        self.assertEqual([a["id"] for a in response.data], [announcement.id, 2])
+        self.logout()
+
 
 class ScheduleViewSetTest(APITestCase):
     """Test for `ScheduleViewSet`."""
@@ -2028,6 +2556,10 @@ class ScheduleViewSetTest(APITestCase):
         "courses.test.yaml",
         "coursehistories.test.yaml",
         "schedule.test.yaml",
+        "chapters.test.yaml",
+        "sections.test.yaml",
+        "videos.test.yaml",
+        "documents.test.yaml",
     ]
 
     def login(self, email, password):
@@ -2423,3 +2955,241 @@ class ScheduleViewSetTest(APITestCase):
             "2021-05-12", "2021-05-21", status.HTTP_403_FORBIDDEN
         )
         self.logout()
+
+    def _list_upcoming_schedules_helper(self, status_code, params, schedule_ids=None):
+        """Helper function for `test_list_upcoming_schedules()`.
+
+        Args:
+            status_code (int): Expected status code of the API call
+            params (dict): Query params
+            schedule_ids (list): Expected schedule ids
+        """
+        url = reverse("course:schedule-list-upcoming-schedules")
+
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status_code)
+        if status_code == status.HTTP_200_OK:
+            self.assertEqual([s["id"] for s in response.data], schedule_ids)
+            return response.data
+
+    def test_list_upcoming_schedules(self):
+        """Test: list the upcoming schedules across all the user's courses."""
+        Schedule.objects.filter(id=1).update(content_list=[[0, 1], [1, 1], [0, 100]])
+
+        # Listed by ta (enrolled in course 1 & 3)
+        self.login(**ta_cred)
+        params = {"start_date": "2021-05-10", "end_date": "2021-05-10"}
+        data = self._list_upcoming_schedules_helper(
+            status.HTTP_200_OK, params, [1, 2, 3]
+        )
+        self.assertEqual(data[0]["course_title"], "Programming Lab")
+        self.assertEqual(
+            [content["title"] for content in data[0]["contents"]],
+            ["Video-1", "Doc-1", None],
+        )
+        params = {"start_date": "2021-05-11", "end_date": "2021-05-20"}
+        self._list_upcoming_schedules_helper(status.HTTP_200_OK, params, [2, 3])
+        self.logout()
+
+        # Listed by student (enrolled in course 1)
+        self.login(**stu_cred)
+        params = {"start_date": "2021-05-10", "end_date": "2021-05-10"}
+        self._list_upcoming_schedules_helper(status.HTTP_200_OK, params, [1, 2])
+        self.logout()
+
+        # `HTTP_400_BAD_REQUEST` due to invalid date range
+        self.login(**stu_cred)
+        params = {"start_date": "2021-05-10", "end_date": "2021-05-01"}
+        self._list_upcoming_schedules_helper(status.HTTP_400_BAD_REQUEST, params)
+        params = {"start_date": "2021-05-40"}
+        self._list_upcoming_schedules_helper(status.HTTP_400_BAD_REQUEST, params)
+        params = {"end_date": "tomorrow"}
+        self._list_upcoming_schedules_helper(status.HTTP_400_BAD_REQUEST, params)
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTA` permission class
+        self._list_upcoming_schedules_helper(status.HTTP_401_UNAUTHORIZED, {})
+
+    def test_ics_feed(self):
+        """Test: iCalendar feed of the schedules across all the user's courses."""
+        cache.clear()
+        today = timezone.localdate()
+        Schedule.objects.create(
+            course_id=1,
+            start_date=today,
+            end_date=today + datetime.timedelta(days=3),
+            description="Week 1; read chapter 1",
+        )
+
+        self.login(**stu_cred)
+        response = self.client.get(reverse("course:schedule-ics-feed-url"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        url = response.data["url"]
+        self.logout()
+
+        # Calendar clients fetch the feed without authentication
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        content = response.content.decode()
+        self.assertEqual(content.count("BEGIN:VEVENT"), 1)
+        self.assertIn("SUMMARY:CS101: Programming Lab\r\n", content)
+        self.assertIn("DESCRIPTION:Week 1\\; read chapter 1\r\n", content)
+
+        # Served from the cache (after the user is checked)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.content.decode(), content)
+
+        # Rebuilt after a `Schedule` write, once committed
+        with self.captureOnCommitCallbacks(execute=True):
+            Schedule.objects.create(course_id=1, start_date=today, end_date=today)
+            response = self.client.get(url)
+            self.assertEqual(response.content.decode(), content)
+        response = self.client.get(url)
+        self.assertEqual(response.content.decode().count("BEGIN:VEVENT"), 2)
+
+        # `HTTP_403_FORBIDDEN` due to invalid token
+        response = self.client.get(url[:-1])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        # `HTTP_403_FORBIDDEN` due to the token revoked by a password change
+        user = User.objects.get(email=stu_cred["email"])
+        user.set_password("new-password")
+        user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class StorageUsageTest(APITestCase):
+    """Test for `StorageUsage` accounting."""
+
+    fixtures = [
+        "users.test.yaml",
+        "departments.test.yaml",
+        "colleges.test.yaml",
+        "courses.test.yaml",
+        "chapters.test.yaml",
+        "sections.test.yaml",
+    ]
+
+    def tearDown(self):
+        try:
+            shutil.rmtree(settings.MEDIA_ROOT)
+        except OSError:
+            pass
+
+    def _get_storage_usage(self):
+        """Gets the storage usage ledger.
+
+        Returns:
+            A dictionary of sizes by (user id, course id, category).
+        """
+        return {
+            (user_id, course_id, category): size
+            for user_id, course_id, category, size in StorageUsage.objects.values_list(
+                "user", "course", "category", "size"
+            )
+        }
+
+    def test_storage_usage(self):
+        """Test: storage usage updated on file saves and deletes."""
+        video = Video.objects.create(
+            chapter_id=1,
+            title="Lecture",
+            video_file=SimpleUploadedFile("lecture.mp4", bytes(1000)),
+            video_duration=datetime.timedelta(minutes=3),
+        )
+        Video.objects.create(
+            section_id=3,
+            title="Lecture",
+            video_file=SimpleUploadedFile("lecture.mp4", bytes(300)),
+            video_duration=datetime.timedelta(minutes=3),
+        )
+        self.assertEqual(
+            self._get_storage_usage(), {(1, 1, "V"): 1000, (2, 3, "V"): 300}
+        )
+
+        # Replaced file and added file
+        video.video_file = SimpleUploadedFile("lecture2.mp4", bytes(400))
+        video.doc_file = SimpleUploadedFile("notes.pdf", bytes(50))
+        video.save()
+        # Saves without file changes
+        video.title = "Lecture 1"
+        video.save()
+        video.save(update_fields=["title"])
+        self.assertEqual(
+            self._get_storage_usage(),
+            {(1, 1, "V"): 400, (1, 1, "C"): 50, (2, 3, "V"): 300},
+        )
+
+        Document.objects.create(
+            chapter_id=1, title="Notes", doc_file=SimpleUploadedFile("a.pdf", bytes(25))
+        )
+        self.assertEqual(self._get_storage_usage()[(1, 1, "C")], 75)
+
+        video.delete()
+        self.assertEqual(
+            self._get_storage_usage(),
+            {(1, 1, "V"): 0, (1, 1, "C"): 25, (2, 3, "V"): 300},
+        )
+
+        # Cascaded deletes, of several objects of a model
+        Video.objects.create(
+            section_id=3,
+            title="Lecture 2",
+            video_file=SimpleUploadedFile("lecture3.mp4", bytes(200)),
+            video_duration=datetime.timedelta(minutes=3),
+        )
+        Course.objects.get(id=3).delete()
+        self.assertEqual(self._get_storage_usage(), {(1, 1, "V"): 0, (1, 1, "C"): 25})
+
+        # Only the tracked models have delete listeners, which disable fast deletes
+        self.assertTrue(pre_delete.has_listeners(Video))
+        self.assertFalse(pre_delete.has_listeners(CourseHistory))
+        self.assertFalse(post_delete.has_listeners(CourseHistory))
+
+    def test_storage_usage_inherited_model(self):
+        """Test: storage usage of a multi-table inherited model."""
+        now = timezone.now()
+        # Stored beforehand, as the upload paths of the assignments are not usable
+        assignment = AdvancedProgrammingAssignment.objects.create(
+            course_id=1,
+            name="Assignment",
+            programming_language="C",
+            start_date=now,
+            end_date=now,
+            extended_date=now,
+            files_to_be_submitted=[],
+            document=default_storage.save("problem.pdf", ContentFile(bytes(100))),
+            helper_code=default_storage.save("helper.c", ContentFile(bytes(10))),
+        )
+        self.assertEqual(self._get_storage_usage(), {(1, 1, "C"): 110})
+
+        out = io.StringIO()
+        call_command("reconcile_storage_usage", stdout=out)
+        self.assertEqual(self._get_storage_usage(), {(1, 1, "C"): 110})
+
+        # The parent row is deleted along with the object, with its own signals
+        assignment.delete()
+        self.assertEqual(self._get_storage_usage(), {(1, 1, "C"): 0})
+
+    def test_reconcile_storage_usage(self):
+        """Test: `reconcile_storage_usage` management command."""
+        Video.objects.create(
+            chapter_id=1,
+            title="Lecture",
+            video_file=SimpleUploadedFile("lecture.mp4", bytes(1000)),
+            doc_file=SimpleUploadedFile("notes.pdf", bytes(50)),
+            video_duration=datetime.timedelta(minutes=3),
+        )
+        Document.objects.create(
+            section_id=3, title="Notes", doc_file=SimpleUploadedFile("a.pdf", bytes(25))
+        )
+        expected = {(1, 1, "V"): 1000, (1, 1, "C"): 50, (2, 3, "C"): 25}
+        self.assertEqual(self._get_storage_usage(), expected)
+
+        StorageUsage.objects.update(size=0)
+        StorageUsage.objects.create(user_id=3, course_id=1, category="S", size=10)
+        call_command("reconcile_storage_usage", workers=2, stdout=io.StringIO())
+        self.assertEqual(self._get_storage_usage(), expected)
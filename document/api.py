@@ -1,9 +1,12 @@
 import logging
 
-from rest_framework import viewsets
+from django.utils.cache import patch_cache_control
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.response import Response
 
 from utils import mixins as custom_mixins
+from utils.media import get_content_etag, serve_media_file
 from utils.permissions import IsInstructorOrTA
 
 from .models import Document
@@ -50,3 +53,51 @@ class DocumentViewSet(
     @action(detail=True, methods=["DELETE"])
     def delete_document(self, request, pk):
         return self._delete(request, pk)
+
+    @action(detail=True, methods=["GET"])
+    def download_document(self, request, pk):
+        """Serves the document file of the document with id as pk.
+
+        The ETag is the SHA-256 digest of the file and `Last-Modified` is the
+        modification time of the document, and clients must revalidate them, so
+        a repeat view of an unchanged document costs a HTTP_304_NOT_MODIFIED.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Document id
+
+        Returns:
+            `HttpResponse` with the document file and status HTTP_200_OK (or
+            HTTP_206_PARTIAL_CONTENT or HTTP_304_NOT_MODIFIED).
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_registered()` method
+            `HTTP_404_NOT_FOUND`: Raised if the document or its file does not exist
+        """
+        try:
+            document = Document.objects.select_related(
+                "chapter", "section__chapter"
+            ).get(id=pk)
+        except Document.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        chapter = document.chapter or document.section.chapter
+        check = self._is_registered(chapter.course_id, request.user)
+        if check is not True:
+            return check
+
+        try:
+            response = serve_media_file(
+                request,
+                document.doc_file,
+                as_attachment=True,
+                etag=get_content_etag(document.doc_file),
+                last_modified=int(document.modified_on.timestamp()),
+            )
+        except OSError as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+        patch_cache_control(response, no_cache=True)
+        return response
@@ -0,0 +1,107 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from course.search import index_contents
+from document.models import Document
+from utils.media import get_content_etag
+from utils.text_extraction import extract_text
+from video.models import Video
+
+
+# Models whose `doc_file` text is extracted, by search content type
+DOC_TEXT_MODELS = {"document": Document, "video": Video}
+
+
+class Command(BaseCommand):
+    help = (
+        "Extracts the text of the new or changed document files (of the documents "
+        "and videos) for the search index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of processes extracting the texts.",
+        )
+
+    def _get_changed_files(self):
+        """Gets the document files whose content changed since their text was
+        extracted.
+
+        The digests are cached by the inode of the files (see
+        `get_content_etag()`), so unchanged files are not read again.
+
+        Returns:
+            (changed, removed) where changed maps the SHA-256 digest of every
+            changed content to its (content type, id, path) and removed lists the
+            (content type, id) whose file was removed.
+        """
+        changed, removed = defaultdict(list), []
+        for content_type, model in DOC_TEXT_MODELS.items():
+            objects = model.objects.only("id", "doc_file", "doc_text_digest")
+            for instance in objects.iterator():
+                if not instance.doc_file:
+                    if instance.doc_text_digest:
+                        removed.append((content_type, instance.id))
+                    continue
+                try:
+                    digest = get_content_etag(instance.doc_file).strip('"')
+                except OSError as e:
+                    self.stderr.write("{} {}: {}".format(content_type, instance.id, e))
+                    continue
+                if digest != instance.doc_text_digest:
+                    changed[digest].append(
+                        (content_type, instance.id, instance.doc_file.path)
+                    )
+        return changed, removed
+
+    def handle(self, *args, **options):
+        changed, removed = self._get_changed_files()
+
+        # Texts already extracted from the same contents are reused
+        texts = {}
+        for model in DOC_TEXT_MODELS.values():
+            texts.update(
+                model.objects.filter(doc_text_digest__in=list(changed)).values_list(
+                    "doc_text_digest", "doc_text"
+                )
+            )
+        pending = [digest for digest in changed if digest not in texts]
+        if pending:
+            with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+                paths = [changed[digest][0][2] for digest in pending]
+                texts.update(zip(pending, executor.map(extract_text, paths)))
+
+        updated = defaultdict(dict)
+        for digest, files in changed.items():
+            for content_type, pk, _ in files:
+                updated[content_type][pk] = (texts[digest], digest)
+        for content_type, pk in removed:
+            updated[content_type][pk] = ("", "")
+
+        for content_type, values in updated.items():
+            model = DOC_TEXT_MODELS[content_type]
+            with transaction.atomic():
+                model.objects.bulk_update(
+                    [
+                        model(id=pk, doc_text=text, doc_text_digest=digest)
+                        for pk, (text, digest) in values.items()
+                    ],
+                    ["doc_text", "doc_text_digest"],
+                    batch_size=500,
+                )
+                # Bulk updates do not send the signals which index the contents
+                index_contents(content_type, list(values))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Extracted {} texts and updated {} document files.".format(
+                    len(pending), sum(len(values) for values in updated.values())
+                )
+            )
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-19 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='doc_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='doc_text_digest',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -3,8 +3,10 @@ import os
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Coalesce
 
-from course.models import Chapter, Section
+from course.models import Chapter, Section, StorageTrackedModel
 from utils.utils import get_course_folder
 
 
@@ -16,7 +18,7 @@ def document_upload_path(instance, filename):
     return os.path.join(course_folder, "document_files", filename)
 
 
-class Document(models.Model):
+class Document(StorageTrackedModel):
     section = models.ForeignKey(
         Section, on_delete=models.CASCADE, blank=True, null=True
     )
@@ -26,9 +28,19 @@ class Document(models.Model):
     title = models.CharField(max_length=settings.MAX_CHARFIELD_LENGTH)
     description = models.TextField(blank=True)
     doc_file = models.FileField(upload_to=document_upload_path)
+    # Text of `doc_file` for the search index, and the SHA-256 digest of the file
+    # it was extracted from (see the `extract_doc_texts` management command)
+    doc_text = models.TextField(blank=True, editable=False)
+    doc_text_digest = models.CharField(max_length=64, blank=True, editable=False)
     created_on = models.DateTimeField(auto_now_add=True)
     modified_on = models.DateTimeField(auto_now=True)
 
+    storage_fields = {"doc_file": "C"}
+    storage_user = Coalesce(
+        F("chapter__course__owner"), F("section__chapter__course__owner")
+    )
+    storage_course = Coalesce(F("chapter__course"), F("section__chapter__course"))
+
     class Meta:
         constraints = [
             models.CheckConstraint(
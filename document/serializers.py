@@ -6,4 +6,5 @@ from .models import Document
 class DocumentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Document
-        fields = "__all__"
+        # The extracted text is only for the search index
+        exclude = ["doc_text", "doc_text_digest"]
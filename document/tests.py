@@ -1,10 +1,20 @@
+import hashlib
+import io
+import shutil
+import time
 from unittest import mock
 
+from django.conf import settings
 from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
+from course.models import SearchEntry
+from course.search import search_course_contents
 from document.models import Document
 from utils import credentials
 
@@ -488,3 +498,178 @@ class DocumentViewSetTest(APITestCase):
         self.login(**stu_cred)
         self._delete_document_helper("Document 4", status.HTTP_403_FORBIDDEN)
         self.logout()
+
+    def test_download_document(self):
+        """Test: download the document file with conditional requests."""
+        content = b"%PDF-1.4 slides"
+        document = Document.objects.create(
+            chapter_id=1,
+            title="Slides",
+            doc_file=SimpleUploadedFile("slides.pdf", content),
+        )
+        url = reverse("document:document-download-document", args=[document.id])
+
+        self.login(**stu_cred)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), content)
+        self.assertEqual(
+            response["ETag"], '"{}"'.format(hashlib.sha256(content).hexdigest())
+        )
+        self.assertEqual(
+            response["Last-Modified"],
+            http_date(int(document.modified_on.timestamp())),
+        )
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("attachment", response["Content-Disposition"])
+
+        # Conditional requests
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Served by the web server with the validators, unless not modified
+        with self.settings(MEDIA_SENDFILE_BACKEND="x-sendfile"):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["X-Sendfile"], document.doc_file.path)
+            etag = response["ETag"]
+            self.assertEqual(etag, '"{}"'.format(hashlib.sha256(content).hexdigest()))
+            self.assertIn("Last-Modified", response)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertNotIn("X-Sendfile", response)
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTA` permission class
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # `HTTP_403_FORBIDDEN` due to the student not registered in course 3
+        document = Document.objects.create(
+            section_id=3,
+            title="Slides",
+            doc_file=SimpleUploadedFile("slides.pdf", content),
+        )
+        self.login(**stu_cred)
+        response = self.client.get(
+            reverse("document:document-download-document", args=[document.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.logout()
+
+        try:
+            shutil.rmtree(settings.MEDIA_ROOT)
+        except OSError:
+            pass
+
+    def _get_pdf(self, text):
+        """Gets a single page PDF file showing a text.
+
+        Args:
+            text (str): Text of the page
+
+        Returns:
+            The PDF file as bytes.
+        """
+        stream = "BT /F1 12 Tf 72 720 Td ({}) Tj ET".format(text).encode()
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+        ]
+        pdf = b"%PDF-1.4\n"
+        offsets = []
+        for i, obj in enumerate(objects, 1):
+            offsets.append(len(pdf))
+            pdf += b"%d 0 obj\n%s\nendobj\n" % (i, obj)
+        xref = len(pdf)
+        pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            len(objects) + 1,
+            xref,
+        )
+        return pdf
+
+    def test_extract_doc_texts(self):
+        """Test: extract the text of the document files for the search index."""
+        files = {
+            "notes.txt": b"Dijkstra relaxes the edges",
+            "notes.md": b"# Heaps\n\nA *binary heap* backs the queue",
+            "notes.html": b"<html><head><title>x</title><script>var hidden;</script>"
+            b"</head><body><p>Bellman&ndash;Ford</p></body></html>",
+            "slides.pdf": self._get_pdf("Prim spanning trees"),
+            "slides.docx": b"unsupported",
+            # Catalog without pages (pypdf raises `KeyError`)
+            "broken.pdf": self._get_pdf("Broken").replace(b"/Pages 2", b"/Pagez 2"),
+            # Same content as notes.txt
+            "copy.txt": b"Dijkstra relaxes the edges",
+        }
+        documents = {
+            name: Document.objects.create(
+                chapter_id=1, title="Document", doc_file=SimpleUploadedFile(name, data)
+            )
+            for name, data in files.items()
+        }
+
+        out = io.StringIO()
+        call_command("extract_doc_texts", workers=2, stdout=out, stderr=io.StringIO())
+        self.assertIn("Extracted 6 texts", out.getvalue())
+        texts = dict(
+            Document.objects.filter(
+                id__in=[document.id for document in documents.values()]
+            ).values_list("doc_file", "doc_text")
+        )
+        texts = {
+            name: texts[document.doc_file.name] for name, document in documents.items()
+        }
+        self.assertEqual(
+            texts,
+            {
+                "notes.txt": "Dijkstra relaxes the edges",
+                "notes.md": "Heaps A binary heap backs the queue",
+                "notes.html": "Bellman\u2013Ford",
+                "slides.pdf": "Prim spanning trees",
+                "slides.docx": "",
+                "broken.pdf": "",
+                "copy.txt": "Dijkstra relaxes the edges",
+            },
+        )
+        # Indexed for search
+        results = search_course_contents(1, "spanning tree")
+        self.assertEqual(
+            [(result["content_type"], result["object_id"]) for result in results],
+            [("document", documents["slides.pdf"].id)],
+        )
+
+        # Not extracted again unless the file changed
+        out = io.StringIO()
+        call_command("extract_doc_texts", stdout=out, stderr=io.StringIO())
+        self.assertIn("Extracted 0 texts and updated 0", out.getvalue())
+        document = documents["notes.txt"]
+        document.doc_file = SimpleUploadedFile("notes.txt", b"Floyd Warshall")
+        document.save()
+        out = io.StringIO()
+        call_command("extract_doc_texts", stdout=out, stderr=io.StringIO())
+        self.assertIn("Extracted 1 texts and updated 1", out.getvalue())
+        self.assertEqual(
+            SearchEntry.objects.filter(
+                content_type="document", search_vector="warshall"
+            ).count(),
+            1,
+        )
+
+        try:
+            shutil.rmtree(settings.MEDIA_ROOT)
+        except OSError:
+            pass
@@ -110,6 +110,23 @@ DATABASES = {
     }
 }
 
+# Cache
+# It must be shared by all the workers (e.g. file based or memcached), otherwise
+# invalidations done by one worker are not seen by the others.
+if TEST:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": config["cache"]["backend"],
+            "LOCATION": config["cache"]["location"],
+        }
+    }
+
 # Email
 EMAIL_HOST = config["email"]["host"]
 EMAIL_PORT = config["email"]["port"]
@@ -263,6 +280,20 @@ if TEST:
 else:
     MEDIA_ROOT = os.path.join(BASE_DIR, "main/data/")
 
+# Files are stored once per distinct content, their names being links to the blobs
+DEFAULT_FILE_STORAGE = "utils.storage.ContentAddressedStorage"
+
+# Web server which serves the media files once the permission checks have passed
+# ("x-accel-redirect" for nginx, "x-sendfile" for apache, empty for django)
+if TEST:
+    MEDIA_SENDFILE_BACKEND = ""
+else:
+    MEDIA_SENDFILE_BACKEND = config.get("media", "sendfile_backend", fallback="")
+# Internal nginx location (aliased to `MEDIA_ROOT`) used with "x-accel-redirect"
+MEDIA_ACCEL_REDIRECT_LOCATION = config.get(
+    "media", "accel_redirect_location", fallback="/protected_media/"
+)
+
 # User model
 AUTH_USER_MODEL = "registration.User"
 
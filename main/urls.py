@@ -40,6 +40,8 @@ urlpatterns = [
     path("cribs/", include("cribs.urls")),
     path("email_notices/", include("email_notices.urls")),
     path("discussion_forum/", include("discussion_forum.urls")),
+    path("stats/", include("stats.urls")),
+    path("quiz/", include("quiz.urls")),
 ]
 
 if settings.DEBUG:
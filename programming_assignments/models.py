@@ -2,8 +2,10 @@ from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Coalesce
 
-from course.models import Course
+from course.models import Course, StorageTrackedModel
 from utils.utils import get_assignment_file_upload_path
 
 
@@ -54,7 +56,7 @@ class TAAllocation(models.Model):
     mapping = models.JSONField()
 
 
-class SimpleProgrammingAssignment(models.Model):
+class SimpleProgrammingAssignment(StorageTrackedModel):
     programming_language = models.CharField(max_length=10, choices=PROG_LANG)
     document = models.FileField(
         upload_to=programming_assignment_file_upload_path, blank=True, null=True
@@ -69,11 +71,15 @@ class SimpleProgrammingAssignment(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     modified_on = models.DateTimeField(auto_now=True)
 
+    storage_fields = {"document": "C"}
+    storage_user = F("course__owner")
+    storage_course = F("course")
+
     def __str__(self):
         return self.name
 
 
-class SimpleProgrammingAssignmentHistory(models.Model):
+class SimpleProgrammingAssignmentHistory(StorageTrackedModel):
     simple_prog_assignment = models.ForeignKey(
         SimpleProgrammingAssignment, on_delete=models.CASCADE
     )
@@ -83,6 +89,10 @@ class SimpleProgrammingAssignmentHistory(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     modified_on = models.DateTimeField(auto_now=True)
 
+    storage_fields = {"file_submitted": "S"}
+    storage_user = F("user")
+    storage_course = F("simple_prog_assignment__course")
+
     def __str__(self):
         return "{}: {}".format(self.user.email, self.simple_prog_assignment.name)
 
@@ -108,6 +118,13 @@ class AdvancedProgrammingAssignment(SimpleProgrammingAssignment):
     ignore_whitespaces_in_output = models.BooleanField(default=False)
     indentation_percentage_calculate = models.BooleanField(default=False)
 
+    storage_fields = {
+        "document": "C",
+        "helper_code": "C",
+        "instructor_solution_code": "C",
+        "ta_allocation_file": "C",
+    }
+
     def __str__(self):
         return self.name
 
@@ -141,7 +158,7 @@ class AssignmentSection(models.Model):
         return self.name
 
 
-class Testcase(models.Model):
+class Testcase(StorageTrackedModel):
     assignment = models.ForeignKey(
         SimpleProgrammingAssignment, on_delete=models.CASCADE, blank=True, null=True
     )
@@ -165,6 +182,15 @@ class Testcase(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     modified_on = models.DateTimeField(auto_now=True)
 
+    storage_fields = {"input_file": "C", "output_file": "C"}
+    storage_user = Coalesce(
+        F("assignment__course__owner"),
+        F("assignment_section__assignment__course__owner"),
+    )
+    storage_course = Coalesce(
+        F("assignment__course"), F("assignment_section__assignment__course")
+    )
+
     class Meta:
         constraints = [
             models.CheckConstraint(
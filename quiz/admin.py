@@ -3,6 +3,7 @@ from django.contrib import admin
 from .models import (
     FixedAnswerQuestion,
     FixedAnswerQuestionHistory,
+    GradebookEntry,
     MultipleCorrectQuestion,
     MultipleCorrectQuestionHistory,
     QuestionModule,
@@ -146,6 +147,20 @@ class FixedAnswerQuestionHistoryAdmin(admin.ModelAdmin):
     search_fields = ("user__email",)
 
 
+class GradebookEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "course",
+        "quiz",
+        "user",
+        "marks_obtained",
+        "no_of_times_attempted",
+        "questions_attempted",
+        "modified_on",
+    )
+    search_fields = ("user__email",)
+
+
 admin.site.register(Quiz, QuizAdmin)
 admin.site.register(QuestionModule, QuestionModuleAdmin)
 admin.site.register(SingleCorrectQuestion, SingleCorrectQuestionAdmin)
@@ -154,3 +169,4 @@ admin.site.register(MultipleCorrectQuestion, MultipleCorrectQuestionAdmin)
 admin.site.register(MultipleCorrectQuestionHistory, MultipleCorrectQuestionHistoryAdmin)
 admin.site.register(FixedAnswerQuestion, FixedAnswerQuestionAdmin)
 admin.site.register(FixedAnswerQuestionHistory, FixedAnswerQuestionHistoryAdmin)
+admin.site.register(GradebookEntry, GradebookEntryAdmin)
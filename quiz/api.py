@@ -0,0 +1,265 @@
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from utils import mixins as custom_mixins
+from utils.pagination import StandardResultsSetPagination
+from utils.permissions import IsInstructorOrTAOrStudent
+from utils.utils import check_is_instructor_or_ta
+
+from .attempts import submit_question_answer
+from .cache import get_quiz_payload
+from .gradebook import lock_gradebook, update_gradebook
+from .models import (
+    FixedAnswerQuestion,
+    GradebookEntry,
+    MultipleCorrectQuestion,
+    Quiz,
+    SingleCorrectQuestion,
+)
+from .serializers import (
+    FixedAnswerSerializer,
+    GradebookEntrySerializer,
+    MultipleCorrectAnswerSerializer,
+    SingleCorrectAnswerSerializer,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class QuizViewSet(viewsets.GenericViewSet, custom_mixins.IsRegisteredMixin):
+    """Viewset for `Quiz`."""
+
+    queryset = Quiz.objects.all()
+    permission_classes = (IsInstructorOrTAOrStudent,)
+
+    @action(detail=True, methods=["GET"])
+    def render_quiz(self, request, pk):
+        """Gets the quiz with id as pk with its ordered question modules and
+        published questions, without their answers.
+
+        The payload is read with one query per table, cached and versioned by the
+        contents of the quiz (see `get_quiz_payload()`), and the version is sent as
+        the ETag for conditional requests.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Quiz id
+
+        Returns:
+            `Response` with the quiz and status HTTP_200_OK (or
+            HTTP_304_NOT_MODIFIED).
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTAOrStudent`
+                permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_registered()` method
+            `HTTP_404_NOT_FOUND`: Raised if the quiz does not exist
+        """
+        try:
+            payload, version = get_quiz_payload(pk)
+        except Quiz.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        check = self._is_registered(payload["course_id"], request.user)
+        if check is not True:
+            return check
+
+        etag = '"{:x}"'.format(version)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(payload, status.HTTP_200_OK)
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class QuestionViewSet(viewsets.GenericViewSet, custom_mixins.IsRegisteredMixin):
+    """Base viewset for the questions (`SingleCorrectQuestion`,
+    `MultipleCorrectQuestion` and `FixedAnswerQuestion`)."""
+
+    permission_classes = (IsInstructorOrTAOrStudent,)
+    # Serializer of the answers, whose only field is the answer field of the
+    # history of the question
+    answer_serializer_class = None
+
+    def _submit_answer(self, request, pk):
+        """Submits an answer of the user to the question with id as pk.
+
+        The answer is counted against the attempts of the question and graded in a
+        single query (see `submit_question_answer()`), and the gradebook entry of
+        the user for the quiz is updated in the same transaction.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Question id
+
+        Returns:
+            `Response` with the number of attempts (and the maximum), the marks
+            obtained and whether the answer is correct, and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_400_BAD_REQUEST`: Raised due to serialization errors
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTAOrStudent`
+                permission class
+            `HTTP_403_FORBIDDEN`: Raised:
+                1. By `_is_registered()` method
+                2. If the question is not published
+                3. If the user has no attempts left
+            `HTTP_404_NOT_FOUND`: Raised if the question does not exist
+        """
+        user = request.user
+        model = self.queryset.model
+
+        serializer = self.answer_serializer_class(data=request.data)
+        if not serializer.is_valid():
+            logger.error(serializer.errors)
+            return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        (answer,) = serializer.validated_data.values()
+
+        try:
+            quiz_id, course_id, is_published, max_no_of_attempts = (
+                model.objects.annotate(
+                    course_id=Coalesce(
+                        F("question_module__quiz__chapter__course"),
+                        F("question_module__quiz__section__chapter__course"),
+                    )
+                )
+                .values_list(
+                    "question_module__quiz",
+                    "course_id",
+                    "is_published",
+                    "max_no_of_attempts",
+                )
+                .get(id=pk)
+            )
+        except model.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        check = self._is_registered(course_id, user)
+        if check is not True:
+            return check
+
+        if not is_published:
+            error = "The question with id: `{}` is not published.".format(pk)
+            logger.error(error)
+            return Response(error, status.HTTP_403_FORBIDDEN)
+
+        with transaction.atomic():
+            # Serializes the submissions of the user to the quiz, whose
+            # gradebook entry totals all of them
+            lock_gradebook([quiz_id], [user.id])
+            submission = submit_question_answer(model, pk, user.id, answer)
+            if submission is not None:
+                update_gradebook([quiz_id], [user.id])
+        if submission is None:
+            error = (
+                "The user `{}` has no attempts left for the question with id: "
+                "`{}`.".format(user, pk)
+            )
+            logger.error(error)
+            return Response(error, status.HTTP_403_FORBIDDEN)
+
+        data = submission._asdict()
+        data["max_no_of_attempts"] = max_no_of_attempts
+        return Response(data)
+
+
+class SingleCorrectQuestionViewSet(QuestionViewSet):
+    """Viewset for `SingleCorrectQuestion`."""
+
+    queryset = SingleCorrectQuestion.objects.all()
+    answer_serializer_class = SingleCorrectAnswerSerializer
+
+    @action(detail=True, methods=["POST"])
+    def submit_answer(self, request, pk):
+        return self._submit_answer(request, pk)
+
+
+class MultipleCorrectQuestionViewSet(QuestionViewSet):
+    """Viewset for `MultipleCorrectQuestion`."""
+
+    queryset = MultipleCorrectQuestion.objects.all()
+    answer_serializer_class = MultipleCorrectAnswerSerializer
+
+    @action(detail=True, methods=["POST"])
+    def submit_answer(self, request, pk):
+        return self._submit_answer(request, pk)
+
+
+class FixedAnswerQuestionViewSet(QuestionViewSet):
+    """Viewset for `FixedAnswerQuestion`."""
+
+    queryset = FixedAnswerQuestion.objects.all()
+    answer_serializer_class = FixedAnswerSerializer
+
+    @action(detail=True, methods=["POST"])
+    def submit_answer(self, request, pk):
+        return self._submit_answer(request, pk)
+
+
+class GradebookViewSet(viewsets.GenericViewSet, custom_mixins.IsRegisteredMixin):
+    """Viewset for `GradebookEntry`."""
+
+    queryset = GradebookEntry.objects.all()
+    serializer_class = GradebookEntrySerializer
+    permission_classes = (IsInstructorOrTAOrStudent,)
+    pagination_class = StandardResultsSetPagination
+
+    @action(detail=True, methods=["GET"])
+    def list_course_gradebook(self, request, pk):
+        """Gets the gradebook entries of the course with id as pk.
+
+        Instructors and TAs get the entries of all the users (or of the user given
+        as `user` query parameter), the others only their own entries. The entries
+        are read from the materialized gradebook (see `quiz.gradebook`) by user and
+        quiz.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Course id
+
+        Returns:
+            `Response` with the gradebook entries and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_400_BAD_REQUEST`: Raised if the user query parameter is invalid
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTAOrStudent`
+                permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_registered()` method
+            `HTTP_404_NOT_FOUND`: Raised by `_is_registered()` method
+        """
+        user = request.user
+        check = self._is_registered(pk, user)
+        if check is not True:
+            return check
+
+        entries = GradebookEntry.objects.filter(course=pk).order_by(
+            "user_id", "quiz_id"
+        )
+        if check_is_instructor_or_ta(pk, user):
+            user_id = request.query_params.get("user")
+            if user_id is not None:
+                try:
+                    entries = entries.filter(user=int(user_id))
+                except ValueError as e:
+                    logger.exception(e)
+                    return Response(str(e), status.HTTP_400_BAD_REQUEST)
+        else:
+            entries = entries.filter(user=user)
+
+        page = self.paginate_queryset(entries)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(entries, many=True)
+        return Response(serializer.data)
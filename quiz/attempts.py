@@ -0,0 +1,111 @@
+"""Submission of the answers of the quiz questions.
+
+An answer is recorded, counted against the attempts of the question and graded
+by a single conditional upsert of the `*QuestionHistory` row of the (question,
+user) pair, so concurrent submissions can neither exceed the attempts nor lose
+a count.
+"""
+from collections import namedtuple
+
+from django.db import connection
+
+from .models import (
+    FixedAnswerQuestion,
+    FixedAnswerQuestionHistory,
+    MultipleCorrectQuestion,
+    MultipleCorrectQuestionHistory,
+    SingleCorrectQuestion,
+    SingleCorrectQuestionHistory,
+)
+
+
+AnswerGrading = namedtuple(
+    "AnswerGrading", ["history_model", "answer_field", "is_correct"]
+)
+
+# History model, answer field of the history and SQL condition of a correct
+# answer (`q` is the question and `{answer}` the answer) by question model
+ANSWER_GRADINGS = {
+    SingleCorrectQuestion: AnswerGrading(
+        SingleCorrectQuestionHistory,
+        "option_selected",
+        "q.correct_option = {answer}",
+    ),
+    # Set equality, so the order and repetitions of the options do not matter
+    MultipleCorrectQuestion: AnswerGrading(
+        MultipleCorrectQuestionHistory,
+        "options_selected",
+        "(q.correct_options @> {answer} AND q.correct_options <@ {answer})",
+    ),
+    # Case and whitespace insensitive (as `normalize_answer()` of `quiz.regrade`)
+    FixedAnswerQuestion: AnswerGrading(
+        FixedAnswerQuestionHistory,
+        "answer_submitted",
+        "lower(btrim(regexp_replace(q.answer, '\\s+', ' ', 'g'))) = "
+        "lower(btrim(regexp_replace({answer}, '\\s+', ' ', 'g')))",
+    ),
+}
+
+Submission = namedtuple(
+    "Submission", ["no_of_times_attempted", "marks_obtained", "is_correct"]
+)
+
+
+def submit_question_answer(question_model, question_id, user_id, answer):
+    """Records and grades an answer of a user to a question in a single query.
+
+    The history of the (question, user) pair is created by the first answer,
+    and updated by the next ones only while its number of attempts is below the
+    maximum number of attempts of the question. The marks obtained are those of
+    the latest answer.
+
+    Args:
+        question_model: `Model` class of the question (`SingleCorrectQuestion`,
+            `MultipleCorrectQuestion` or `FixedAnswerQuestion`)
+        question_id (int): Question id
+        user_id (int): User id
+        answer: Selected option (int), selected options (list of int) or answer
+            (str), as per the question model
+
+    Returns:
+        The `Submission` (number of attempts, marks obtained and whether the answer
+        is correct), or None if the question does not exist or the user has no
+        attempts left.
+    """
+    grading = ANSWER_GRADINGS[question_model]
+    table = grading.history_model._meta.db_table
+    question_table = question_model._meta.db_table
+    sql = (
+        "INSERT INTO {table} AS h (question_id, user_id, {answer_field}, "
+        "no_of_times_attempted, marks_obtained, hint_taken, created_on, "
+        "modified_on) "
+        "SELECT q.id, %(user)s, %(answer)s, 1, "
+        "CASE WHEN {is_answer_correct} THEN q.marks ELSE 0 END, FALSE, NOW(), NOW() "
+        "FROM {question_table} q WHERE q.id = %(question)s "
+        "AND q.max_no_of_attempts > 0 "
+        "ON CONFLICT (question_id, user_id) DO UPDATE SET "
+        "{answer_field} = EXCLUDED.{answer_field}, "
+        "no_of_times_attempted = h.no_of_times_attempted + 1, "
+        "marks_obtained = EXCLUDED.marks_obtained, "
+        "modified_on = EXCLUDED.modified_on "
+        "WHERE h.no_of_times_attempted < (SELECT max_no_of_attempts "
+        "FROM {question_table} WHERE id = h.question_id) "
+        "RETURNING h.no_of_times_attempted, h.marks_obtained, "
+        "(SELECT {is_history_correct} FROM {question_table} q "
+        "WHERE q.id = h.question_id)"
+    ).format(
+        table=table,
+        question_table=question_table,
+        answer_field=grading.answer_field,
+        is_answer_correct=grading.is_correct.format(answer="%(answer)s"),
+        is_history_correct=grading.is_correct.format(
+            answer="h.{}".format(grading.answer_field)
+        ),
+    )
+    params = {"question": question_id, "user": user_id, "answer": answer}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return Submission(*row)
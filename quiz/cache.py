@@ -0,0 +1,143 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+from .models import (
+    FixedAnswerQuestion,
+    MultipleCorrectQuestion,
+    QuestionModule,
+    Quiz,
+    SingleCorrectQuestion,
+)
+
+
+QUIZ_VERSION_CACHE_KEY = "quiz:{}:version"
+
+QUIZ_PAYLOAD_CACHE_KEY = "quiz:{}:payload:{}"
+
+# Safety net for writes which bypass the signals (e.g. `QuerySet.update()`)
+QUIZ_PAYLOAD_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Question model and fields specific to the type in the payload by question type
+# (the correct answers, answer descriptions and hints are not in the payload)
+QUIZ_PAYLOAD_QUESTION_FIELDS = {
+    "single_correct": (SingleCorrectQuestion, ["options"]),
+    "multiple_correct": (MultipleCorrectQuestion, ["options"]),
+    "fixed_answer": (FixedAnswerQuestion, []),
+}
+
+
+def get_quiz_version(quiz_id):
+    """Gets the version of the contents of a quiz, which changes on every write of
+    the quiz, its question modules or its questions.
+
+    Args:
+        quiz_id (int): Quiz id
+
+    Returns:
+        The version of the quiz.
+    """
+    version = cache.get(QUIZ_VERSION_CACHE_KEY.format(quiz_id))
+    if version is None:
+        version = time.time_ns()
+        cache.set(QUIZ_VERSION_CACHE_KEY.format(quiz_id), version, None)
+    return version
+
+
+def bump_quiz_version(quiz_ids):
+    """Changes the version of quizzes, so that their cached payloads are stale.
+
+    Args:
+        quiz_ids (iterable): Quiz ids
+    """
+    version = time.time_ns()
+    cache.set_many(
+        {QUIZ_VERSION_CACHE_KEY.format(quiz_id): version for quiz_id in quiz_ids},
+        None,
+    )
+
+
+def _get_sequence_key(sequence):
+    """Gets the sort key of the objects ordered by a sequence of ids (those not in
+    the sequence last, by id)."""
+    positions = {}
+    for position, object_id in enumerate(sequence or []):
+        positions.setdefault(object_id, position)
+    return lambda data: (positions.get(data["id"], len(positions)), data["id"])
+
+
+def build_quiz_payload(quiz_id):
+    """Reads a quiz with its question modules and published questions, with one
+    query per table.
+
+    Args:
+        quiz_id (int): Quiz id
+
+    Returns:
+        A dictionary with the quiz (and the id of its course) and its question
+        modules in the order of the quiz's `question_module_sequence`, each with
+        its questions in the order of its `questions_sequence`.
+
+    Raises:
+        Quiz.DoesNotExist: Raised if the quiz does not exist
+    """
+    quiz = (
+        Quiz.objects.annotate(
+            course_id=Coalesce(F("chapter__course"), F("section__chapter__course"))
+        )
+        .values("id", "course_id", "title", "description", "question_module_sequence")
+        .get(id=quiz_id)
+    )
+    question_modules = list(
+        QuestionModule.objects.filter(quiz=quiz_id).values(
+            "id", "title", "description", "questions_sequence"
+        )
+    )
+
+    questions = {question_module["id"]: [] for question_module in question_modules}
+    for question_type, (model, fields) in QUIZ_PAYLOAD_QUESTION_FIELDS.items():
+        for question in model.objects.filter(
+            question_module__quiz=quiz_id, is_published=True
+        ).values(
+            "id",
+            "question_module",
+            "question_description",
+            "max_no_of_attempts",
+            "marks",
+            "gradable",
+            *fields,
+        ):
+            question_module_id = question.pop("question_module")
+            questions[question_module_id].append({"type": question_type, **question})
+
+    question_modules.sort(key=_get_sequence_key(quiz.pop("question_module_sequence")))
+    for question_module in question_modules:
+        question_module["questions"] = sorted(
+            questions[question_module["id"]],
+            key=_get_sequence_key(question_module.pop("questions_sequence")),
+        )
+    quiz["question_modules"] = question_modules
+    return quiz
+
+
+def get_quiz_payload(quiz_id):
+    """Gets the payload of a quiz from the cache.
+
+    Args:
+        quiz_id (int): Quiz id
+
+    Returns:
+        (payload, version) where payload is as returned by `build_quiz_payload()`.
+
+    Raises:
+        Quiz.DoesNotExist: Raised if the quiz does not exist
+    """
+    version = get_quiz_version(quiz_id)
+    key = QUIZ_PAYLOAD_CACHE_KEY.format(quiz_id, version)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_quiz_payload(quiz_id)
+        cache.set(key, payload, QUIZ_PAYLOAD_CACHE_TIMEOUT)
+    return payload, version
@@ -0,0 +1,254 @@
+"""Materialized gradebook of the quizzes.
+
+The histories of a user for the questions of a quiz are totalled into a
+`GradebookEntry` of the (quiz, user) pair, which also stores the course, so
+that a gradebook page is read with an index scan instead of joins through the
+questions, question modules, quizzes and chapters.
+
+The entries are updated by a single set-based query on every write of the
+histories: by the signals of `quiz.signals` for the writes through the ORM
+(once per transaction), and explicitly by the bulk writes (answer submissions
+and regrades). Their course is updated when their quiz, section or chapter is
+saved. They may be rebuilt with the `rebuild_gradebook` management command.
+
+Concurrent updates of the same (quiz, user) pair are serialized by advisory
+locks, so that the update committed last always totals the histories committed
+by the others.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+
+from course.models import Chapter, Section
+
+from .attempts import ANSWER_GRADINGS
+from .models import GradebookEntry, QuestionModule, Quiz
+
+
+# Histories of the questions of every type with the quiz of their question
+HISTORIES_SQL = """
+    SELECT h.user_id, m.quiz_id, h.marks_obtained, h.no_of_times_attempted,
+        q.gradable
+    FROM {history} h
+    JOIN {question} q ON q.id = h.question_id
+    JOIN {question_module} m ON m.id = q.question_module_id
+    WHERE {where}
+"""
+
+# Creates or updates the entries of the (quiz, user) pairs with histories, then
+# removes the entries of the pairs without histories
+GRADEBOOK_SQL = """
+    WITH histories AS ({histories}),
+    updated AS (
+        INSERT INTO {table} AS g (course_id, user_id, quiz_id, marks_obtained,
+            no_of_times_attempted, questions_attempted, modified_on)
+        SELECT ch.course_id, h.user_id, h.quiz_id,
+            COALESCE(SUM(h.marks_obtained) FILTER (WHERE h.gradable), 0),
+            SUM(h.no_of_times_attempted), COUNT(*), NOW()
+        FROM histories h
+        JOIN {quiz} z ON z.id = h.quiz_id
+        LEFT JOIN {section} s ON s.id = z.section_id
+        JOIN {chapter} ch ON ch.id = COALESCE(z.chapter_id, s.chapter_id)
+        GROUP BY ch.course_id, h.user_id, h.quiz_id
+        ON CONFLICT (quiz_id, user_id) DO UPDATE SET course_id = EXCLUDED.course_id,
+            marks_obtained = EXCLUDED.marks_obtained,
+            no_of_times_attempted = EXCLUDED.no_of_times_attempted,
+            questions_attempted = EXCLUDED.questions_attempted,
+            modified_on = EXCLUDED.modified_on
+        RETURNING g.quiz_id, g.user_id
+    )
+    DELETE FROM {table} g
+    WHERE {entries_where} AND NOT EXISTS (
+        SELECT 1 FROM updated u WHERE u.quiz_id = g.quiz_id AND u.user_id = g.user_id
+    )
+"""
+
+
+# Updates the course of the entries of quizzes, which may have moved with their
+# section or chapter
+COURSE_SQL = """
+    UPDATE {table} g SET course_id = ch.course_id
+    FROM {quiz} z
+    LEFT JOIN {section} s ON s.id = z.section_id
+    JOIN {chapter} ch ON ch.id = COALESCE(z.chapter_id, s.chapter_id)
+    WHERE z.id = g.quiz_id AND z.id = ANY(%s) AND g.course_id <> ch.course_id
+"""
+
+
+def _get_gradebook_sql(histories_where, entries_where):
+    """Gets the query which updates the entries of some (quiz, user) pairs.
+
+    Args:
+        histories_where (str): Condition on the histories (`h`) and question
+            modules (`m`)
+        entries_where (str): Same condition on the entries (`g`)
+
+    Returns:
+        The SQL query.
+    """
+    histories = " UNION ALL ".join(
+        HISTORIES_SQL.format(
+            history=grading.history_model._meta.db_table,
+            question=question_model._meta.db_table,
+            question_module=QuestionModule._meta.db_table,
+            where=histories_where,
+        )
+        for question_model, grading in ANSWER_GRADINGS.items()
+    )
+    return GRADEBOOK_SQL.format(
+        histories=histories,
+        table=GradebookEntry._meta.db_table,
+        quiz=Quiz._meta.db_table,
+        section=Section._meta.db_table,
+        chapter=Chapter._meta.db_table,
+        entries_where=entries_where,
+    )
+
+
+def lock_gradebook(quiz_ids, user_ids=None):
+    """Locks the gradebook entries of (quiz, user) pairs until the end of the
+    transaction.
+
+    A pair is locked by the key `(quiz_id, user_id)` and a whole quiz by the key
+    `(quiz_id, 0)`, which the pair locks share. The keys are locked in a fixed
+    order, so that concurrent updates never deadlock.
+
+    Args:
+        quiz_ids (list): Quiz ids
+        user_ids (list): Ids of the users, by default all of them
+    """
+    with connection.cursor() as cursor:
+        for quiz_id in sorted(set(quiz_ids)):
+            if user_ids is None:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s, 0)", [quiz_id])
+                continue
+            cursor.execute("SELECT pg_advisory_xact_lock_shared(%s, 0)", [quiz_id])
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(%s, u.user_id) FROM ("
+                "SELECT DISTINCT unnest(%s::integer[]) AS user_id ORDER BY 1) u",
+                [quiz_id, list(user_ids)],
+            )
+
+
+def update_gradebook(quiz_ids, user_ids=None):
+    """Updates the gradebook entries of quizzes in a single query.
+
+    The (quiz, user) pairs are locked beforehand, so that the query, which sees
+    the histories committed before it starts, is never overtaken by a
+    concurrent update of the same pairs computed from fewer histories.
+
+    Args:
+        quiz_ids (list): Quiz ids
+        user_ids (list): Ids of the users, by default all of them
+    """
+    histories_where = "m.quiz_id = ANY(%(quiz_ids)s)"
+    entries_where = "g.quiz_id = ANY(%(quiz_ids)s)"
+    if user_ids is not None:
+        histories_where += " AND h.user_id = ANY(%(user_ids)s)"
+        entries_where += " AND g.user_id = ANY(%(user_ids)s)"
+    with transaction.atomic(), connection.cursor() as cursor:
+        lock_gradebook(quiz_ids, user_ids)
+        cursor.execute(
+            _get_gradebook_sql(histories_where, entries_where),
+            {"quiz_ids": list(quiz_ids), "user_ids": list(user_ids or [])},
+        )
+
+
+class _PendingUpdates:
+    """(quiz, user) pairs whose entries are updated once the transaction is
+    committed, with the quizzes of the questions of their histories.
+
+    The batch of a connection is its `pending_gradebook_updates` attribute, until
+    it is flushed.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.user_ids = defaultdict(set)
+        self.quiz_ids = {}
+
+    def get_quiz_id(self, question_model, question_id):
+        """Gets the quiz of a question, queried once per batch."""
+        key = (question_model, question_id)
+        if key not in self.quiz_ids:
+            self.quiz_ids[key] = (
+                question_model.objects.filter(id=question_id)
+                .values_list("question_module__quiz", flat=True)
+                .first()
+            )
+        return self.quiz_ids[key]
+
+    def __call__(self):
+        """Flushes the batch, on the first of its commit callbacks."""
+        if getattr(self.connection, "pending_gradebook_updates", None) is not self:
+            return
+        self.connection.pending_gradebook_updates = None
+        for quiz_id, user_ids in sorted(self.user_ids.items()):
+            update_gradebook([quiz_id], user_ids)
+
+
+def schedule_gradebook_update(question_model, question_id, user_id):
+    """Updates the gradebook entry of a user for the quiz of a question once the
+    transaction is committed.
+
+    The pairs written in a transaction are updated together, with a single query
+    per quiz, instead of once per history (e.g. for the histories deleted along
+    with a course). The batch is flushed by a commit callback registered on every
+    write, so that it is still flushed if the callbacks of a savepoint are
+    discarded by its rollback. A batch left by a rolled back transaction is
+    flushed along with the next one, which only updates its entries again.
+
+    Args:
+        question_model: `Model` class of the question
+        question_id (int): Question id
+        user_id (int): User id
+    """
+    connection = transaction.get_connection()
+    updates = getattr(connection, "pending_gradebook_updates", None)
+    if updates is None:
+        updates = _PendingUpdates(connection)
+        connection.pending_gradebook_updates = updates
+    quiz_id = updates.get_quiz_id(question_model, question_id)
+    if quiz_id is None:
+        return
+    updates.user_ids[quiz_id].add(user_id)
+    transaction.on_commit(updates)
+
+
+def update_gradebook_courses(quiz_ids):
+    """Updates the course of the gradebook entries of quizzes.
+
+    Args:
+        quiz_ids (list): Quiz ids
+    """
+    quiz_ids = list(quiz_ids)
+    if not quiz_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            COURSE_SQL.format(
+                table=GradebookEntry._meta.db_table,
+                quiz=Quiz._meta.db_table,
+                section=Section._meta.db_table,
+                chapter=Chapter._meta.db_table,
+            ),
+            [quiz_ids],
+        )
+
+
+def rebuild_gradebook():
+    """Rebuilds the gradebook entries of all the quizzes.
+
+    Returns:
+        The number of gradebook entries.
+    """
+    with transaction.atomic():
+        # Waits for the updates in progress, and blocks the next ones
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "LOCK TABLE {} IN EXCLUSIVE MODE".format(GradebookEntry._meta.db_table)
+            )
+        GradebookEntry.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(_get_gradebook_sql("TRUE", "FALSE"))
+        return GradebookEntry.objects.count()
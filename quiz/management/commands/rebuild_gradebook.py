@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from quiz.gradebook import rebuild_gradebook
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the gradebook entries of all the quizzes from the histories."
+
+    def handle(self, *args, **options):
+        count = rebuild_gradebook()
+        self.stdout.write(
+            self.style.SUCCESS("Rebuilt {} gradebook entries.".format(count))
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from quiz.models import Quiz
+from quiz.regrade import regrade_quiz
+
+
+class Command(BaseCommand):
+    help = (
+        "Regrades the answers of the questions of quizzes (e.g. after writes of the "
+        "correct answers or marks which bypass the signals)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "quiz_ids",
+            nargs="*",
+            type=int,
+            help="Ids of the quizzes, by default all of them.",
+        )
+
+    def handle(self, *args, **options):
+        quiz_ids = options["quiz_ids"] or list(
+            Quiz.objects.values_list("id", flat=True)
+        )
+        updated = sum(regrade_quiz(quiz_id) for quiz_id in quiz_ids)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Regraded {} quizzes and updated {} histories.".format(
+                    len(quiz_ids), updated
+                )
+            )
+        )
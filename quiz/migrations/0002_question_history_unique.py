@@ -0,0 +1,43 @@
+# Generated by Django 3.2 on 2026-10-19 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0001_initial'),
+    ]
+
+    operations = [
+        # Keeps only the most attempted history of every (question, user) pair
+        *[
+            migrations.RunSQL(
+                f"""
+                DELETE FROM {table} a USING {table} b
+                WHERE a.question_id = b.question_id AND a.user_id = b.user_id AND (
+                    a.no_of_times_attempted < b.no_of_times_attempted
+                    OR (a.no_of_times_attempted = b.no_of_times_attempted AND a.id < b.id)
+                )
+                """,
+                migrations.RunSQL.noop,
+            )
+            for table in [
+                'quiz_singlecorrectquestionhistory',
+                'quiz_multiplecorrectquestionhistory',
+                'quiz_fixedanswerquestionhistory',
+            ]
+        ],
+        migrations.AddConstraint(
+            model_name='fixedanswerquestionhistory',
+            constraint=models.UniqueConstraint(fields=('question', 'user'), name='unique_fixed_answer_question_history'),
+        ),
+        migrations.AddConstraint(
+            model_name='multiplecorrectquestionhistory',
+            constraint=models.UniqueConstraint(fields=('question', 'user'), name='unique_multiple_correct_question_history'),
+        ),
+        migrations.AddConstraint(
+            model_name='singlecorrectquestionhistory',
+            constraint=models.UniqueConstraint(fields=('question', 'user'), name='unique_single_correct_question_history'),
+        ),
+    ]
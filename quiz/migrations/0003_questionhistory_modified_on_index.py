@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-19 07:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0002_question_history_unique'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fixedanswerquestionhistory',
+            name='modified_on',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='multiplecorrectquestionhistory',
+            name='modified_on',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='singlecorrectquestionhistory',
+            name='modified_on',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-19 07:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0006_searchentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quiz', '0003_questionhistory_modified_on_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradebookEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marks_obtained', models.IntegerField(default=0)),
+                ('no_of_times_attempted', models.IntegerField(default=0)),
+                ('questions_attempted', models.IntegerField(default=0)),
+                ('modified_on', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='course.course')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quiz.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='gradebookentry',
+            index=models.Index(fields=['course', 'user', 'quiz'], name='gradebook_course_user_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='gradebookentry',
+            constraint=models.UniqueConstraint(fields=('quiz', 'user'), name='unique_gradebook_entry'),
+        ),
+    ]
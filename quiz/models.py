@@ -3,7 +3,7 @@ from django.contrib.postgres.fields import ArrayField
 from django.core.exceptions import ValidationError
 from django.db import models
 
-from course.models import Chapter, Section
+from course.models import Chapter, Course, Section
 
 
 class Quiz(models.Model):
@@ -73,7 +73,8 @@ class QuestionHistory(models.Model):
     marks_obtained = models.IntegerField(default=0)
     hint_taken = models.BooleanField(default=False)
     created_on = models.DateTimeField(auto_now_add=True)
-    modified_on = models.DateTimeField(auto_now=True)
+    # Watermark of the quiz analytics of the `stats` app
+    modified_on = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         abstract = True
@@ -93,6 +94,15 @@ class SingleCorrectQuestionHistory(QuestionHistory):
     question = models.ForeignKey(SingleCorrectQuestion, on_delete=models.CASCADE)
     option_selected = models.IntegerField()
 
+    class Meta:
+        # Conflict target of `submit_question_answer()`
+        constraints = [
+            models.UniqueConstraint(
+                fields=["question", "user"],
+                name="unique_single_correct_question_history",
+            )
+        ]
+
 
 class MultipleCorrectQuestion(Question):
     options = ArrayField(models.TextField())
@@ -103,6 +113,15 @@ class MultipleCorrectQuestionHistory(QuestionHistory):
     question = models.ForeignKey(MultipleCorrectQuestion, on_delete=models.CASCADE)
     options_selected = ArrayField(models.IntegerField())
 
+    class Meta:
+        # Conflict target of `submit_question_answer()`
+        constraints = [
+            models.UniqueConstraint(
+                fields=["question", "user"],
+                name="unique_multiple_correct_question_history",
+            )
+        ]
+
 
 class FixedAnswerQuestion(Question):
     answer = models.TextField()
@@ -111,3 +130,40 @@ class FixedAnswerQuestion(Question):
 class FixedAnswerQuestionHistory(QuestionHistory):
     question = models.ForeignKey(FixedAnswerQuestion, on_delete=models.CASCADE)
     answer_submitted = models.TextField()
+
+    class Meta:
+        # Conflict target of `submit_question_answer()`
+        constraints = [
+            models.UniqueConstraint(
+                fields=["question", "user"],
+                name="unique_fixed_answer_question_history",
+            )
+        ]
+
+
+# Totals of the histories of a user in a quiz (maintained by `quiz.gradebook`)
+class GradebookEntry(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
+    # Marks obtained in the gradable questions
+    marks_obtained = models.IntegerField(default=0)
+    no_of_times_attempted = models.IntegerField(default=0)
+    questions_attempted = models.IntegerField(default=0)
+    modified_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["quiz", "user"], name="unique_gradebook_entry"
+            )
+        ]
+        indexes = [
+            # Gradebook pages of a course (and of its students)
+            models.Index(
+                fields=["course", "user", "quiz"], name="gradebook_course_user_idx"
+            )
+        ]
+
+    def __str__(self):
+        return "{}: {}".format(self.user.email, self.quiz.title)
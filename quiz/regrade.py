@@ -0,0 +1,242 @@
+"""Batch regrading of the answers of the quiz questions.
+
+When the correct answer or the marks of a question change, the marks obtained
+of its histories are recomputed: the answers and the answer keys are loaded
+into NumPy arrays, graded with vectorized comparisons (the same rules as
+`submit_question_answer()`) and only the changed marks are written back, with
+a VALUES-join UPDATE per batch.
+"""
+from itertools import chain
+
+import numpy as np
+from django.db import connection, transaction
+
+from .attempts import ANSWER_GRADINGS
+from .gradebook import lock_gradebook, update_gradebook
+from .models import FixedAnswerQuestion, MultipleCorrectQuestion, SingleCorrectQuestion
+
+
+# Number of histories updated by a single query
+REGRADE_BATCH_SIZE = 1000
+
+# Fields of the question with its correct answer by question model
+CORRECT_ANSWER_FIELDS = {
+    SingleCorrectQuestion: "correct_option",
+    MultipleCorrectQuestion: "correct_options",
+    FixedAnswerQuestion: "answer",
+}
+
+
+def normalize_answer(answer):
+    """Normalizes a fixed answer (case and whitespace insensitive).
+
+    Args:
+        answer (str): Fixed answer
+
+    Returns:
+        The answer in lower case with the whitespace collapsed.
+    """
+    return " ".join(answer.split()).lower()
+
+
+def _grade_single_correct(answers, correct_answers, index):
+    """Grades the selected options against the correct options (exact match).
+
+    Args:
+        answers (list): Selected option of every history
+        correct_answers (list): Correct option of every question
+        index (ndarray): Index of the question of every history
+
+    Returns:
+        A bool array denoting whether every answer is correct.
+    """
+    return (
+        np.asarray(answers, dtype=np.int64)
+        == np.asarray(correct_answers, dtype=np.int64)[index]
+    )
+
+
+def _grade_multiple_correct(answers, correct_answers, index):
+    """Grades the selected options against the correct options (set equality).
+
+    The options are ranked, and the sets of a history are equal if they have as
+    many distinct options as options in common.
+
+    Args:
+        answers (list): Selected options of every history
+        correct_answers (list): Correct options of every question
+        index (ndarray): Index of the question of every history
+
+    Returns:
+        A bool array denoting whether every answer is correct.
+    """
+    count = len(answers)
+    rows = np.arange(count)
+    selected_lengths = np.fromiter(map(len, answers), np.int64, count)
+    selected = np.fromiter(
+        chain.from_iterable(answers), np.int64, selected_lengths.sum()
+    )
+
+    # Correct options of the question of every history
+    question_lengths = np.fromiter(
+        map(len, correct_answers), np.int64, len(correct_answers)
+    )
+    question_options = np.fromiter(
+        chain.from_iterable(correct_answers), np.int64, question_lengths.sum()
+    )
+    question_offsets = np.cumsum(question_lengths) - question_lengths
+    correct_lengths = question_lengths[index]
+    correct_offsets = np.cumsum(correct_lengths) - correct_lengths
+    correct = question_options[
+        np.repeat(question_offsets[index] - correct_offsets, correct_lengths)
+        + np.arange(correct_lengths.sum())
+    ]
+
+    # An option of a history is identified by (row, rank of the option)
+    _, ranks = np.unique(np.concatenate([selected, correct]), return_inverse=True)
+    span = ranks.max() + 1 if ranks.size else 1
+    selected_keys = np.unique(
+        np.repeat(rows, selected_lengths) * span + ranks[: selected.size]
+    )
+    correct_keys = np.unique(
+        np.repeat(rows, correct_lengths) * span + ranks[selected.size :]
+    )
+    common_keys = np.intersect1d(selected_keys, correct_keys, assume_unique=True)
+
+    selected_counts = np.bincount(selected_keys // span, minlength=count)
+    correct_counts = np.bincount(correct_keys // span, minlength=count)
+    common_counts = np.bincount(common_keys // span, minlength=count)
+    return (selected_counts == correct_counts) & (common_counts == selected_counts)
+
+
+def _grade_fixed_answer(answers, correct_answers, index):
+    """Grades the submitted answers against the answers (normalized match).
+
+    Args:
+        answers (list): Submitted answer of every history
+        correct_answers (list): Answer of every question
+        index (ndarray): Index of the question of every history
+
+    Returns:
+        A bool array denoting whether every answer is correct.
+    """
+    submitted = np.array([normalize_answer(answer) for answer in answers], object)
+    correct = np.array([normalize_answer(answer) for answer in correct_answers], object)
+    return submitted == correct[index]
+
+
+GRADERS = {
+    SingleCorrectQuestion: _grade_single_correct,
+    MultipleCorrectQuestion: _grade_multiple_correct,
+    FixedAnswerQuestion: _grade_fixed_answer,
+}
+
+
+def _update_marks(history_model, rows):
+    """Writes the marks obtained of histories with a VALUES-join UPDATE per batch.
+
+    A history is only updated if it was not modified since it was read (an answer
+    submitted in the meantime is already graded with the current answer key).
+
+    Args:
+        history_model: `Model` class of the histories
+        rows (list): (id, modified on, marks obtained) of the histories
+
+    Returns:
+        The number of updated histories.
+    """
+    table = history_model._meta.db_table
+    updated = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), REGRADE_BATCH_SIZE):
+            batch = rows[start : start + REGRADE_BATCH_SIZE]
+            sql = (
+                "UPDATE {table} AS h SET marks_obtained = v.marks_obtained, "
+                "modified_on = NOW() "
+                "FROM (VALUES {values}) AS v (id, modified_on, marks_obtained) "
+                "WHERE h.id = v.id AND h.modified_on = v.modified_on"
+            ).format(
+                table=table,
+                values=", ".join(["(%s, %s::timestamptz, %s)"] * len(batch)),
+            )
+            cursor.execute(sql, [value for row in batch for value in row])
+            updated += cursor.rowcount
+    return updated
+
+
+def regrade_questions(question_model, question_ids):
+    """Recomputes the marks obtained of the histories of questions, and the
+    gradebook entries of their quizzes.
+
+    Args:
+        question_model: `Model` class of the questions (`SingleCorrectQuestion`,
+            `MultipleCorrectQuestion` or `FixedAnswerQuestion`)
+        question_ids (list): Question ids
+
+    Returns:
+        The number of histories whose marks obtained were updated.
+    """
+    grading = ANSWER_GRADINGS[question_model]
+    questions = list(
+        question_model.objects.filter(id__in=question_ids)
+        .order_by("id")
+        .values_list(
+            "id",
+            CORRECT_ANSWER_FIELDS[question_model],
+            "marks",
+            "question_module__quiz",
+        )
+    )
+    if not questions:
+        return 0
+    question_ids, correct_answers, marks, quiz_ids = zip(*questions)
+
+    with transaction.atomic():
+        # Locked before the histories, like by the submissions of answers
+        lock_gradebook(set(quiz_ids))
+        histories = list(
+            grading.history_model.objects.filter(question__in=question_ids)
+            .order_by()
+            .values_list(
+                "id", "modified_on", "question", grading.answer_field, "marks_obtained"
+            )
+        )
+        if not histories:
+            return 0
+        ids, modified_ons, history_question_ids, answers, marks_obtained = zip(
+            *histories
+        )
+
+        index = np.searchsorted(question_ids, history_question_ids)
+        is_correct = GRADERS[question_model](answers, correct_answers, index)
+        regraded_marks = np.where(is_correct, np.asarray(marks)[index], 0)
+        changed = np.flatnonzero(regraded_marks != np.asarray(marks_obtained))
+        updated = _update_marks(
+            grading.history_model,
+            [(ids[i], modified_ons[i], int(regraded_marks[i])) for i in changed],
+        )
+        # Also if no marks changed, as the questions may have become (un)gradable
+        update_gradebook(set(quiz_ids))
+    return updated
+
+
+def regrade_quiz(quiz_id):
+    """Recomputes the marks obtained of the histories of all the questions of a
+    quiz.
+
+    Args:
+        quiz_id (int): Quiz id
+
+    Returns:
+        The number of histories whose marks obtained were updated.
+    """
+    updated = 0
+    for question_model in ANSWER_GRADINGS:
+        question_ids = list(
+            question_model.objects.filter(question_module__quiz=quiz_id).values_list(
+                "id", flat=True
+            )
+        )
+        if question_ids:
+            updated += regrade_questions(question_model, question_ids)
+    return updated
@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+from .models import GradebookEntry
+
+
+class SingleCorrectAnswerSerializer(serializers.Serializer):
+    option_selected = serializers.IntegerField()
+
+
+class MultipleCorrectAnswerSerializer(serializers.Serializer):
+    options_selected = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False
+    )
+
+
+class FixedAnswerSerializer(serializers.Serializer):
+    answer_submitted = serializers.CharField(trim_whitespace=False)
+
+
+class GradebookEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GradebookEntry
+        exclude = ["id", "course"]
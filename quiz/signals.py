@@ -0,0 +1,150 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from course.models import Chapter, Section
+
+from .cache import bump_quiz_version
+from .gradebook import (
+    schedule_gradebook_update,
+    update_gradebook,
+    update_gradebook_courses,
+)
+from .models import (
+    FixedAnswerQuestion,
+    FixedAnswerQuestionHistory,
+    MultipleCorrectQuestion,
+    MultipleCorrectQuestionHistory,
+    QuestionModule,
+    Quiz,
+    SingleCorrectQuestion,
+    SingleCorrectQuestionHistory,
+)
+from .regrade import CORRECT_ANSWER_FIELDS, regrade_questions
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+@receiver([post_save, post_delete], sender=QuestionModule)
+def update_quiz_version(sender, instance, **kwargs):
+    """Makes the cached payload of the quiz stale.
+
+    The version is changed once the transaction is committed, so that the
+    payload is never cached from uncommitted contents under the new version.
+    """
+    quiz_id = instance.id if sender is Quiz else instance.quiz_id
+    transaction.on_commit(lambda: bump_quiz_version([quiz_id]))
+
+
+def _get_grading_fields(question_model):
+    """Gets the fields of a question model which its histories are graded by."""
+    return [CORRECT_ANSWER_FIELDS[question_model], "marks", "gradable"]
+
+
+@receiver(pre_save, sender=SingleCorrectQuestion)
+@receiver(pre_save, sender=MultipleCorrectQuestion)
+@receiver(pre_save, sender=FixedAnswerQuestion)
+def remember_question_module(sender, instance, raw, **kwargs):
+    """Remembers the question module and grading fields of a question before it
+    is saved."""
+    instance._old_question_module_id = None
+    instance._old_question_grading = None
+    if not raw and instance.pk is not None:
+        values = (
+            sender._base_manager.filter(pk=instance.pk)
+            .values_list("question_module", *_get_grading_fields(sender))
+            .first()
+        )
+        if values is not None:
+            instance._old_question_module_id, *instance._old_question_grading = values
+
+
+@receiver([post_save, post_delete], sender=SingleCorrectQuestion)
+@receiver([post_save, post_delete], sender=MultipleCorrectQuestion)
+@receiver([post_save, post_delete], sender=FixedAnswerQuestion)
+def update_question_quiz_version(sender, instance, **kwargs):
+    """Makes the cached payload of the question's quiz (and of its previous quiz,
+    if it was moved) stale."""
+    question_module_ids = {
+        instance.question_module_id,
+        getattr(instance, "_old_question_module_id", None),
+    }
+    quiz_ids = list(
+        QuestionModule.objects.filter(id__in=question_module_ids - {None})
+        .values_list("quiz", flat=True)
+        .distinct()
+    )
+    if quiz_ids:
+        transaction.on_commit(lambda: bump_quiz_version(quiz_ids))
+
+
+@receiver(post_save, sender=SingleCorrectQuestion)
+@receiver(post_save, sender=MultipleCorrectQuestion)
+@receiver(post_save, sender=FixedAnswerQuestion)
+def regrade_question_histories(sender, instance, created, **kwargs):
+    """Regrades the histories of the question if its correct answer, marks or
+    gradability changed, and updates the gradebooks of its quizzes if it was
+    moved."""
+    if created:
+        return
+    question_id = instance.id
+    grading = [getattr(instance, field) for field in _get_grading_fields(sender)]
+    regraded = grading != getattr(instance, "_old_question_grading", None)
+    if regraded:
+        # Also updates the gradebook of the question's quiz
+        transaction.on_commit(lambda: regrade_questions(sender, [question_id]))
+
+    old_question_module_id = getattr(instance, "_old_question_module_id", None)
+    if old_question_module_id not in (None, instance.question_module_id):
+        question_module_ids = [old_question_module_id]
+        if not regraded:
+            question_module_ids.append(instance.question_module_id)
+        quiz_ids = list(
+            QuestionModule.objects.filter(id__in=question_module_ids)
+            .values_list("quiz", flat=True)
+            .distinct()
+        )
+        transaction.on_commit(lambda: update_gradebook(quiz_ids))
+
+
+@receiver([post_save, post_delete], sender=SingleCorrectQuestionHistory)
+@receiver([post_save, post_delete], sender=MultipleCorrectQuestionHistory)
+@receiver([post_save, post_delete], sender=FixedAnswerQuestionHistory)
+def update_history_gradebook(sender, instance, **kwargs):
+    """Updates the gradebook entry of the history's user for the question's quiz.
+
+    The entries are updated once the transaction is committed, so that the
+    histories deleted with their quiz do not recreate its entries. The histories
+    loaded from fixtures are totalled by `rebuild_gradebook` instead.
+    """
+    if kwargs.get("raw"):
+        return
+    question_model = sender._meta.get_field("question").related_model
+    schedule_gradebook_update(question_model, instance.question_id, instance.user_id)
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_save, sender=Section)
+@receiver(post_save, sender=Chapter)
+def update_gradebook_course(sender, instance, created, **kwargs):
+    """Updates the course of the gradebook entries and the cached payloads of the
+    quizzes of the quiz, section or chapter, which may have moved to another
+    course."""
+    if created:
+        return
+    if sender is Quiz:
+        quizzes = Quiz.objects.filter(id=instance.id)
+    elif sender is Section:
+        quizzes = Quiz.objects.filter(section=instance.id)
+    else:
+        quizzes = Quiz.objects.filter(
+            Q(chapter=instance.id) | Q(section__chapter=instance.id)
+        )
+
+    def update_quizzes():
+        quiz_ids = list(quizzes.values_list("id", flat=True))
+        update_gradebook_courses(quiz_ids)
+        # The course of the quiz is in its cached payload
+        bump_quiz_version(quiz_ids)
+
+    transaction.on_commit(update_quizzes)
@@ -0,0 +1,667 @@
+import io
+import threading
+import time
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import TransactionTestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from course.models import Chapter, Section
+from utils import credentials
+
+from .attempts import submit_question_answer
+from .gradebook import update_gradebook
+from .models import (
+    FixedAnswerQuestion,
+    FixedAnswerQuestionHistory,
+    GradebookEntry,
+    MultipleCorrectQuestion,
+    MultipleCorrectQuestionHistory,
+    QuestionModule,
+    Quiz,
+    SingleCorrectQuestion,
+    SingleCorrectQuestionHistory,
+)
+from .regrade import _grade_multiple_correct
+
+
+ins_cred = credentials.TEST_INSTRUCTOR_CREDENTIALS
+ta_cred = credentials.TEST_TA_CREDENTIALS
+stu_cred = credentials.TEST_STUDENT_CREDENTIALS
+
+
+class QuestionViewSetTest(APITestCase):
+    """Test for `SingleCorrectQuestionViewSet`, `MultipleCorrectQuestionViewSet`
+    and `FixedAnswerQuestionViewSet`."""
+
+    fixtures = [
+        "users.test.yaml",
+        "departments.test.yaml",
+        "colleges.test.yaml",
+        "courses.test.yaml",
+        "coursehistories.test.yaml",
+        "chapters.test.yaml",
+        "sections.test.yaml",
+        "quiz.test.yaml",
+        "questionmodule.test.yaml",
+        "singlecorrectquestion.test.yaml",
+        "singlecorrectquestionhistory.test.yaml",
+        "multiplecorrectquestion.test.yaml",
+        "multiplecorrectquestionhistory.test.yaml",
+        "fixedanswerquestion.test.yaml",
+        "fixedanswerquestionhistory.test.yaml",
+    ]
+
+    def login(self, email, password):
+        self.client.login(email=email, password=password)
+
+    def logout(self):
+        self.client.logout()
+
+    def _submit_answer_helper(self, basename, question_id, data, status_code):
+        """Helper function for `test_submit_answer()`.
+
+        Args:
+            basename (str): Basename of the viewset of the question
+            question_id (int): Question id
+            data (dict): Answer
+            status_code (int): Expected status code of the API call
+
+        Returns:
+            The data of the response.
+        """
+        url = reverse("quiz:{}-submit-answer".format(basename), args=[question_id])
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status_code)
+        return response.data
+
+    def test_submit_answer(self):
+        """Test: submit the answers of the questions."""
+        single, multiple, fixed = (
+            "singlecorrectquestion",
+            "multiplecorrectquestion",
+            "fixedanswerquestion",
+        )
+
+        # Unpublished question
+        self.login(**stu_cred)
+        self._submit_answer_helper(
+            single, 2, {"option_selected": 8}, status.HTTP_403_FORBIDDEN
+        )
+        self.logout()
+
+        for model in (
+            SingleCorrectQuestion,
+            MultipleCorrectQuestion,
+            FixedAnswerQuestion,
+        ):
+            model.objects.update(is_published=True)
+
+        self.login(**stu_cred)
+
+        # Wrong answer, then right answer
+        data = self._submit_answer_helper(
+            single, 2, {"option_selected": 6}, status.HTTP_200_OK
+        )
+        self.assertEqual(
+            data,
+            {
+                "no_of_times_attempted": 1,
+                "marks_obtained": 0,
+                "is_correct": False,
+                "max_no_of_attempts": 5,
+            },
+        )
+        data = self._submit_answer_helper(
+            single, 2, {"option_selected": 8}, status.HTTP_200_OK
+        )
+        self.assertEqual(
+            (data["no_of_times_attempted"], data["marks_obtained"], data["is_correct"]),
+            (2, 1, True),
+        )
+        history = SingleCorrectQuestionHistory.objects.get(question=2, user=3)
+        self.assertEqual(
+            (history.no_of_times_attempted, history.marks_obtained),
+            (2, 1),
+        )
+        self.assertEqual(history.option_selected, 8)
+
+        # No attempts left
+        self._submit_answer_helper(
+            single, 1, {"option_selected": 2}, status.HTTP_403_FORBIDDEN
+        )
+        self.assertEqual(
+            SingleCorrectQuestionHistory.objects.get(
+                question=1, user=3
+            ).no_of_times_attempted,
+            5,
+        )
+
+        # The order and repetitions of the options do not matter
+        for options_selected, is_correct in [
+            ([7, 8], False),
+            ([8, 8], True),
+            ([8], True),
+            ([6], False),
+        ]:
+            data = self._submit_answer_helper(
+                multiple,
+                2,
+                {"options_selected": options_selected},
+                status.HTTP_200_OK,
+            )
+            self.assertEqual(data["is_correct"], is_correct)
+            self.assertEqual(data["marks_obtained"], 3 if is_correct else 0)
+        self.assertEqual(data["no_of_times_attempted"], 4)
+        self._submit_answer_helper(
+            multiple, 2, {"options_selected": [8]}, status.HTTP_403_FORBIDDEN
+        )
+        history = MultipleCorrectQuestionHistory.objects.get(question=2, user=3)
+        self.assertEqual(
+            (history.no_of_times_attempted, history.marks_obtained),
+            (4, 0),
+        )
+
+        # Case and whitespace insensitive
+        data = self._submit_answer_helper(
+            fixed, 2, {"answer_submitted": "  Answer-II "}, status.HTTP_200_OK
+        )
+        self.assertEqual((data["marks_obtained"], data["is_correct"]), (3, True))
+        self.assertEqual(
+            FixedAnswerQuestionHistory.objects.get(question=2, user=3).answer_submitted,
+            "  Answer-II ",
+        )
+
+        # Invalid answers
+        self._submit_answer_helper(
+            single, 2, {"option_selected": "a"}, status.HTTP_400_BAD_REQUEST
+        )
+        self._submit_answer_helper(
+            multiple, 1, {"options_selected": []}, status.HTTP_400_BAD_REQUEST
+        )
+        self._submit_answer_helper(fixed, 2, {}, status.HTTP_400_BAD_REQUEST)
+
+        # Question does not exist
+        self._submit_answer_helper(
+            single, 100, {"option_selected": 2}, status.HTTP_404_NOT_FOUND
+        )
+        self.logout()
+
+        # Unregistered user (quiz moved to course 3)
+        Quiz.objects.filter(id=1).update(section=3)
+        self.login(**stu_cred)
+        self._submit_answer_helper(
+            fixed, 2, {"answer_submitted": "answer-ii"}, status.HTTP_403_FORBIDDEN
+        )
+        self.logout()
+
+        # Unauthenticated user
+        self._submit_answer_helper(
+            fixed, 2, {"answer_submitted": "answer-ii"}, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_regrade_quizzes(self):
+        """Test: regrade the answers of the questions after the answers changed."""
+        # None of the answers of the fixtures is correct
+        out = io.StringIO()
+        call_command("regrade_quizzes", stdout=out)
+        self.assertIn("Regraded 2 quizzes and updated 9 histories.", out.getvalue())
+        out = io.StringIO()
+        call_command("regrade_quizzes", stdout=out)
+        self.assertIn("updated 0 histories", out.getvalue())
+
+        # Regraded on save
+        question = SingleCorrectQuestion.objects.get(id=1)
+        question.correct_option = 3
+        question.marks = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            question.save()
+        self.assertEqual(
+            dict(
+                SingleCorrectQuestionHistory.objects.filter(question=1).values_list(
+                    "user", "marks_obtained"
+                )
+            ),
+            {1: 0, 3: 2},
+        )
+        # Not regraded on the change of the other fields
+        SingleCorrectQuestionHistory.objects.filter(question=1, user=3).update(
+            marks_obtained=0
+        )
+        question.question_description = "Question 1"
+        with self.captureOnCommitCallbacks(execute=True):
+            question.save()
+        self.assertEqual(
+            SingleCorrectQuestionHistory.objects.get(question=1, user=3).marks_obtained,
+            0,
+        )
+        SingleCorrectQuestionHistory.objects.filter(question=1, user=3).update(
+            marks_obtained=2
+        )
+        question = MultipleCorrectQuestion.objects.get(id=1)
+        question.correct_options = [3]
+        with self.captureOnCommitCallbacks(execute=True):
+            question.save()
+        self.assertEqual(
+            MultipleCorrectQuestionHistory.objects.get(
+                question=1, user=2
+            ).marks_obtained,
+            3,
+        )
+
+        # Regraded by the command after a bulk write
+        FixedAnswerQuestion.objects.filter(id=1).update(answer=" 4 ")
+        out = io.StringIO()
+        call_command("regrade_quizzes", "1", stdout=out)
+        self.assertIn("Regraded 1 quizzes and updated 1 histories.", out.getvalue())
+        self.assertEqual(
+            dict(
+                FixedAnswerQuestionHistory.objects.values_list("user", "marks_obtained")
+            ),
+            {1: 0, 2: 0, 3: 3},
+        )
+
+        # Sets of options are equal regardless of their order and repetitions
+        self.assertEqual(
+            list(
+                _grade_multiple_correct(
+                    [[2, 1, 1], [1], [], [3, 1]],
+                    [[1, 2], [], [1, 3]],
+                    np.array([0, 0, 1, 2]),
+                )
+            ),
+            [True, False, True, True],
+        )
+
+
+class QuizViewSetTest(APITestCase):
+    """Test for `QuizViewSet`."""
+
+    fixtures = [
+        "users.test.yaml",
+        "departments.test.yaml",
+        "colleges.test.yaml",
+        "courses.test.yaml",
+        "coursehistories.test.yaml",
+        "chapters.test.yaml",
+        "sections.test.yaml",
+        "quiz.test.yaml",
+        "questionmodule.test.yaml",
+        "singlecorrectquestion.test.yaml",
+        "multiplecorrectquestion.test.yaml",
+        "fixedanswerquestion.test.yaml",
+    ]
+
+    def login(self, email, password):
+        self.client.login(email=email, password=password)
+
+    def logout(self):
+        self.client.logout()
+
+    def test_render_quiz(self):
+        """Test: render a quiz with its question modules and published questions."""
+        cache.clear()
+        url = reverse("quiz:quiz-render-quiz", args=[1])
+        SingleCorrectQuestion.objects.update(is_published=True)
+        MultipleCorrectQuestion.objects.filter(id=2).update(is_published=True)
+        FixedAnswerQuestion.objects.filter(id=1).update(is_published=True)
+        QuestionModule.objects.filter(id=1).update(questions_sequence=[2, 1])
+
+        self.login(**stu_cred)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (response.data["id"], response.data["course_id"], response.data["title"]),
+            (1, 1, "Quiz 1"),
+        )
+        question_modules = response.data["question_modules"]
+        self.assertEqual(
+            [question_module["id"] for question_module in question_modules], [1]
+        )
+        questions = question_modules[0]["questions"]
+        self.assertEqual(
+            [(question["type"], question["id"]) for question in questions],
+            [
+                ("single_correct", 2),
+                ("multiple_correct", 2),
+                ("single_correct", 1),
+                ("fixed_answer", 1),
+            ],
+        )
+        self.assertEqual(questions[0]["options"], ["6", "7", "8", "9"])
+        # The answers are not in the payload
+        for question in questions:
+            for field in (
+                "correct_option",
+                "correct_options",
+                "answer",
+                "answer_description",
+            ):
+                self.assertNotIn(field, question)
+        etag = response["ETag"]
+
+        # Cached (no quiz queries, only the session, user and access checks)
+        with self.assertNumQueries(4):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Stale after a question changed
+        question = FixedAnswerQuestion.objects.get(id=2)
+        question.is_published = True
+        with self.captureOnCommitCallbacks(execute=True):
+            question.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [
+                (question["type"], question["id"])
+                for question in response.data["question_modules"][0]["questions"]
+            ][:3],
+            [("single_correct", 2), ("multiple_correct", 2), ("fixed_answer", 2)],
+        )
+
+        # Stale after a question moved to another quiz
+        etag = response["ETag"]
+        question.question_module_id = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            question.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn(
+            ("fixed_answer", 2),
+            [
+                (question["type"], question["id"])
+                for question in response.data["question_modules"][0]["questions"]
+            ],
+        )
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTAOrStudent` permission class
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # `HTTP_403_FORBIDDEN` due to the student not registered in course 3, to
+        # which the chapter of the cached quiz moved
+        self.login(**stu_cred)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        chapter = Chapter.objects.get(id=1)
+        chapter.course_id = 3
+        with self.captureOnCommitCallbacks(execute=True):
+            chapter.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        chapter.course_id = 1
+        with self.captureOnCommitCallbacks(execute=True):
+            chapter.save()
+        self.logout()
+
+        # `HTTP_403_FORBIDDEN` due to the student not registered in course 3
+        quiz = Quiz.objects.get(id=1)
+        quiz.section_id = 3
+        with self.captureOnCommitCallbacks(execute=True):
+            quiz.save()
+        self.login(**stu_cred)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        # `HTTP_404_NOT_FOUND` due to the quiz not existing
+        response = self.client.get(reverse("quiz:quiz-render-quiz", args=[99]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.logout()
+
+
+class GradebookViewSetTest(APITestCase):
+    """Test for `GradebookViewSet`."""
+
+    fixtures = [
+        "users.test.yaml",
+        "departments.test.yaml",
+        "colleges.test.yaml",
+        "courses.test.yaml",
+        "coursehistories.test.yaml",
+        "chapters.test.yaml",
+        "sections.test.yaml",
+        "quiz.test.yaml",
+        "questionmodule.test.yaml",
+        "singlecorrectquestion.test.yaml",
+        "singlecorrectquestionhistory.test.yaml",
+        "multiplecorrectquestion.test.yaml",
+        "multiplecorrectquestionhistory.test.yaml",
+        "fixedanswerquestion.test.yaml",
+        "fixedanswerquestionhistory.test.yaml",
+    ]
+
+    def login(self, email, password):
+        self.client.login(email=email, password=password)
+
+    def logout(self):
+        self.client.logout()
+
+    def _get_entries(self):
+        """Gets the gradebook entries by user.
+
+        Returns:
+            A dictionary with (course, marks obtained, number of attempts, number of
+            questions attempted) by user.
+        """
+        return {
+            entry[0]: entry[1:]
+            for entry in GradebookEntry.objects.values_list(
+                "user",
+                "course",
+                "marks_obtained",
+                "no_of_times_attempted",
+                "questions_attempted",
+            )
+        }
+
+    def _list_course_gradebook_helper(self, course_id, params, status_code):
+        """Helper function for `test_list_course_gradebook()`.
+
+        Args:
+            course_id (int): Course id
+            params (dict): Query parameters
+            status_code (int): Expected status code of the API call
+
+        Returns:
+            The (user, quiz) pairs of the listed entries.
+        """
+        url = reverse("quiz:gradebookentry-list-course-gradebook", args=[course_id])
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status_code)
+        if status_code != status.HTTP_200_OK:
+            return None
+        return [(entry["user"], entry["quiz"]) for entry in response.data["results"]]
+
+    def test_rebuild_gradebook(self):
+        """Test: rebuild the gradebook and update it on the writes of the histories."""
+        out = io.StringIO()
+        call_command("rebuild_gradebook", stdout=out)
+        self.assertIn("Rebuilt 3 gradebook entries.", out.getvalue())
+        # Only the marks of the gradable questions are totalled
+        self.assertEqual(
+            self._get_entries(),
+            {1: (1, 0, 20, 4), 2: (1, 0, 15, 3), 3: (1, 0, 10, 2)},
+        )
+
+        # Updated on the regrade of the questions which became gradable
+        SingleCorrectQuestion.objects.update(gradable=True, is_published=True)
+        FixedAnswerQuestion.objects.update(gradable=True, is_published=True)
+        call_command("regrade_quizzes", "1", stdout=io.StringIO())
+        self.assertEqual(self._get_entries()[3], (1, 0, 10, 2))
+        FixedAnswerQuestion.objects.filter(id=1).update(answer="5")
+        FixedAnswerQuestionHistory.objects.filter(user=3).update(answer_submitted="5")
+        call_command("regrade_quizzes", "1", stdout=io.StringIO())
+        self.assertEqual(self._get_entries()[3], (1, 3, 10, 2))
+
+        # Updated on the submission of an answer
+        self.login(**stu_cred)
+        url = reverse("quiz:singlecorrectquestion-submit-answer", args=[2])
+        response = self.client.post(url, {"option_selected": 8}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.logout()
+        self.assertEqual(self._get_entries()[3], (1, 4, 11, 3))
+
+        # Updated on the deletion of histories, and removed without histories
+        with self.captureOnCommitCallbacks(execute=True):
+            FixedAnswerQuestionHistory.objects.filter(user=3).delete()
+        with self.captureOnCommitCallbacks() as callbacks:
+            for model in (
+                SingleCorrectQuestionHistory,
+                MultipleCorrectQuestionHistory,
+                FixedAnswerQuestionHistory,
+            ):
+                model.objects.filter(user=2).delete()
+        # Once per transaction (savepoint, locks, update and release)
+        with self.assertNumQueries(5):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(self._get_entries(), {1: (1, 0, 20, 4), 3: (1, 1, 6, 2)})
+
+        # Updated after the rollback of the savepoint of the first writes
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    SingleCorrectQuestionHistory.objects.filter(user=1).delete()
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+            MultipleCorrectQuestionHistory.objects.filter(user=1, question=2).delete()
+        self.assertEqual(self._get_entries(), {1: (1, 0, 15, 3), 3: (1, 1, 6, 2)})
+
+        # Updated for both quizzes on the move of a question to another quiz
+        question = SingleCorrectQuestion.objects.get(id=1)
+        question.question_module_id = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            question.save()
+        self.assertEqual(
+            set(
+                GradebookEntry.objects.values_list(
+                    "quiz", "user", "no_of_times_attempted", "questions_attempted"
+                )
+            ),
+            {(1, 1, 10, 2), (1, 3, 1, 1), (2, 1, 5, 1), (2, 3, 5, 1)},
+        )
+
+        # Updated on the move of the quiz, section or chapter to another course
+        quiz = Quiz.objects.get(id=1)
+        quiz.section_id = 3
+        with self.captureOnCommitCallbacks(execute=True):
+            quiz.save()
+        self.assertEqual(
+            set(GradebookEntry.objects.values_list("quiz", "course")), {(1, 3), (2, 1)}
+        )
+        section = Section.objects.get(id=3)
+        section.chapter_id = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            section.save()
+        self.assertEqual(
+            set(GradebookEntry.objects.values_list("quiz", "course")), {(1, 1), (2, 1)}
+        )
+        chapter = Chapter.objects.get(id=1)
+        chapter.course_id = 3
+        with self.captureOnCommitCallbacks(execute=True):
+            chapter.save()
+        self.assertEqual(
+            set(GradebookEntry.objects.values_list("quiz", "course")), {(1, 1), (2, 3)}
+        )
+
+    def test_list_course_gradebook(self):
+        """Test: list the gradebook entries of a course."""
+        call_command("rebuild_gradebook", stdout=io.StringIO())
+
+        # Instructor and TA get the entries of all the users
+        self.login(**ins_cred)
+        self.assertEqual(
+            self._list_course_gradebook_helper(1, {}, status.HTTP_200_OK),
+            [(1, 1), (2, 1), (3, 1)],
+        )
+        self.assertEqual(
+            self._list_course_gradebook_helper(1, {"user": 3}, status.HTTP_200_OK),
+            [(3, 1)],
+        )
+        self._list_course_gradebook_helper(
+            1, {"user": "a"}, status.HTTP_400_BAD_REQUEST
+        )
+        self.logout()
+        self.login(**ta_cred)
+        self.assertEqual(
+            len(self._list_course_gradebook_helper(1, {}, status.HTTP_200_OK)), 3
+        )
+        self.logout()
+
+        # Student gets only their entries
+        self.login(**stu_cred)
+        self.assertEqual(
+            self._list_course_gradebook_helper(1, {"user": 1}, status.HTTP_200_OK),
+            [(3, 1)],
+        )
+
+        # `HTTP_403_FORBIDDEN` due to the student not registered in course 3
+        self._list_course_gradebook_helper(3, {}, status.HTTP_403_FORBIDDEN)
+
+        # `HTTP_404_NOT_FOUND` due to the course not existing
+        self._list_course_gradebook_helper(99, {}, status.HTTP_404_NOT_FOUND)
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTAOrStudent` permission class
+        self._list_course_gradebook_helper(1, {}, status.HTTP_401_UNAUTHORIZED)
+
+
+class GradebookConcurrencyTest(TransactionTestCase):
+    """Test for the concurrent updates of the gradebook."""
+
+    fixtures = GradebookViewSetTest.fixtures
+
+    def _submit_answer_helper(self, question_model, question_id, answer, release):
+        """Helper function for `test_concurrent_submissions()`, which submits an
+        answer of the student to a question of quiz 1 in its own transaction.
+
+        Args:
+            question_model: `Model` class of the question
+            question_id (int): Question id
+            answer: Answer, as per the question model
+            release (threading.Event): Event awaited before the commit, or None
+        """
+        try:
+            with transaction.atomic():
+                submit_question_answer(question_model, question_id, 3, answer)
+                update_gradebook([1], [3])
+                if release is not None:
+                    release.wait(5)
+        finally:
+            connection.close()
+
+    def test_concurrent_submissions(self):
+        """Test: the gradebook entry totals the answers submitted concurrently."""
+        call_command("rebuild_gradebook", stdout=io.StringIO())
+        SingleCorrectQuestion.objects.update(is_published=True)
+        FixedAnswerQuestion.objects.update(is_published=True)
+
+        # The second submission is computed while the first one is uncommitted
+        release = threading.Event()
+        first = threading.Thread(
+            target=self._submit_answer_helper,
+            args=(SingleCorrectQuestion, 2, 8, release),
+        )
+        second = threading.Thread(
+            target=self._submit_answer_helper,
+            args=(FixedAnswerQuestion, 2, "answer-ii", None),
+        )
+        first.start()
+        time.sleep(0.5)
+        second.start()
+        time.sleep(0.5)
+        release.set()
+        first.join()
+        second.join()
+
+        entry = GradebookEntry.objects.get(quiz=1, user=3)
+        self.assertEqual(entry.no_of_times_attempted, 12)
+        self.assertEqual(entry.questions_attempted, 4)
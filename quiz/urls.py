@@ -0,0 +1,24 @@
+from django.urls import include, path
+from rest_framework import routers
+
+from .api import (
+    FixedAnswerQuestionViewSet,
+    GradebookViewSet,
+    MultipleCorrectQuestionViewSet,
+    QuizViewSet,
+    SingleCorrectQuestionViewSet,
+)
+
+
+app_name = "quiz"
+
+router = routers.DefaultRouter()
+router.register(r"quizzes", QuizViewSet)
+router.register(r"single_correct_questions", SingleCorrectQuestionViewSet)
+router.register(r"multiple_correct_questions", MultipleCorrectQuestionViewSet)
+router.register(r"fixed_answer_questions", FixedAnswerQuestionViewSet)
+router.register(r"gradebook", GradebookViewSet)
+
+urlpatterns = [
+    path("api/", include(router.urls)),
+]
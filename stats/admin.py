@@ -0,0 +1,85 @@
+from django.contrib import admin
+
+from .models import (
+    ChapterEngagement,
+    CourseEngagement,
+    QuestionAnalytics,
+    QuizAnalytics,
+    RollupWatermark,
+    VideoEngagement,
+)
+
+
+class VideoEngagementAdmin(admin.ModelAdmin):
+    list_display = (
+        "video",
+        "viewers",
+        "completions",
+        "median_watched_fraction",
+        "total_watched_duration",
+        "modified_on",
+    )
+
+
+class ChapterEngagementAdmin(admin.ModelAdmin):
+    list_display = (
+        "chapter",
+        "videos",
+        "viewers",
+        "views",
+        "completions",
+        "average_watched_fraction",
+        "modified_on",
+    )
+
+
+class CourseEngagementAdmin(admin.ModelAdmin):
+    list_display = (
+        "course",
+        "videos",
+        "viewers",
+        "views",
+        "completions",
+        "average_watched_fraction",
+        "modified_on",
+    )
+
+
+class QuizAnalyticsAdmin(admin.ModelAdmin):
+    list_display = (
+        "quiz",
+        "students",
+        "mean_score",
+        "score_std",
+        "modified_on",
+    )
+
+
+class QuestionAnalyticsAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "quiz",
+        "question_type",
+        "question_id",
+        "respondents",
+        "difficulty_index",
+        "discrimination_index",
+        "point_biserial",
+    )
+    list_filter = ("question_type",)
+
+
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "name",
+        "watermark",
+    )
+
+
+admin.site.register(VideoEngagement, VideoEngagementAdmin)
+admin.site.register(ChapterEngagement, ChapterEngagementAdmin)
+admin.site.register(CourseEngagement, CourseEngagementAdmin)
+admin.site.register(QuizAnalytics, QuizAnalyticsAdmin)
+admin.site.register(QuestionAnalytics, QuestionAnalyticsAdmin)
+admin.site.register(RollupWatermark, RollupWatermarkAdmin)
@@ -0,0 +1,274 @@
+"""Item analysis of the quizzes.
+
+The answers of the students to the questions of a quiz are graded into a
+(students × questions) matrix of correct answers, from which the statistics of
+all the questions are computed at once with NumPy. The results are stored in
+`QuizAnalytics` and `QuestionAnalytics` by the `analyze_quizzes` management
+command, so that the dashboards read precomputed values.
+"""
+from collections import Counter
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from course.models import CourseHistory
+from quiz.attempts import ANSWER_GRADINGS
+from quiz.models import (
+    FixedAnswerQuestion,
+    MultipleCorrectQuestion,
+    Quiz,
+    SingleCorrectQuestion,
+)
+from quiz.regrade import CORRECT_ANSWER_FIELDS, GRADERS, normalize_answer
+
+from .models import QuestionAnalytics, QuizAnalytics, RollupWatermark
+from .rollups import ROLLUP_OVERLAP
+
+
+QUIZ_ANALYTICS_WATERMARK = "quiz_analytics"
+
+# Fraction of the students by score in the upper and lower groups of the
+# discrimination index
+DISCRIMINATION_GROUP_FRACTION = 0.27
+
+# Number of the most frequent answers in the distribution of a fixed answer
+# question
+FIXED_ANSWER_DISTRIBUTION_SIZE = 10
+
+# Question model by question type (the choices of `QuestionAnalytics.question_type`)
+QUESTION_MODELS = {
+    "single_correct": SingleCorrectQuestion,
+    "multiple_correct": MultipleCorrectQuestion,
+    "fixed_answer": FixedAnswerQuestion,
+}
+
+
+def _get_option_distributions(question_type, answers, index, count):
+    """Counts the answers to every question by option.
+
+    Args:
+        question_type (str): Question type (a key of `QUESTION_MODELS`)
+        answers (list): Answer of every history
+        index (ndarray): Index of the question of every history
+        count (int): Number of questions
+
+    Returns:
+        A list with a dictionary of the number of answers by option (or by
+        normalized answer) for every question.
+    """
+    distributions = [{} for _ in range(count)]
+    if not answers:
+        return distributions
+    if question_type == "fixed_answer":
+        counters = [Counter() for _ in range(count)]
+        for answer, question in zip(answers, index):
+            counters[question][normalize_answer(answer)] += 1
+        for distribution, counter in zip(distributions, counters):
+            distribution.update(counter.most_common(FIXED_ANSWER_DISTRIBUTION_SIZE))
+        return distributions
+
+    if question_type == "multiple_correct":
+        lengths = np.fromiter(map(len, answers), np.int64, len(answers))
+        index = np.repeat(index, lengths)
+        answers = [option for options in answers for option in options]
+    pairs, counts = np.unique(
+        np.column_stack([index, np.asarray(answers, dtype=np.int64)]),
+        axis=0,
+        return_counts=True,
+    )
+    for (question, option), option_count in zip(pairs.tolist(), counts.tolist()):
+        distributions[question][str(option)] = option_count
+    return distributions
+
+
+def _get_item_statistics(scores):
+    """Computes the statistics of all the questions from a score matrix.
+
+    Args:
+        scores (ndarray): (students × questions) matrix of the correct answers
+            (1) and of the other answers or unanswered questions (0)
+
+    Returns:
+        (difficulty, discrimination, point biserial) arrays with an index for every
+        question (NaN if undefined).
+    """
+    students_count, questions_count = scores.shape
+    undefined = np.full(questions_count, np.nan)
+    if not students_count:
+        return undefined, undefined, undefined
+
+    totals = scores.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        difficulty = scores.mean(axis=0)
+
+        # The upper and lower groups of a single student are the same
+        discrimination = undefined
+        if students_count >= 2:
+            group = max(1, round(students_count * DISCRIMINATION_GROUP_FRACTION))
+            order = np.argsort(totals, kind="stable")
+            upper, lower = order[-group:], order[:group]
+            discrimination = scores[upper].mean(axis=0) - scores[lower].mean(axis=0)
+
+        # Pearson correlation of every question with the scores
+        covariance = (scores - difficulty).T @ (totals - totals.mean())
+        point_biserial = covariance / (
+            students_count * scores.std(axis=0) * totals.std()
+        )
+    return difficulty, discrimination, point_biserial
+
+
+def _to_floats(values):
+    """Converts an array to a list of floats (None for NaN)."""
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+def analyze_quiz(quiz_id):
+    """Computes and stores the item analysis of a quiz.
+
+    Only the answers of the students of the course are analyzed, and an answer
+    is correct if it matches the current answer key. The score of a student is
+    the number of questions answered correctly.
+
+    Args:
+        quiz_id (int): Quiz id
+
+    Returns:
+        The number of analyzed students.
+    """
+    course_id = (
+        Quiz.objects.filter(id=quiz_id)
+        .annotate(
+            course_id=Coalesce(F("chapter__course"), F("section__chapter__course"))
+        )
+        .values_list("course_id", flat=True)
+        .first()
+    )
+    students = CourseHistory.objects.filter(
+        course=course_id, role="S", status="E"
+    ).values("user")
+
+    questions, distributions = [], []
+    user_ids, question_indexes, correct = [], [], []
+    for question_type, model in QUESTION_MODELS.items():
+        grading = ANSWER_GRADINGS[model]
+        type_questions = list(
+            model.objects.filter(question_module__quiz=quiz_id)
+            .order_by("id")
+            .values_list("id", CORRECT_ANSWER_FIELDS[model])
+        )
+        if not type_questions:
+            continue
+        question_ids, correct_answers = zip(*type_questions)
+        histories = list(
+            grading.history_model.objects.filter(
+                question__in=question_ids, user__in=students
+            ).values_list("question", "user", grading.answer_field)
+        )
+        if histories:
+            history_question_ids, history_user_ids, answers = zip(*histories)
+        else:
+            history_question_ids, history_user_ids, answers = [], [], []
+
+        index = np.searchsorted(question_ids, history_question_ids).astype(np.int64)
+        correct.append(GRADERS[model](answers, correct_answers, index))
+        distributions.extend(
+            _get_option_distributions(question_type, answers, index, len(question_ids))
+        )
+        question_indexes.append(index + len(questions))
+        user_ids.extend(history_user_ids)
+        questions.extend((question_type, question_id) for question_id in question_ids)
+
+    # (students × questions) matrices of the answered and correct questions
+    student_ids, rows = np.unique(np.asarray(user_ids, np.int64), return_inverse=True)
+    columns = np.concatenate(question_indexes + [np.zeros(0, np.int64)])
+    answered = np.zeros((len(student_ids), len(questions)), bool)
+    answered[rows, columns] = True
+    scores = np.zeros((len(student_ids), len(questions)))
+    scores[rows, columns] = np.concatenate(correct + [np.zeros(0, bool)])
+
+    students_count = len(student_ids)
+    totals = scores.sum(axis=1)
+    respondents = answered.sum(axis=0)
+    difficulty, discrimination, point_biserial = _get_item_statistics(scores)
+
+    with transaction.atomic():
+        QuizAnalytics.objects.update_or_create(
+            quiz_id=quiz_id,
+            defaults={
+                "students": students_count,
+                "mean_score": float(totals.mean()) if students_count else 0.0,
+                "score_std": float(totals.std()) if students_count else 0.0,
+            },
+        )
+        QuestionAnalytics.objects.filter(quiz=quiz_id).delete()
+        QuestionAnalytics.objects.bulk_create(
+            QuestionAnalytics(
+                quiz_id=quiz_id,
+                question_type=question_type,
+                question_id=question_id,
+                respondents=int(question_respondents),
+                difficulty_index=question_difficulty,
+                discrimination_index=question_discrimination,
+                point_biserial=question_point_biserial,
+                option_distribution=distribution,
+            )
+            for (
+                (question_type, question_id),
+                question_respondents,
+                question_difficulty,
+                question_discrimination,
+                question_point_biserial,
+                distribution,
+            ) in zip(
+                questions,
+                respondents,
+                _to_floats(difficulty),
+                _to_floats(discrimination),
+                _to_floats(point_biserial),
+                distributions,
+            )
+        )
+    return students_count
+
+
+def analyze_quizzes(full=False):
+    """Recomputes the item analysis of the quizzes with histories modified since
+    the last run.
+
+    Runs are serialized by a lock on the watermark row.
+
+    Args:
+        full (bool): Whether to recompute the item analysis of all the quizzes
+
+    Returns:
+        The number of analyzed quizzes.
+    """
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+            name=QUIZ_ANALYTICS_WATERMARK
+        )
+        now = timezone.now()
+        if full or watermark.watermark is None:
+            quiz_ids = set(Quiz.objects.values_list("id", flat=True))
+        else:
+            quiz_ids = set()
+            for model in QUESTION_MODELS.values():
+                # Served by the index on `modified_on`
+                quiz_ids.update(
+                    ANSWER_GRADINGS[model]
+                    .history_model.objects.filter(
+                        modified_on__gt=watermark.watermark - ROLLUP_OVERLAP
+                    )
+                    .values_list("question__question_module__quiz", flat=True)
+                    .distinct()
+                )
+
+        for quiz_id in sorted(quiz_ids):
+            analyze_quiz(quiz_id)
+
+        watermark.watermark = now
+        watermark.save(update_fields=["watermark"])
+    return len(quiz_ids)
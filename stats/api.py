@@ -0,0 +1,207 @@
+import logging
+
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from course.models import Chapter
+from quiz.models import Quiz
+from utils import mixins as custom_mixins
+from utils.permissions import IsInstructorOrTA
+from video.models import Video, get_course
+
+from .models import (
+    ChapterEngagement,
+    CourseEngagement,
+    QuestionAnalytics,
+    QuizAnalytics,
+    VideoEngagement,
+)
+from .serializers import (
+    ChapterEngagementSerializer,
+    CourseEngagementSerializer,
+    QuestionAnalyticsSerializer,
+    QuizAnalyticsSerializer,
+    VideoEngagementSerializer,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class EngagementViewSet(viewsets.GenericViewSet, custom_mixins.IsRegisteredMixin):
+    """Viewset for the video engagement rollups.
+
+    The engagement is served from the rows precomputed by the
+    `rollup_video_engagement` management command, so it lags behind the watch
+    progress by up to the interval between the rollups. A video, chapter or
+    course without views yet has an engagement of zeros.
+    """
+
+    queryset = CourseEngagement.objects.all()
+    serializer_class = CourseEngagementSerializer
+    permission_classes = (IsInstructorOrTA,)
+
+    @action(detail=True, methods=["GET"])
+    def retrieve_video_engagement(self, request, pk):
+        """Gets the engagement of the video with id as pk.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Video id
+
+        Returns:
+            `Response` with the engagement data and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_instructor_or_ta()` method
+            `HTTP_404_NOT_FOUND`: Raised if the video does not exist
+        """
+        try:
+            video = Video.objects.select_related("chapter", "section__chapter").get(
+                id=pk
+            )
+        except Video.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        check = self._is_instructor_or_ta(get_course(video).id, request.user)
+        if check is not True:
+            return check
+
+        engagement = VideoEngagement.objects.filter(video=video).first()
+        engagement = engagement or VideoEngagement(video=video)
+        serializer = VideoEngagementSerializer(engagement)
+        return Response(serializer.data, status.HTTP_200_OK)
+
+    @action(detail=True, methods=["GET"])
+    def retrieve_chapter_engagement(self, request, pk):
+        """Gets the engagement of the chapter with id as pk and of its videos.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Chapter id
+
+        Returns:
+            `Response` with the engagement data (with the engagement of the watched
+            videos as `videos_engagement`) and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_instructor_or_ta()` method
+            `HTTP_404_NOT_FOUND`: Raised if the chapter does not exist
+        """
+        try:
+            chapter = Chapter.objects.get(id=pk)
+        except Chapter.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        check = self._is_instructor_or_ta(chapter.course_id, request.user)
+        if check is not True:
+            return check
+
+        engagement = ChapterEngagement.objects.filter(chapter=chapter).first()
+        engagement = engagement or ChapterEngagement(chapter=chapter)
+        videos_engagement = VideoEngagement.objects.filter(
+            Q(video__chapter=chapter) | Q(video__section__chapter=chapter)
+        ).order_by("video")
+        data = ChapterEngagementSerializer(engagement).data
+        data["videos_engagement"] = VideoEngagementSerializer(
+            videos_engagement, many=True
+        ).data
+        return Response(data, status.HTTP_200_OK)
+
+    @action(detail=True, methods=["GET"])
+    def retrieve_course_engagement(self, request, pk):
+        """Gets the engagement of the course with id as pk and of its chapters.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Course id
+
+        Returns:
+            `Response` with the engagement data (with the engagement of the watched
+            chapters as `chapters_engagement`) and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_instructor_or_ta()` method
+            `HTTP_404_NOT_FOUND`: Raised by `_is_instructor_or_ta()` method
+        """
+        check = self._is_instructor_or_ta(pk, request.user)
+        if check is not True:
+            return check
+
+        engagement = CourseEngagement.objects.filter(course=pk).first()
+        engagement = engagement or CourseEngagement(course_id=int(pk))
+        chapters_engagement = ChapterEngagement.objects.filter(
+            chapter__course=pk
+        ).order_by("chapter")
+        data = CourseEngagementSerializer(engagement).data
+        data["chapters_engagement"] = ChapterEngagementSerializer(
+            chapters_engagement, many=True
+        ).data
+        return Response(data, status.HTTP_200_OK)
+
+
+class QuizAnalyticsViewSet(viewsets.GenericViewSet, custom_mixins.IsRegisteredMixin):
+    """Viewset for the item analysis of the quizzes.
+
+    The analytics are served from the rows precomputed by the `analyze_quizzes`
+    management command, so they lag behind the answers by up to the interval
+    between the runs. A quiz which was not analyzed yet has no question analytics.
+    """
+
+    queryset = QuizAnalytics.objects.all()
+    serializer_class = QuizAnalyticsSerializer
+    permission_classes = (IsInstructorOrTA,)
+
+    @action(detail=True, methods=["GET"])
+    def retrieve_quiz_analytics(self, request, pk):
+        """Gets the item analysis of the quiz with id as pk.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Quiz id
+
+        Returns:
+            `Response` with the analytics data (with the analytics of the questions
+            as `questions_analytics`) and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_instructor_or_ta()` method
+            `HTTP_404_NOT_FOUND`: Raised if the quiz does not exist
+        """
+        try:
+            course_id = (
+                Quiz.objects.annotate(
+                    course_id=Coalesce(
+                        F("chapter__course"), F("section__chapter__course")
+                    )
+                )
+                .values_list("course_id", flat=True)
+                .get(id=pk)
+            )
+        except Quiz.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        check = self._is_instructor_or_ta(course_id, request.user)
+        if check is not True:
+            return check
+
+        analytics = QuizAnalytics.objects.filter(quiz=pk).first()
+        analytics = analytics or QuizAnalytics(quiz_id=int(pk))
+        questions_analytics = QuestionAnalytics.objects.filter(quiz=pk).order_by(
+            "question_type", "question_id"
+        )
+        data = QuizAnalyticsSerializer(analytics).data
+        data["questions_analytics"] = QuestionAnalyticsSerializer(
+            questions_analytics, many=True
+        ).data
+        return Response(data, status.HTTP_200_OK)
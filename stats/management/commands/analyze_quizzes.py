@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from stats.analytics import analyze_quizzes
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the item analysis of the quizzes answered since the last run. "
+        "Meant to be run periodically (e.g. by cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute the item analysis of all the quizzes.",
+        )
+
+    def handle(self, *args, **options):
+        count = analyze_quizzes(full=options["full"])
+        self.stdout.write(self.style.SUCCESS("Analyzed {} quizzes.".format(count)))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from stats.rollups import rollup_video_engagement
+
+
+class Command(BaseCommand):
+    help = (
+        "Rolls up the engagement of the videos watched since the last run, and of "
+        "their chapters and courses. Meant to be run periodically (e.g. by cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute the rollups of all the videos.",
+        )
+
+    def handle(self, *args, **options):
+        count = rollup_video_engagement(full=options["full"])
+        self.stdout.write(
+            self.style.SUCCESS("Rolled up the engagement of {} videos.".format(count))
+        )
@@ -0,0 +1,123 @@
+# Generated by Django 3.2 on 2026-10-19 06:51
+
+import datetime
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+import stats.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("video", "0006_videohistory_modified_on"),
+        ("course", "0005_storageusage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChapterEngagement",
+            fields=[
+                ("viewers", models.IntegerField(default=0)),
+                ("completions", models.IntegerField(default=0)),
+                (
+                    "total_watched_duration",
+                    models.DurationField(default=datetime.timedelta),
+                ),
+                ("modified_on", models.DateTimeField(auto_now=True)),
+                ("videos", models.IntegerField(default=0)),
+                ("views", models.IntegerField(default=0)),
+                ("average_watched_fraction", models.FloatField(default=0)),
+                (
+                    "chapter",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="course.chapter",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="CourseEngagement",
+            fields=[
+                ("viewers", models.IntegerField(default=0)),
+                ("completions", models.IntegerField(default=0)),
+                (
+                    "total_watched_duration",
+                    models.DurationField(default=datetime.timedelta),
+                ),
+                ("modified_on", models.DateTimeField(auto_now=True)),
+                ("videos", models.IntegerField(default=0)),
+                ("views", models.IntegerField(default=0)),
+                ("average_watched_fraction", models.FloatField(default=0)),
+                (
+                    "course",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="course.course",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=64, unique=True)),
+                ("watermark", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="VideoEngagement",
+            fields=[
+                ("viewers", models.IntegerField(default=0)),
+                ("completions", models.IntegerField(default=0)),
+                (
+                    "total_watched_duration",
+                    models.DurationField(default=datetime.timedelta),
+                ),
+                ("modified_on", models.DateTimeField(auto_now=True)),
+                (
+                    "video",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="video.video",
+                    ),
+                ),
+                ("median_watched_fraction", models.FloatField(default=0)),
+                (
+                    "completion_buckets",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.IntegerField(),
+                        default=stats.models.get_empty_completion_buckets,
+                        size=None,
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2 on 2026-10-19 07:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0003_questionhistory_modified_on_index'),
+        ('stats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizAnalytics',
+            fields=[
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='quiz.quiz')),
+                ('students', models.IntegerField(default=0)),
+                ('mean_score', models.FloatField(default=0)),
+                ('score_std', models.FloatField(default=0)),
+                ('modified_on', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionAnalytics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_type', models.CharField(choices=[('single_correct', 'Single Correct'), ('multiple_correct', 'Multiple Correct'), ('fixed_answer', 'Fixed Answer')], max_length=16)),
+                ('question_id', models.IntegerField()),
+                ('respondents', models.IntegerField(default=0)),
+                ('difficulty_index', models.FloatField(blank=True, null=True)),
+                ('discrimination_index', models.FloatField(blank=True, null=True)),
+                ('point_biserial', models.FloatField(blank=True, null=True)),
+                ('option_distribution', models.JSONField(default=dict)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quiz.quiz')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='questionanalytics',
+            constraint=models.UniqueConstraint(fields=('quiz', 'question_type', 'question_id'), name='unique_question_analytics'),
+        ),
+    ]
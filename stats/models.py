@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+
+from course.models import Chapter, Course
+from quiz.models import Quiz
+from video.models import Video
+
+
+# Watched fraction from which a view counts as a completion
+COMPLETION_FRACTION = 0.9
+
+# Number of (equal width) buckets of the watched fraction of the views of a video
+COMPLETION_BUCKETS = 10
+
+
+QUESTION_TYPES = (
+    ("single_correct", "Single Correct"),
+    ("multiple_correct", "Multiple Correct"),
+    ("fixed_answer", "Fixed Answer"),
+)
+
+
+def get_empty_completion_buckets():
+    return [0] * COMPLETION_BUCKETS
+
+
+class Engagement(models.Model):
+    # Number of distinct users who watched a video
+    viewers = models.IntegerField(default=0)
+    # Number of views (`VideoHistory` rows) with a watched fraction of at least
+    # `COMPLETION_FRACTION`
+    completions = models.IntegerField(default=0)
+    total_watched_duration = models.DurationField(default=timedelta)
+    modified_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class GroupEngagement(Engagement):
+    # Number of watched videos and of views
+    videos = models.IntegerField(default=0)
+    views = models.IntegerField(default=0)
+    average_watched_fraction = models.FloatField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class VideoEngagement(Engagement):
+    video = models.OneToOneField(Video, on_delete=models.CASCADE, primary_key=True)
+    median_watched_fraction = models.FloatField(default=0)
+    # Number of views by watched fraction, [0, 0.1), [0.1, 0.2), ..., [0.9, 1]
+    completion_buckets = ArrayField(
+        models.IntegerField(), default=get_empty_completion_buckets
+    )
+
+    def __str__(self):
+        return self.video.title
+
+
+class ChapterEngagement(GroupEngagement):
+    chapter = models.OneToOneField(Chapter, on_delete=models.CASCADE, primary_key=True)
+
+    def __str__(self):
+        return self.chapter.title
+
+
+class CourseEngagement(GroupEngagement):
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True)
+
+    def __str__(self):
+        return self.course.title
+
+
+class QuizAnalytics(models.Model):
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, primary_key=True)
+    # Number of students who answered a question of the quiz
+    students = models.IntegerField(default=0)
+    # Mean and standard deviation of the number of correctly answered questions
+    mean_score = models.FloatField(default=0)
+    score_std = models.FloatField(default=0)
+    modified_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.quiz.title
+
+
+class QuestionAnalytics(models.Model):
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
+    question_type = models.CharField(max_length=16, choices=QUESTION_TYPES)
+    question_id = models.IntegerField()
+    # Number of students who answered the question
+    respondents = models.IntegerField(default=0)
+    # Fraction of the students of the quiz who answered the question correctly
+    difficulty_index = models.FloatField(null=True, blank=True)
+    # Difference of the difficulty indexes of the upper and lower groups of the
+    # students by score (see `stats.analytics.DISCRIMINATION_GROUP_FRACTION`)
+    discrimination_index = models.FloatField(null=True, blank=True)
+    # Correlation of the correctness of the answers with the scores
+    point_biserial = models.FloatField(null=True, blank=True)
+    # Number of answers by option (or by normalized answer, the most frequent only,
+    # for the fixed answer questions)
+    option_distribution = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["quiz", "question_type", "question_id"],
+                name="unique_question_analytics",
+            )
+        ]
+
+    def __str__(self):
+        return "{}: {} {}".format(self.quiz.title, self.question_type, self.question_id)
+
+
+class RollupWatermark(models.Model):
+    name = models.CharField(max_length=64, unique=True)
+    # Rows modified after the watermark have not been rolled up yet
+    watermark = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,177 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from course.models import Chapter, Section
+from video.models import Video, VideoHistory
+
+from .models import (
+    COMPLETION_BUCKETS,
+    COMPLETION_FRACTION,
+    ChapterEngagement,
+    CourseEngagement,
+    RollupWatermark,
+    VideoEngagement,
+)
+
+
+VIDEO_ENGAGEMENT_WATERMARK = "video_engagement"
+
+# Rows are rolled up again if modified this long before the watermark, so that
+# rows of transactions committed after the previous rollup started are not missed
+# (recomputing a rollup row is idempotent)
+ROLLUP_OVERLAP = timedelta(minutes=5)
+
+# Views (`VideoHistory` rows) of the videos, with their chapter, course and watched
+# fraction
+VIEWS_SQL = """
+    SELECT h.video_id, h.user_id, h.video_watched_duration, ch.id AS chapter_id,
+        ch.course_id,
+        COALESCE(LEAST(
+            EXTRACT(EPOCH FROM h.video_watched_duration)
+            / NULLIF(EXTRACT(EPOCH FROM v.video_duration), 0),
+            1
+        ), 0) AS fraction
+    FROM {history} h
+    JOIN {video} v ON v.id = h.video_id
+    LEFT JOIN {section} s ON s.id = v.section_id
+    JOIN {chapter} ch ON ch.id = COALESCE(v.chapter_id, s.chapter_id)
+    WHERE {where}
+"""
+
+VIDEO_ENGAGEMENT_SQL = """
+    WITH watched AS ({views})
+    INSERT INTO {table} (video_id, viewers, completions, total_watched_duration,
+        median_watched_fraction, completion_buckets, modified_on)
+    SELECT video_id, COUNT(*), COUNT(*) FILTER (WHERE fraction >= %(completion)s),
+        SUM(video_watched_duration),
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY fraction),
+        ARRAY[{buckets}], NOW()
+    FROM watched
+    GROUP BY video_id
+    ON CONFLICT (video_id) DO UPDATE SET viewers = EXCLUDED.viewers,
+        completions = EXCLUDED.completions,
+        total_watched_duration = EXCLUDED.total_watched_duration,
+        median_watched_fraction = EXCLUDED.median_watched_fraction,
+        completion_buckets = EXCLUDED.completion_buckets,
+        modified_on = EXCLUDED.modified_on
+"""
+
+GROUP_ENGAGEMENT_SQL = """
+    WITH watched AS ({views})
+    INSERT INTO {table} ({column}, videos, viewers, views, completions,
+        total_watched_duration, average_watched_fraction, modified_on)
+    SELECT {column}, COUNT(DISTINCT video_id), COUNT(DISTINCT user_id), COUNT(*),
+        COUNT(*) FILTER (WHERE fraction >= %(completion)s),
+        SUM(video_watched_duration), AVG(fraction), NOW()
+    FROM watched
+    GROUP BY {column}
+    ON CONFLICT ({column}) DO UPDATE SET videos = EXCLUDED.videos,
+        viewers = EXCLUDED.viewers, views = EXCLUDED.views,
+        completions = EXCLUDED.completions,
+        total_watched_duration = EXCLUDED.total_watched_duration,
+        average_watched_fraction = EXCLUDED.average_watched_fraction,
+        modified_on = EXCLUDED.modified_on
+"""
+
+
+def _get_views_sql(where):
+    """Gets the query of the views of some videos.
+
+    Args:
+        where (str): Condition on the views
+
+    Returns:
+        The SQL query.
+    """
+    return VIEWS_SQL.format(
+        history=VideoHistory._meta.db_table,
+        video=Video._meta.db_table,
+        section=Section._meta.db_table,
+        chapter=Chapter._meta.db_table,
+        where=where,
+    )
+
+
+def _rollup(sql, ids):
+    """Runs a rollup query for some videos, chapters or courses.
+
+    Args:
+        sql (str): Rollup query
+        ids (list): Ids of the videos, chapters or courses
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {"ids": ids, "completion": COMPLETION_FRACTION})
+
+
+def rollup_video_engagement(full=False):
+    """Recomputes the engagement rollups of the videos with views modified since the
+    last rollup, and of their chapters and courses.
+
+    Only the views of the affected videos, chapters and courses are read. Runs
+    are serialized by a lock on the watermark row.
+
+    Args:
+        full (bool): Whether to recompute the rollups of all the videos
+
+    Returns:
+        The number of rolled up videos.
+    """
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+            name=VIDEO_ENGAGEMENT_WATERMARK
+        )
+        now = timezone.now()
+        views = VideoHistory.objects.all()
+        if full:
+            for model in [VideoEngagement, ChapterEngagement, CourseEngagement]:
+                model.objects.all().delete()
+        elif watermark.watermark is not None:
+            # Served by the index on `modified_on`
+            views = views.filter(modified_on__gt=watermark.watermark - ROLLUP_OVERLAP)
+        video_ids = list(views.values_list("video", flat=True).distinct())
+
+        if video_ids:
+            chapters = (
+                Chapter.objects.filter(
+                    Q(video__id__in=video_ids) | Q(section__video__id__in=video_ids)
+                )
+                .values_list("id", "course")
+                .distinct()
+            )
+            chapter_ids, course_ids = set(), set()
+            for chapter_id, course_id in chapters:
+                chapter_ids.add(chapter_id)
+                course_ids.add(course_id)
+
+            buckets = ", ".join(
+                "COUNT(*) FILTER (WHERE LEAST(width_bucket(fraction, 0, 1, {0}), {0}) "
+                "= {1})".format(COMPLETION_BUCKETS, bucket)
+                for bucket in range(1, COMPLETION_BUCKETS + 1)
+            )
+            _rollup(
+                VIDEO_ENGAGEMENT_SQL.format(
+                    views=_get_views_sql("h.video_id = ANY(%(ids)s)"),
+                    table=VideoEngagement._meta.db_table,
+                    buckets=buckets,
+                ),
+                video_ids,
+            )
+            for model, column, where, ids in [
+                (ChapterEngagement, "chapter_id", "ch.id", chapter_ids),
+                (CourseEngagement, "course_id", "ch.course_id", course_ids),
+            ]:
+                _rollup(
+                    GROUP_ENGAGEMENT_SQL.format(
+                        views=_get_views_sql("{} = ANY(%(ids)s)".format(where)),
+                        table=model._meta.db_table,
+                        column=column,
+                    ),
+                    list(ids),
+                )
+
+        watermark.watermark = now
+        watermark.save(update_fields=["watermark"])
+    return len(video_ids)
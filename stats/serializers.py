@@ -0,0 +1,39 @@
+from rest_framework import serializers
+
+from .models import (
+    ChapterEngagement,
+    CourseEngagement,
+    QuestionAnalytics,
+    QuizAnalytics,
+    VideoEngagement,
+)
+
+
+class VideoEngagementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VideoEngagement
+        fields = "__all__"
+
+
+class ChapterEngagementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChapterEngagement
+        fields = "__all__"
+
+
+class CourseEngagementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CourseEngagement
+        fields = "__all__"
+
+
+class QuizAnalyticsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuizAnalytics
+        fields = "__all__"
+
+
+class QuestionAnalyticsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuestionAnalytics
+        exclude = ["id", "quiz"]
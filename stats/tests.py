@@ -0,0 +1,330 @@
+import datetime
+import io
+
+import numpy as np
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from course.models import CourseHistory
+from quiz.models import (
+    FixedAnswerQuestionHistory,
+    MultipleCorrectQuestionHistory,
+    SingleCorrectQuestionHistory,
+)
+from registration.models import User
+from stats.models import (
+    ChapterEngagement,
+    CourseEngagement,
+    QuestionAnalytics,
+    QuizAnalytics,
+    VideoEngagement,
+)
+from stats.rollups import rollup_video_engagement
+from utils import credentials
+from video.models import VideoHistory
+from video.progress import upsert_video_progress
+
+
+ins_cred = credentials.TEST_INSTRUCTOR_CREDENTIALS
+ta_cred = credentials.TEST_TA_CREDENTIALS
+stu_cred = credentials.TEST_STUDENT_CREDENTIALS
+
+
+class EngagementViewSetTest(APITestCase):
+    """Test for `EngagementViewSet`."""
+
+    fixtures = [
+        "users.test.yaml",
+        "departments.test.yaml",
+        "colleges.test.yaml",
+        "courses.test.yaml",
+        "coursehistories.test.yaml",
+        "chapters.test.yaml",
+        "sections.test.yaml",
+        "videos.test.yaml",
+        "videohistories.test.yaml",
+    ]
+
+    def setUp(self):
+        # Video 2 (section 1 of chapter 1) watched completely, video 4 (course 3)
+        # half watched
+        VideoHistory.objects.create(
+            video_id=2, user_id=3, video_watched_duration=datetime.timedelta(hours=10)
+        )
+        VideoHistory.objects.create(
+            video_id=4, user_id=1, video_watched_duration=datetime.timedelta(hours=5)
+        )
+
+    def login(self, email, password):
+        self.client.login(email=email, password=password)
+
+    def logout(self):
+        self.client.logout()
+
+    def test_rollup_video_engagement(self):
+        """Test: incremental rollups of the video engagement."""
+        self.assertEqual(rollup_video_engagement(), 3)
+
+        engagement = VideoEngagement.objects.get(video=1)
+        self.assertEqual(engagement.viewers, 3)
+        self.assertEqual(engagement.completions, 0)
+        self.assertAlmostEqual(engagement.median_watched_fraction, 1 / 60)
+        self.assertEqual(engagement.completion_buckets, [3] + [0] * 9)
+        self.assertEqual(
+            engagement.total_watched_duration, datetime.timedelta(minutes=30)
+        )
+        engagement = VideoEngagement.objects.get(video=2)
+        self.assertEqual(engagement.completion_buckets, [0] * 9 + [1])
+
+        engagement = ChapterEngagement.objects.get(chapter=1)
+        self.assertEqual(
+            (engagement.videos, engagement.viewers, engagement.views), (2, 3, 4)
+        )
+        self.assertEqual(engagement.completions, 1)
+        self.assertAlmostEqual(engagement.average_watched_fraction, (3 / 60 + 1) / 4)
+        engagement = CourseEngagement.objects.get(course=3)
+        self.assertEqual((engagement.videos, engagement.viewers), (1, 1))
+        self.assertAlmostEqual(engagement.average_watched_fraction, 0.5)
+
+        # Only the views modified since the watermark are rolled up
+        VideoHistory.objects.update(
+            modified_on=timezone.now() - datetime.timedelta(days=1)
+        )
+        upsert_video_progress({(1, 1): (datetime.timedelta(hours=10), b"")})
+        VideoHistory.objects.filter(video=4).update(
+            video_watched_duration=datetime.timedelta(hours=10)
+        )
+        self.assertEqual(rollup_video_engagement(), 1)
+        self.assertEqual(VideoEngagement.objects.get(video=1).completions, 1)
+        self.assertEqual(ChapterEngagement.objects.get(chapter=1).completions, 2)
+        self.assertEqual(CourseEngagement.objects.get(course=3).completions, 0)
+
+        # Full rollup
+        call_command("rollup_video_engagement", full=True, stdout=io.StringIO())
+        self.assertEqual(CourseEngagement.objects.get(course=3).completions, 1)
+
+    def test_retrieve_engagement(self):
+        """Test: retrieve the engagement of a video, chapter and course."""
+        rollup_video_engagement()
+
+        self.login(**ins_cred)
+        url = reverse("stats:engagement-retrieve-video-engagement", args=[1])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["viewers"], 3)
+
+        url = reverse("stats:engagement-retrieve-chapter-engagement", args=[1])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["views"], 4)
+        self.assertEqual(
+            [engagement["video"] for engagement in response.data["videos_engagement"]],
+            [1, 2],
+        )
+
+        url = reverse("stats:engagement-retrieve-course-engagement", args=[1])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["viewers"], 3)
+        self.assertEqual(
+            [
+                engagement["chapter"]
+                for engagement in response.data["chapters_engagement"]
+            ],
+            [1],
+        )
+
+        # Not watched yet
+        url = reverse("stats:engagement-retrieve-video-engagement", args=[3])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["viewers"], 0)
+        self.assertEqual(response.data["completion_buckets"], [0] * 10)
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTA` permission class
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # `HTTP_403_FORBIDDEN` due to `_is_instructor_or_ta()` method
+        self.login(**stu_cred)
+        url = reverse("stats:engagement-retrieve-course-engagement", args=[1])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.logout()
+
+        # `HTTP_404_NOT_FOUND` due to the video not existing
+        self.login(**ins_cred)
+        url = reverse("stats:engagement-retrieve-video-engagement", args=[99])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.logout()
+
+
+class QuizAnalyticsViewSetTest(APITestCase):
+    """Test for `QuizAnalyticsViewSet`."""
+
+    fixtures = [
+        "users.test.yaml",
+        "departments.test.yaml",
+        "colleges.test.yaml",
+        "courses.test.yaml",
+        "coursehistories.test.yaml",
+        "chapters.test.yaml",
+        "sections.test.yaml",
+        "quiz.test.yaml",
+        "questionmodule.test.yaml",
+        "singlecorrectquestion.test.yaml",
+        "multiplecorrectquestion.test.yaml",
+        "fixedanswerquestion.test.yaml",
+    ]
+
+    def setUp(self):
+        # Students (the student of the fixtures and 3 more) in course 1
+        students = [3]
+        for i in range(3):
+            user = User.objects.create(email="quiz.student{}@bodhitree.com".format(i))
+            CourseHistory.objects.create(user=user, course_id=1, role="S", status="E")
+            students.append(user.id)
+
+        # Answers to the questions of quiz 1 (the instructor's are not analyzed)
+        for question_id, user_id, option_selected in [
+            (1, students[0], 2),
+            (1, students[1], 2),
+            (1, students[2], 1),
+            (1, students[3], 3),
+            (1, 1, 2),
+        ]:
+            SingleCorrectQuestionHistory.objects.create(
+                question_id=question_id,
+                user_id=user_id,
+                option_selected=option_selected,
+            )
+        for question_id, user_id, options_selected in [
+            (1, students[0], [2]),
+            (1, students[1], [1, 2]),
+            (1, students[2], [2]),
+        ]:
+            MultipleCorrectQuestionHistory.objects.create(
+                question_id=question_id,
+                user_id=user_id,
+                options_selected=options_selected,
+            )
+        for question_id, user_id, answer_submitted in [
+            (1, students[0], " Answer-I"),
+            (1, students[3], "x"),
+        ]:
+            FixedAnswerQuestionHistory.objects.create(
+                question_id=question_id,
+                user_id=user_id,
+                answer_submitted=answer_submitted,
+            )
+
+    def login(self, email, password):
+        self.client.login(email=email, password=password)
+
+    def logout(self):
+        self.client.logout()
+
+    def test_analyze_quizzes(self):
+        """Test: compute the item analysis of the quizzes."""
+        out = io.StringIO()
+        call_command("analyze_quizzes", stdout=out)
+        self.assertIn("Analyzed 2 quizzes.", out.getvalue())
+
+        analytics = QuizAnalytics.objects.get(quiz=1)
+        # Scores of the students: 3, 1, 1, 0
+        self.assertEqual(analytics.students, 4)
+        self.assertAlmostEqual(analytics.mean_score, 1.25)
+        questions = {
+            (question.question_type, question.question_id): question
+            for question in QuestionAnalytics.objects.filter(quiz=1)
+        }
+        self.assertEqual(len(questions), 6)
+
+        question = questions["single_correct", 1]
+        self.assertEqual(question.respondents, 4)
+        self.assertAlmostEqual(question.difficulty_index, 0.5)
+        # Upper and lower groups of one student (27% of 4)
+        self.assertAlmostEqual(question.discrimination_index, 1)
+        self.assertAlmostEqual(
+            question.point_biserial, np.corrcoef([1, 1, 0, 0], [3, 1, 1, 0])[0, 1]
+        )
+        self.assertEqual(question.option_distribution, {"1": 1, "2": 2, "3": 1})
+
+        question = questions["multiple_correct", 1]
+        self.assertEqual(question.respondents, 3)
+        self.assertAlmostEqual(question.difficulty_index, 0.5)
+        self.assertEqual(question.option_distribution, {"1": 1, "2": 3})
+
+        question = questions["fixed_answer", 1]
+        self.assertEqual(question.respondents, 2)
+        self.assertAlmostEqual(question.difficulty_index, 0.25)
+        self.assertEqual(question.option_distribution, {"answer-i": 1, "x": 1})
+
+        # Unanswered question
+        question = questions["single_correct", 2]
+        self.assertEqual(
+            (question.respondents, question.difficulty_index, question.point_biserial),
+            (0, 0, None),
+        )
+
+        # Quiz without answers
+        self.assertEqual(QuizAnalytics.objects.get(quiz=2).students, 0)
+
+        out = io.StringIO()
+        call_command("analyze_quizzes", "--full", stdout=out)
+        self.assertIn("Analyzed 2 quizzes.", out.getvalue())
+        self.assertEqual(QuestionAnalytics.objects.filter(quiz=1).count(), 6)
+
+    def test_retrieve_quiz_analytics(self):
+        """Test: retrieve the item analysis of a quiz."""
+        url = reverse("stats:quiz-analytics-retrieve-quiz-analytics", args=[1])
+
+        # Not analyzed yet
+        self.login(**ins_cred)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (response.data["students"], response.data["questions_analytics"]), (0, [])
+        )
+
+        call_command("analyze_quizzes", stdout=io.StringIO())
+        response = self.client.get(url)
+        self.assertEqual(response.data["students"], 4)
+        self.assertEqual(
+            [
+                (question["question_type"], question["question_id"])
+                for question in response.data["questions_analytics"]
+            ],
+            [
+                ("fixed_answer", 1),
+                ("fixed_answer", 2),
+                ("multiple_correct", 1),
+                ("multiple_correct", 2),
+                ("single_correct", 1),
+                ("single_correct", 2),
+            ],
+        )
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTA` permission class
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # `HTTP_403_FORBIDDEN` due to the student not being instructor/ta
+        self.login(**stu_cred)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.logout()
+
+        # `HTTP_404_NOT_FOUND` due to the quiz not existing
+        self.login(**ta_cred)
+        response = self.client.get(
+            reverse("stats:quiz-analytics-retrieve-quiz-analytics", args=[99])
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.logout()
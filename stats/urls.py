@@ -0,0 +1,15 @@
+from django.urls import include, path
+from rest_framework import routers
+
+from .api import EngagementViewSet, QuizAnalyticsViewSet
+
+
+app_name = "stats"
+
+router = routers.DefaultRouter()
+router.register(r"engagement", EngagementViewSet, basename="engagement")
+router.register(r"quiz_analytics", QuizAnalyticsViewSet, basename="quiz-analytics")
+
+urlpatterns = [
+    path("api/", include(router.urls)),
+]
@@ -2,8 +2,9 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.db.models import F
 
-from course.models import Course
+from course.models import Course, StorageTrackedModel
 from utils.utils import get_assignment_file_upload_path
 
 
@@ -23,7 +24,7 @@ def subjective_assignment_file_upload_path(instance, filename):
         )
 
 
-class SubjectiveAssignment(models.Model):
+class SubjectiveAssignment(StorageTrackedModel):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     name = models.CharField(max_length=settings.MAX_CHARFIELD_LENGTH)
     description = models.TextField(blank=True)
@@ -44,6 +45,10 @@ class SubjectiveAssignment(models.Model):
         null=True,
     )
 
+    storage_fields = {"question_file": "C", "helper_file": "C"}
+    storage_user = F("course__owner")
+    storage_course = F("course")
+
     def __str__(self):
         return self.name
 
@@ -60,7 +65,7 @@ class SubjectiveAssignmentTeam(models.Model):
         )
 
 
-class SubjectiveAssignmentHistory(models.Model):
+class SubjectiveAssignmentHistory(StorageTrackedModel):
     assignment = models.ForeignKey(SubjectiveAssignment, on_delete=models.CASCADE)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     instructor_feedback = models.TextField(blank=True)
@@ -76,5 +81,9 @@ class SubjectiveAssignmentHistory(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     modified_on = models.DateTimeField(auto_now=True)
 
+    storage_fields = {"submitted_file": "S"}
+    storage_user = F("user")
+    storage_course = F("assignment__course")
+
     def __str__(self):
         return "{}: {}".format(self.user.email, self.assignment.name)
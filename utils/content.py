@@ -0,0 +1,132 @@
+from collections import defaultdict
+
+from django.db.models import Q
+from django.utils.duration import duration_string
+
+from course.models import Section
+from document.models import Document
+from quiz.models import Quiz
+from video.models import Video
+
+
+# `content_sequence` and `content_list` store a content as a [content type, content
+# id] pair, where the content type is the index of the type in `CONTENT_TYPES`.
+CONTENT_TYPE_MODELS = {
+    0: Video,
+    1: Document,
+    2: Quiz,
+    3: Section,
+}
+
+
+def get_content_titles(content_lists):
+    """Gets the titles of the contents in the given content lists.
+
+    The titles are fetched with one query per content type, irrespective of the
+    number of contents.
+
+    Args:
+        content_lists (iterable): Content lists (lists of [content type, content
+            id] pairs)
+
+    Returns:
+        A dict mapping (content type, content id) to the content title. Contents
+        which do not exist are not present in the dict.
+    """
+    content_ids = defaultdict(set)
+    for content_list in content_lists:
+        for content_type, content_id in content_list or []:
+            content_ids[content_type].add(content_id)
+
+    content_titles = {}
+    for content_type, ids in content_ids.items():
+        model = CONTENT_TYPE_MODELS.get(content_type)
+        if model is None:
+            continue
+        for content_id, title in model.objects.filter(id__in=ids).values_list(
+            "id", "title"
+        ):
+            content_titles[(content_type, content_id)] = title
+    return content_titles
+
+
+# Columns of the contents listed by `get_chapter_contents()`
+CONTENT_TYPE_FIELDS = {
+    0: ["id", "title", "description", "video_duration", "chapter", "section"],
+    1: ["id", "title", "description", "chapter", "section"],
+    2: ["id", "title", "description", "chapter", "section"],
+}
+
+
+def _order_contents(content_sequence, contents):
+    """Orders contents by a content sequence.
+
+    Args:
+        content_sequence (list): [content type, content id] pairs
+        contents (dict): Content data by (content type, content id)
+
+    Returns:
+        A list of content data in the order of the sequence, followed by the
+        contents missing from the sequence (by content type and id).
+    """
+    ordered = []
+    for content_type, content_id in content_sequence or []:
+        content = contents.pop((content_type, content_id), None)
+        if content is not None:
+            ordered.append(content)
+    ordered.extend(contents[key] for key in sorted(contents))
+    return ordered
+
+
+def get_chapter_contents(chapter):
+    """Gets the contents of a chapter and of its sections.
+
+    The contents are fetched with one query per content type (restricted to the
+    columns in `CONTENT_TYPE_FIELDS`), irrespective of the number of sections and
+    contents.
+
+    Args:
+        chapter (Chapter): `Chapter` model object
+
+    Returns:
+        A list of content data in the order of the chapter's `content_sequence`,
+        where a section has its own contents in the order of its
+        `content_sequence`.
+    """
+    chapter_contents = {}
+    section_contents = defaultdict(dict)
+    sections = Section.objects.filter(chapter=chapter).values(
+        "id", "title", "description", "content_sequence"
+    )
+    for section in sections:
+        chapter_contents[(3, section["id"])] = {
+            "content_type": 3,
+            "id": section["id"],
+            "title": section["title"],
+            "description": section["description"],
+            "content_sequence": section["content_sequence"],
+        }
+
+    for content_type, fields in CONTENT_TYPE_FIELDS.items():
+        model = CONTENT_TYPE_MODELS[content_type]
+        contents = model.objects.filter(
+            Q(chapter=chapter) | Q(section__chapter=chapter)
+        ).values(*fields)
+        for content in contents:
+            section_id = content.pop("section")
+            content.pop("chapter")
+            if "video_duration" in content:
+                content["video_duration"] = duration_string(content["video_duration"])
+            key = (content_type, content["id"])
+            data = {"content_type": content_type, **content}
+            if section_id is None:
+                chapter_contents[key] = data
+            else:
+                section_contents[section_id][key] = data
+
+    for key, section in chapter_contents.items():
+        if key[0] == 3:
+            section["contents"] = _order_contents(
+                section.pop("content_sequence"), section_contents[section["id"]]
+            )
+    return _order_contents(chapter.content_sequence, chapter_contents)
@@ -0,0 +1,244 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+
+from .storage import get_file_digest
+
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+CONTENT_ETAG_CACHE_KEY = "media:etag:{}:{}:{}:{}"
+
+CONTENT_ETAG_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised if the requested byte range does not overlap the file."""
+
+
+class FileRange:
+    """A file-like object limited to a byte range of a file.
+
+    It exposes the file descriptor (positioned at the start of the range) so that
+    WSGI servers can send the range with `os.sendfile()` through
+    `wsgi.file_wrapper`, bounded by the `Content-Length` of the response.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def get_etag(stat):
+    """Gets a (strong) ETag of a file.
+
+    Args:
+        stat (os.stat_result): Status of the file
+
+    Returns:
+        The ETag.
+    """
+    return '"{:x}-{:x}"'.format(stat.st_mtime_ns, stat.st_size)
+
+
+def get_byte_range(range_header, size):
+    """Gets the byte range requested by a `Range` header.
+
+    Only a single range is supported, other requests are served the whole file.
+
+    Args:
+        range_header (str): `Range` header
+        size (int): File size
+
+    Returns:
+        (first byte, last byte) of the range or None to serve the whole file.
+
+    Raises:
+        RangeNotSatisfiable: Raised if the range does not overlap the file
+    """
+    match = RANGE_RE.match(range_header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last `last` bytes
+        if int(last) == 0:
+            raise RangeNotSatisfiable
+        return max(size - int(last), 0), size - 1
+
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first > last:
+        if first >= size:
+            raise RangeNotSatisfiable
+        return None
+    return first, last
+
+
+def _if_range_matches(request, etag, last_modified):
+    """Checks if the validator in the `If-Range` header matches the file.
+
+    Args:
+        request (Request): DRF `Request` object
+        etag (str): ETag of the file
+        last_modified (int): Last modification time of the file
+
+    Returns:
+        A bool value representing whether a range of the file may be served.
+    """
+    if_range = request.headers.get("If-Range")
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', "W/")):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def get_content_etag(file_field):
+    """Gets a (strong) ETag of a file from the SHA-256 digest of its content.
+
+    The digest is cached by the inode, modification time and size of the file,
+    so it is computed once per version of the content (and once for all the
+    names of a deduplicated content).
+
+    Args:
+        file_field (FieldFile): File of a `FileField`
+
+    Returns:
+        The ETag.
+
+    Raises:
+        OSError: Raised if the file can not be read
+    """
+    path = file_field.path
+    stat = os.stat(path)
+    key = CONTENT_ETAG_CACHE_KEY.format(
+        stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size
+    )
+    etag = cache.get(key)
+    if etag is None:
+        etag = '"{}"'.format(get_file_digest(path))
+        cache.set(key, etag, CONTENT_ETAG_CACHE_TIMEOUT)
+    return etag
+
+
+def serve_media_file(
+    request, file_field, as_attachment=False, etag=None, last_modified=None
+):
+    """Serves a media file after the permission checks have passed.
+
+    Conditional requests are answered by django. Otherwise, with
+    `MEDIA_SENDFILE_BACKEND` set, the file is served by the web server
+    (`X-Accel-Redirect` or `X-Sendfile`), or else by django with support for a
+    single byte range, without reading the file into memory.
+
+    Args:
+        request (Request): DRF `Request` object
+        file_field (FieldFile): File of a `FileField`
+        as_attachment (bool): Whether the file is downloaded instead of shown
+        etag (str): ETag of the file, by default from its modification time and
+            size
+        last_modified (int): Last modification time (timestamp) of the file, by
+            default from the file system
+
+    Returns:
+        `HttpResponse` with status HTTP_200_OK, HTTP_206_PARTIAL_CONTENT,
+        HTTP_304_NOT_MODIFIED, HTTP_412_PRECONDITION_FAILED or
+        HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE.
+
+    Raises:
+        OSError: Raised if the file can not be read
+    """
+    path = file_field.path
+    filename = os.path.basename(path)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    stat = os.stat(path)
+    if etag is None:
+        etag = get_etag(stat)
+    if last_modified is None:
+        last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        response["ETag"] = etag
+        patch_cache_control(response, private=True)
+        return response
+
+    if settings.MEDIA_SENDFILE_BACKEND:
+        response = HttpResponse(content_type=content_type)
+        if settings.MEDIA_SENDFILE_BACKEND == "x-accel-redirect":
+            response[
+                "X-Accel-Redirect"
+            ] = settings.MEDIA_ACCEL_REDIRECT_LOCATION + quote(file_field.name)
+        else:
+            response["X-Sendfile"] = path
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True)
+        return response
+
+    size = stat.st_size
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = get_byte_range(range_header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(
+                status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+            )
+            response["Content-Range"] = "bytes */{}".format(size)
+            return response
+
+    file = open(path, "rb")
+    if byte_range is None:
+        response = FileResponse(
+            file,
+            content_type=content_type,
+            as_attachment=as_attachment,
+            filename=filename,
+        )
+        response["Content-Length"] = size
+    else:
+        first, last = byte_range
+        response = FileResponse(
+            FileRange(file, first, last - first + 1),
+            status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type=content_type,
+            as_attachment=as_attachment,
+            filename=filename,
+        )
+        response["Content-Length"] = last - first + 1
+        response["Content-Range"] = "bytes {}-{}/{}".format(first, last, size)
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, private=True)
+    return response
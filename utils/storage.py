@@ -0,0 +1,233 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+# Directories of `MEDIA_ROOT` holding the blobs and the in-progress uploads, which
+# are not logical file names
+BLOB_DIR = ".blobs"
+UPLOAD_STAGING_DIR = ".uploads"
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def get_blob_name(digest):
+    """Gets the name of a blob, sharded by the first bytes of its digest.
+
+    Args:
+        digest (str): SHA-256 hex digest of the blob
+
+    Returns:
+        The blob name, e.g. ".blobs/ab/cd/abcd...".
+    """
+    return os.path.join(BLOB_DIR, digest[:2], digest[2:4], digest)
+
+
+def get_file_digest(path):
+    """Gets the SHA-256 hex digest of a file.
+
+    Args:
+        path (str): Path of the file
+
+    Returns:
+        The hex digest.
+    """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def get_upload_staging_storage():
+    """Gets the storage of in-progress uploads, which are written in place.
+
+    Returns:
+        A `FileSystemStorage` object.
+    """
+    return FileSystemStorage(
+        location=os.path.join(settings.MEDIA_ROOT, UPLOAD_STAGING_DIR)
+    )
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage which stores every distinct content only once.
+
+    The content of a file is stored once as a blob named by its SHA-256 digest
+    (`BLOB_DIR/ab/cd/abcd...`), and the logical name of the file (as returned by
+    the `upload_to` of its field) is a hard link to the blob. The link count of a
+    blob is its reference count, so duplicate uploads cost no disk space and
+    copying a file (e.g. into a cloned course) only adds a link. As logical names
+    are regular paths of `MEDIA_ROOT`, files can still be opened, memory mapped
+    and served by the web server by their path.
+
+    Logical files must never be written in place since the blob is shared. Blobs
+    left with a single link once their files are deleted are removed by the
+    `deduplicate_media_files` management command.
+    """
+
+    def _save(self, name, content):
+        """Stores the content in its blob and links the name to the blob.
+
+        Args:
+            name (str): Available logical name of the file
+            content (File): Content of the file
+
+        Returns:
+            The logical name of the file (which may differ from `name` if the
+            name was taken in the meantime).
+        """
+        temp_dir = self.path(os.path.join(BLOB_DIR, "tmp"))
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            sha256 = hashlib.sha256()
+            with os.fdopen(fd, "wb") as f:
+                for chunk in content.chunks():
+                    sha256.update(chunk)
+                    f.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            self._store_blob(temp_path, sha256.hexdigest())
+            return self._link_blob(temp_path, name)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _store_blob(self, path, digest):
+        """Links a file as the blob of its content unless the blob exists.
+
+        Args:
+            path (str): Path of the file, which is replaced by a link to the
+                existing blob if there is one
+            digest (str): SHA-256 hex digest of the file
+
+        Returns:
+            A bool value representing whether the blob existed.
+        """
+        blob_path = self.path(get_blob_name(digest))
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        temp_path = "{}.link".format(path)
+        while True:
+            try:
+                os.link(path, blob_path)
+                return False
+            except FileExistsError:
+                pass
+            try:
+                # Links the file name to the existing blob atomically
+                os.link(blob_path, temp_path)
+            except FileNotFoundError:
+                # The blob was collected in the meantime
+                continue
+            os.replace(temp_path, path)
+            return True
+
+    def _link_blob(self, path, name):
+        """Links a logical name to the inode of a blob.
+
+        Args:
+            path (str): Path of the blob or of a link to it
+            name (str): Available logical name of the file
+
+        Returns:
+            The logical name of the file.
+        """
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        while True:
+            try:
+                os.link(path, full_path)
+                break
+            except FileExistsError:
+                # The name was taken after `get_available_name()`
+                name = self.get_available_name(name)
+                full_path = self.path(name)
+        return name.replace("\\", "/")
+
+    def deduplicate(self, name):
+        """Replaces a file which is not linked to a blob by a link to its blob.
+
+        Args:
+            name (str): Logical name of the file
+
+        Returns:
+            A bool value representing whether the content had a blob already
+            (so the disk space of the file was reclaimed).
+        """
+        path = self.path(name)
+        if os.stat(path).st_nlink > 1:
+            return False
+        return self._store_blob(path, get_file_digest(path))
+
+    def copy(self, name, new_name):
+        """Copies a file without copying its content.
+
+        Args:
+            name (str): Logical name of the file
+            new_name (str): Logical name of the copy
+
+        Returns:
+            The logical name of the copy.
+        """
+        return self._link_blob(self.path(name), self.get_available_name(new_name))
+
+    def move(self, path, name):
+        """Moves a local file into the storage.
+
+        Args:
+            path (str): Path of the file, e.g. a completed upload
+            name (str): Logical name of the file
+
+        Returns:
+            The logical name of the file.
+        """
+        temp_dir = self.path(os.path.join(BLOB_DIR, "tmp"))
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        os.close(fd)
+        file_move_safe(path, temp_path, allow_overwrite=True)
+        try:
+            self._store_blob(temp_path, get_file_digest(temp_path))
+            return self._link_blob(temp_path, self.get_available_name(name))
+        finally:
+            os.remove(temp_path)
+
+    def move_out(self, name, path):
+        """Moves a file of the storage to a local path, e.g. back to its upload.
+
+        The content is copied, as the local file may be written in place.
+
+        Args:
+            name (str): Logical name of the file
+            path (str): Path of the local file
+        """
+        shutil.copyfile(self.path(name), path)
+        self.delete(name)
+
+    def collect_blobs(self):
+        """Deletes the blobs which are no longer referenced by any file.
+
+        Returns:
+            The number of bytes freed.
+        """
+        freed = 0
+        blob_root = self.path(BLOB_DIR)
+        for dir_path, dir_names, file_names in os.walk(blob_root):
+            if dir_path == blob_root and "tmp" in dir_names:
+                # Files being saved
+                dir_names.remove("tmp")
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                stat = os.stat(path)
+                if stat.st_nlink == 1:
+                    os.remove(path)
+                    freed += stat.st_size
+        return freed
@@ -1,14 +1,22 @@
 import logging
 
 from dateutil.relativedelta import relativedelta
+from django.db.models import Sum
 from django.utils import timezone
 
-from course.models import Course
+from course.models import Course, StorageUsage
 from registration.models import SubscriptionHistory
 
 
 logger = logging.getLogger(__name__)
 
+UNIT_SIZES = {
+    "KB": 1024,
+    "MB": 1024 ** 2,
+    "GB": 1024 ** 3,
+    "TB": 1024 ** 4,
+}
+
 
 class SubscriptionView:
     """View for various checks of a user subscription"""
@@ -83,3 +91,58 @@ class SubscriptionView:
         ):
             return False
         return True
+
+    @classmethod
+    def _get_subscription(cls, user):
+        """Gets the subscription of a user.
+
+        Args:
+            user (User): `User` model intstance
+
+        Returns:
+            `Subscription` model instance.
+
+        Raises:
+            SubscriptionHistory.DoesNotExist: Raised if subscription history does not
+                exist for a user.
+        """
+        try:
+            subscription_history = SubscriptionHistory.objects.select_related(
+                "subscription"
+            ).get(user=user)
+        except SubscriptionHistory.DoesNotExist as e:
+            logger.exception(e)
+            raise
+        return subscription_history.subscription
+
+    @classmethod
+    def is_video_storage_limit_reached(cls, user, size):
+        """Checks if a video would exceed the subscription video limits of a user.
+
+        Args:
+            user (User): `User` model intstance (owner of the course of the video)
+            size (int): Size of the video file (in bytes)
+
+        Returns:
+            A bool value denoting if the video is larger than the per video limit or
+            would exceed the total video limit of the user.
+
+        Raises:
+            SubscriptionHistory.DoesNotExist: Raised if subscription history does not
+                exist for a user.
+        """
+        subscription = cls._get_subscription(user)
+        per_video_limit = (
+            subscription.per_video_limit * UNIT_SIZES[subscription.per_video_limit_unit]
+        )
+        if size > per_video_limit:
+            return True
+
+        total_video_limit = (
+            subscription.total_video_limit
+            * UNIT_SIZES[subscription.total_video_limit_unit]
+        )
+        used = StorageUsage.objects.filter(user=user, category="V").aggregate(
+            used=Sum("size")
+        )["used"]
+        return (used or 0) + size > total_video_limit
@@ -0,0 +1,119 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from utils.storage import BLOB_DIR, ContentAddressedStorage, get_blob_name
+
+
+class TestContentAddressedStorage(TestCase):
+    """Test for `ContentAddressedStorage` class"""
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    def _count_blobs(self):
+        """Counts the blobs of the storage.
+
+        Returns:
+            The number of blobs.
+        """
+        blob_root = os.path.join(self.location, BLOB_DIR)
+        return sum(
+            len(file_names)
+            for dir_path, _, file_names in os.walk(blob_root)
+            if not dir_path.startswith(os.path.join(blob_root, "tmp"))
+        )
+
+    def test_save_duplicates(self):
+        """Test for `save()` method with duplicate contents"""
+        name1 = self.storage.save("1.course/doc.pdf", ContentFile(b"content"))
+        name2 = self.storage.save("2.course/doc.pdf", ContentFile(b"content"))
+        name3 = self.storage.save("2.course/doc.pdf", ContentFile(b"other"))
+        self.assertEqual(name1, "1.course/doc.pdf")
+        self.assertEqual(name2, "2.course/doc.pdf")
+        self.assertNotEqual(name3, name2)
+
+        with self.storage.open(name2) as f:
+            self.assertEqual(f.read(), b"content")
+        with self.storage.open(name3) as f:
+            self.assertEqual(f.read(), b"other")
+        # Both files and the blob share the inode
+        self.assertTrue(
+            os.path.samefile(self.storage.path(name1), self.storage.path(name2))
+        )
+        self.assertEqual(os.stat(self.storage.path(name1)).st_nlink, 3)
+        self.assertEqual(self._count_blobs(), 2)
+
+    def test_copy(self):
+        """Test for `copy()` method"""
+        name = self.storage.save("1.course/doc.pdf", ContentFile(b"content"))
+        copy_name = self.storage.copy(name, "2.course/doc.pdf")
+        self.assertTrue(
+            os.path.samefile(self.storage.path(name), self.storage.path(copy_name))
+        )
+        self.assertEqual(self._count_blobs(), 1)
+
+    def test_move(self):
+        """Test for `move()` method"""
+        name = self.storage.save("1.course/video.mp4", ContentFile(b"video"))
+        path = os.path.join(self.location, "upload")
+        with open(path, "wb") as f:
+            f.write(b"video")
+
+        moved_name = self.storage.move(path, "2.course/video.mp4")
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(
+            os.path.samefile(self.storage.path(name), self.storage.path(moved_name))
+        )
+        self.assertEqual(self._count_blobs(), 1)
+
+    def test_delete_and_collect_blobs(self):
+        """Test for `delete()` and `collect_blobs()` methods"""
+        name1 = self.storage.save("1.course/doc.pdf", ContentFile(b"content"))
+        name2 = self.storage.save("2.course/doc.pdf", ContentFile(b"content"))
+
+        self.storage.delete(name1)
+        self.assertEqual(self.storage.collect_blobs(), 0)
+        with self.storage.open(name2) as f:
+            self.assertEqual(f.read(), b"content")
+
+        self.storage.delete(name2)
+        self.assertEqual(self.storage.collect_blobs(), len(b"content"))
+        self.assertEqual(self._count_blobs(), 0)
+
+    def test_deduplicate_media_files(self):
+        """Test for `deduplicate_media_files` management command"""
+        for name in ["1.course/doc.pdf", "2.course/doc.pdf"]:
+            path = os.path.join(self.location, name)
+            os.makedirs(os.path.dirname(path))
+            with open(path, "wb") as f:
+                f.write(b"content")
+        self.storage.save("3.course/unused.pdf", ContentFile(b"unused"))
+        self.storage.delete("3.course/unused.pdf")
+
+        with override_settings(MEDIA_ROOT=self.location):
+            call_command("deduplicate_media_files", stdout=io.StringIO())
+
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.location, "1.course/doc.pdf"),
+                os.path.join(self.location, "2.course/doc.pdf"),
+            )
+        )
+        blob_path = os.path.join(
+            self.location,
+            get_blob_name(
+                "ed7002b439e9ac845f22357d822bac1444730fbdb6016d3ec9432297b9ec9f73"
+            ),
+        )
+        self.assertEqual(os.stat(blob_path).st_nlink, 3)
+        self.assertEqual(self._count_blobs(), 1)
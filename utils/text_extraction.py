@@ -0,0 +1,89 @@
+"""Extraction of the text of uploaded files, for the search index.
+
+The functions do not use django, so that they can run in worker processes.
+"""
+import logging
+import os
+from html.parser import HTMLParser
+
+import markdown
+from pypdf import PdfReader
+
+
+logger = logging.getLogger(__name__)
+
+# Longer texts are truncated (a `tsvector` must be smaller than 1 MB)
+MAX_EXTRACTED_TEXT_LENGTH = 200000
+
+
+class _HTMLTextParser(HTMLParser):
+    """Collects the text of an HTML document, without its scripts and styles."""
+
+    SKIPPED_TAGS = {"script", "style", "head"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skipped = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skipped += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skipped:
+            self._skipped -= 1
+
+    def handle_data(self, data):
+        if not self._skipped:
+            self.parts.append(data)
+
+
+def _read_text(path):
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8", errors="replace")
+
+
+def _extract_html_text(html):
+    parser = _HTMLTextParser()
+    parser.feed(html)
+    parser.close()
+    return " ".join(parser.parts)
+
+
+def _extract_pdf_text(path):
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+TEXT_EXTRACTORS = {
+    ".txt": _read_text,
+    ".md": lambda path: _extract_html_text(markdown.markdown(_read_text(path))),
+    ".markdown": lambda path: _extract_html_text(markdown.markdown(_read_text(path))),
+    ".html": lambda path: _extract_html_text(_read_text(path)),
+    ".htm": lambda path: _extract_html_text(_read_text(path)),
+    ".pdf": _extract_pdf_text,
+}
+
+
+def extract_text(path):
+    """Extracts the text of a plain-text, Markdown, HTML or PDF file.
+
+    Args:
+        path (str): Path of the file
+
+    Returns:
+        The text with the whitespace collapsed (empty if the file type is not
+        supported or the file is invalid, so that it is not extracted again).
+    """
+    extractor = TEXT_EXTRACTORS.get(os.path.splitext(path)[1].lower())
+    if extractor is None:
+        return ""
+    try:
+        text = extractor(path)
+    except Exception as e:
+        # The parsers raise all kinds of errors on malformed files, which must not
+        # stop the extraction of the other files
+        logger.exception("Could not extract the text of `%s`: %s", path, e)
+        return ""
+    return " ".join(text.split())[:MAX_EXTRACTED_TEXT_LENGTH]
@@ -0,0 +1,158 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+from .media import get_content_etag
+
+
+# Bounding boxes of the thumbnail sizes (the aspect ratio of the image is kept)
+THUMBNAIL_SIZES = {
+    "small": (160, 90),
+    "medium": (320, 180),
+    "large": (640, 360),
+}
+
+# Pillow format and file extension of the thumbnail formats
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+    "png": ("PNG", "png"),
+}
+
+THUMBNAIL_QUALITY = 80
+
+# Maximum number of thumbnails rendered at once (per web server worker)
+THUMBNAIL_WORKERS = 2
+
+# Seconds a request waits for its thumbnail to be rendered
+THUMBNAIL_TIMEOUT = 10
+
+# Thumbnails are stored under `MEDIA_ROOT` in this folder
+THUMBNAIL_FOLDER = "thumbnails"
+
+# Quacks like the `FieldFile` served by `serve_media_file()`
+ThumbnailFile = namedtuple("ThumbnailFile", ["name", "path"])
+
+_executor = None
+
+# Futures of the thumbnails being rendered, by path
+_pending = {}
+
+_lock = threading.Lock()
+
+
+def _render_thumbnail(source, target, size, image_format):
+    """Renders a thumbnail of an image (in a worker process of the pool).
+
+    The thumbnail is written to a temporary file which is then renamed, so that
+    a thumbnail file is always complete.
+
+    Args:
+        source (str): Path of the image
+        target (str): Path of the thumbnail
+        size (tuple): Bounding box of the thumbnail
+        image_format (str): Pillow format of the thumbnail
+    """
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size)
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, image_format, quality=THUMBNAIL_QUALITY)
+            os.replace(temp_path, target)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+def _get_executor():
+    """Gets the process pool rendering the thumbnails, creating it if needed.
+
+    Must be called with the lock held.
+
+    Returns:
+        `ProcessPoolExecutor` object.
+    """
+    global _executor
+    if _executor is None:
+        # Spawned (not forked) as the web server worker may be running threads
+        _executor = ProcessPoolExecutor(
+            max_workers=THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def _reset_executor():
+    """Replaces a broken process pool by a new one on the next use."""
+    global _executor
+    with _lock:
+        _executor = None
+
+
+def get_thumbnail(file_field, size, image_format):
+    """Gets a thumbnail of an image, rendering it on first use.
+
+    Thumbnails are stored by the SHA-256 digest of the image, size and format,
+    so a thumbnail is rendered once per content and a new image gets new
+    thumbnails. The rendering runs in a bounded pool of processes, and a
+    thumbnail requested again while being rendered is rendered once.
+
+    Args:
+        file_field (FieldFile): Image of an `ImageField`
+        size (str): Size of the thumbnail (a key of `THUMBNAIL_SIZES`)
+        image_format (str): Format of the thumbnail (a key of `THUMBNAIL_FORMATS`)
+
+    Returns:
+        (`ThumbnailFile`, digest) of the thumbnail, where digest is the SHA-256
+        digest of the image.
+
+    Raises:
+        OSError: Raised if the image can not be read or is not an image
+        PIL.Image.DecompressionBombError: Raised if the image has too many pixels
+        concurrent.futures.TimeoutError: Raised if the thumbnail is not rendered
+            within `THUMBNAIL_TIMEOUT`
+    """
+    digest = get_content_etag(file_field).strip('"')
+    width, height = THUMBNAIL_SIZES[size]
+    pillow_format, extension = THUMBNAIL_FORMATS[image_format]
+    name = os.path.join(
+        THUMBNAIL_FOLDER,
+        digest[:2],
+        "{}-{}x{}.{}".format(digest, width, height, extension),
+    )
+    thumbnail = ThumbnailFile(name, os.path.join(settings.MEDIA_ROOT, name))
+    if os.path.exists(thumbnail.path):
+        return thumbnail, digest
+
+    try:
+        with _lock:
+            future = _pending.get(thumbnail.path)
+            if future is None:
+                future = _get_executor().submit(
+                    _render_thumbnail,
+                    file_field.path,
+                    thumbnail.path,
+                    (width, height),
+                    pillow_format,
+                )
+                _pending[thumbnail.path] = future
+                future.add_done_callback(lambda _: _pending.pop(thumbnail.path, None))
+        future.result(timeout=THUMBNAIL_TIMEOUT)
+    except BrokenProcessPool:
+        # A worker died (also while idle, then the pool refuses new thumbnails),
+        # the pool is replaced for the next thumbnails
+        _reset_executor()
+        raise OSError("The thumbnail workers are not available.")
+    return thumbnail, digest
@@ -119,3 +119,14 @@ class CaseInsensitiveHeaderDictReader(DictReader):
 class CaseInsensitiveDict(dict):
     def __getitem__(self, key):
         return super(CaseInsensitiveDict, self).__getitem__(key.lower())
+
+
+class EchoBuffer:
+    """File-like object whose `write()` returns the value instead of buffering it.
+
+    Used with `csv.writer` to produce rows one at a time for a
+    `StreamingHttpResponse`.
+    """
+
+    def write(self, value):
+        return value
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import QuizMarker, SectionMarker, Video, VideoHistory
+from .models import QuizMarker, SectionMarker, Video, VideoHistory, VideoUpload
 
 
 class VideoAdmin(admin.ModelAdmin):
@@ -33,6 +33,25 @@ class VideoHistoryAdmin(admin.ModelAdmin):
     search_fields = ("user__email",)
 
 
+class VideoUploadAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "user",
+        "chapter",
+        "section",
+        "title",
+        "video_file",
+        "size",
+        "offset",
+        "created_on",
+        "modified_on",
+    )
+    search_fields = (
+        "user__email",
+        "title",
+    )
+
+
 class SectionMarkerAdmin(admin.ModelAdmin):
     list_display = (
         "id",
@@ -60,5 +79,6 @@ class QuizMarkerAdmin(admin.ModelAdmin):
 
 admin.site.register(Video, VideoAdmin)
 admin.site.register(VideoHistory, VideoHistoryAdmin)
+admin.site.register(VideoUpload, VideoUploadAdmin)
 admin.site.register(SectionMarker, SectionMarkerAdmin)
 admin.site.register(QuizMarker, QuizMarkerAdmin)
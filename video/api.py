@@ -1,17 +1,44 @@
 import logging
+import os
+import shutil
+import tempfile
+import zlib
 
-from rest_framework import viewsets
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.response import Response
 
+from course.models import CourseHistory
 from utils import mixins as custom_mixins
+from utils.media import serve_media_file
 from utils.permissions import IsInstructorOrTA
 
-from .models import Video
-from .serializers import VideoSerializer
+from .cache import build_video_timeline, get_video_timeline
+from .metadata import VideoMetadataError, read_video_metadata
+from .models import Video, VideoHistory, VideoUpload, get_course, video_upload_path
+from .progress import video_progress_buffer
+from .quiz_import import InVideoQuizImportError, import_in_video_quizzes
+from .segments import WATCHED_SEGMENT_DURATION, get_watched_heatmap, intervals_to_bitmap
+from .serializers import VideoProgressSerializer, VideoSerializer, VideoUploadSerializer
 
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of heartbeats in a single progress report
+VIDEO_PROGRESS_MAX_HEARTBEATS = 100
+
+# Maximum size of a chunk of a video upload (in bytes)
+VIDEO_UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Size of the blocks in which a chunk is copied from the request to the file
+VIDEO_UPLOAD_BLOCK_SIZE = 1024 * 1024
+
 
 class VideoViewSet(
     viewsets.GenericViewSet,
@@ -50,3 +77,565 @@ class VideoViewSet(
     @action(detail=True, methods=["DELETE"])
     def delete_video(self, request, pk):
         return self._delete(request, pk)
+
+    @action(detail=True, methods=["GET"])
+    def stream_video(self, request, pk):
+        """Serves the video file of the video with id as pk.
+
+        Supports conditional and range requests (for seeking), and hands off the
+        transfer to the web server if `MEDIA_SENDFILE_BACKEND` is set.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Video id
+
+        Returns:
+            `HttpResponse` with the video file and status HTTP_200_OK or
+            HTTP_206_PARTIAL_CONTENT (or HTTP_304_NOT_MODIFIED).
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_registered()` method
+            `HTTP_404_NOT_FOUND`: Raised if the video or its file does not exist
+            `HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE`: Raised if the range does not
+                overlap the video file
+        """
+        try:
+            video = Video.objects.select_related("chapter", "section__chapter").get(
+                id=pk
+            )
+        except Video.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        check = self._is_registered(get_course(video).id, request.user)
+        if check is not True:
+            return check
+
+        try:
+            return serve_media_file(request, video.video_file)
+        except OSError as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+    @action(detail=True, methods=["GET"])
+    def retrieve_timeline(self, request, pk):
+        """Gets the section and quiz markers of the video with id as pk.
+
+        The markers are merged and sorted by time, and every quiz marker carries
+        its quiz and question modules, so that a player needs a single request.
+        The timeline is cached and versioned by the video and its markers, and
+        the version is sent as the ETag for conditional requests.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Video id
+
+        Returns:
+            `Response` with the timeline and status HTTP_200_OK (or
+            HTTP_304_NOT_MODIFIED).
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_registered()` method
+            `HTTP_404_NOT_FOUND`: Raised if the video does not exist
+        """
+        try:
+            video = Video.objects.select_related(
+                "chapter__course", "section__chapter__course"
+            ).get(id=pk)
+        except Video.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        check = self._is_registered(get_course(video).id, request.user)
+        if check is not True:
+            return check
+
+        timeline, version = get_video_timeline(video)
+        etag = '"{}"'.format(version)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(timeline, status.HTTP_200_OK)
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @action(detail=True, methods=["GET"])
+    def retrieve_heatmap(self, request, pk):
+        """Gets the number of viewers of every segment of the video with id as pk.
+
+        Only the bitmaps of the watched segments are read, and they are counted
+        with vectorized operations (see `get_watched_heatmap()`).
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Video id
+
+        Returns:
+            `Response` with the segment duration (in seconds), the number of
+            viewers and the heatmap, and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_instructor_or_ta()` method
+            `HTTP_404_NOT_FOUND`: Raised if the video does not exist
+        """
+        try:
+            video = Video.objects.select_related(
+                "chapter__course", "section__chapter__course"
+            ).get(id=pk)
+        except Video.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        check = self._is_instructor_or_ta(get_course(video).id, request.user)
+        if check is not True:
+            return check
+
+        bitmaps = list(
+            VideoHistory.objects.filter(video=video)
+            .exclude(watched_segments=b"")
+            .values_list("watched_segments", flat=True)
+        )
+        heatmap = get_watched_heatmap(bitmaps, video.video_duration)
+        data = {
+            "segment_duration": WATCHED_SEGMENT_DURATION.total_seconds(),
+            "viewers": len(bitmaps),
+            "heatmap": heatmap.tolist(),
+        }
+        return Response(data, status.HTTP_200_OK)
+
+    @action(detail=True, methods=["POST"])
+    def import_quizzes(self, request, pk):
+        """Creates the in-video quizzes of the video with id as pk from its
+        `in_video_quiz_file` (see `video.quiz_import` for the file format).
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Video id
+
+        Returns:
+            `Response` with the timeline of the video and status HTTP_201_CREATED.
+
+        Raises:
+            `HTTP_400_BAD_REQUEST`: Raised if the video has no in-video quiz file or
+                the file is invalid (with all the errors found)
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_instructor_or_ta()` method
+            `HTTP_404_NOT_FOUND`: Raised if the video does not exist
+        """
+        try:
+            video = Video.objects.select_related(
+                "chapter__course", "section__chapter__course"
+            ).get(id=pk)
+        except Video.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        check = self._is_instructor_or_ta(get_course(video).id, request.user)
+        if check is not True:
+            return check
+
+        if not video.in_video_quiz_file:
+            error = "The video has no in-video quiz file."
+            logger.error(error)
+            return Response(error, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            import_in_video_quizzes(video)
+        except InVideoQuizImportError as e:
+            logger.error(e.errors)
+            return Response(e.errors, status.HTTP_400_BAD_REQUEST)
+        except IntegrityError as e:
+            # Markers created concurrently at the same times
+            logger.exception(e)
+            return Response(str(e), status.HTTP_400_BAD_REQUEST)
+
+        return Response(build_video_timeline(video.id), status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["POST"])
+    def report_progress(self, request):
+        """Records a batch of watch progress heartbeats of the user.
+
+        The progress is buffered by the worker and written in bulk (see
+        `VideoProgressBuffer`), so it is not visible right away.
+
+        Request data:
+            progress (list): Heartbeats, each with `video` (video id),
+                `watched_duration` (seconds or "[DD] [HH:[MM:]]ss[.uuuuuu]") and
+                optionally `watched_intervals` (intervals of the video played
+                since the previous heartbeat, each with a `start` and an `end`)
+
+        Args:
+            request (Request): DRF `Request` object
+
+        Returns:
+            `Response` with status HTTP_202_ACCEPTED.
+
+        Raises:
+            `HTTP_400_BAD_REQUEST`: Raised if the heartbeats are invalid or too many
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised if the user is not registered in the course
+                of a video
+            `HTTP_404_NOT_FOUND`: Raised if a video does not exist
+        """
+        user = request.user
+        if not isinstance(request.data, dict):
+            error = "The request data must be an object with the `progress`."
+            logger.error(error)
+            return Response(error, status.HTTP_400_BAD_REQUEST)
+        heartbeats = request.data.get("progress")
+
+        serializer = VideoProgressSerializer(data=heartbeats, many=True)
+        if not serializer.is_valid():
+            logger.error(serializer.errors)
+            return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        heartbeats = serializer.validated_data
+        if len(heartbeats) > VIDEO_PROGRESS_MAX_HEARTBEATS:
+            error = "At most {} heartbeats can be reported at once.".format(
+                VIDEO_PROGRESS_MAX_HEARTBEATS
+            )
+            logger.error(error)
+            return Response(error, status.HTTP_400_BAD_REQUEST)
+
+        video_ids = {heartbeat["video"] for heartbeat in heartbeats}
+        videos = {
+            video_id: (course_id, video_duration)
+            for video_id, course_id, video_duration in Video.objects.filter(
+                id__in=video_ids
+            )
+            .annotate(
+                course_id=Coalesce(F("chapter__course"), F("section__chapter__course"))
+            )
+            .values_list("id", "course_id", "video_duration")
+        }
+        missing_video_ids = video_ids - videos.keys()
+        if missing_video_ids:
+            error = "Videos with ids: `{}` do not exist.".format(
+                sorted(missing_video_ids)
+            )
+            logger.error(error)
+            return Response(error, status.HTTP_404_NOT_FOUND)
+
+        course_ids = {course_id for course_id, _ in videos.values()}
+        registered_course_ids = set(
+            CourseHistory.objects.filter(
+                user=user, course__in=course_ids, status="E"
+            ).values_list("course", flat=True)
+        )
+        if course_ids - registered_course_ids:
+            error = (
+                "The user `{}` is not registered in the courses with ids: `{}`.".format(
+                    user, sorted(course_ids - registered_course_ids)
+                )
+            )
+            logger.error(error)
+            return Response(error, status.HTTP_403_FORBIDDEN)
+
+        video_progress_buffer.add(
+            user.id,
+            (
+                (
+                    heartbeat["video"],
+                    min(heartbeat["watched_duration"], videos[heartbeat["video"]][1]),
+                    intervals_to_bitmap(
+                        (
+                            (interval["start"], interval["end"])
+                            for interval in heartbeat.get("watched_intervals", [])
+                        ),
+                        videos[heartbeat["video"]][1],
+                    ),
+                )
+                for heartbeat in heartbeats
+            ),
+        )
+        return Response(status=status.HTTP_202_ACCEPTED)
+
+
+class VideoUploadViewSet(viewsets.GenericViewSet, custom_mixins.IsRegisteredMixin):
+    """Viewset for `VideoUpload`.
+
+    A video file is uploaded by initializing an upload, sending the file in
+    chunks (resuming from the offset of the upload after a failure) and
+    finalizing the upload into a `Video`.
+    """
+
+    queryset = VideoUpload.objects.all()
+    serializer_class = VideoUploadSerializer
+    permission_classes = (IsInstructorOrTA,)
+
+    def _get_upload(self, pk, user, lock=False):
+        """Gets an upload of the user.
+
+        Args:
+            pk (int): Video upload id
+            user (User): `User` model object
+            lock (bool): Whether to lock the upload till the end of the transaction
+
+        Returns:
+            `VideoUpload` model object.
+
+        Raises:
+            VideoUpload.DoesNotExist: Raised if the user has no such upload
+        """
+        queryset = VideoUpload.objects.all()
+        if lock:
+            queryset = queryset.select_for_update()
+        return queryset.get(id=pk, user=user)
+
+    @action(detail=False, methods=["POST"])
+    def init_upload(self, request):
+        """Initializes an upload of a video file into a chapter/section.
+
+        Request data:
+            chapter / section (int): Chapter/section of the video (exactly one)
+            title, description, video_duration: As of `Video`
+            filename (str): Name of the video file
+            size (int): Size of the video file (in bytes)
+
+        Args:
+            request (Request): DRF `Request` object
+
+        Returns:
+            `Response` with the upload data and status HTTP_201_CREATED.
+
+        Raises:
+            `HTTP_400_BAD_REQUEST`: Raised due to serialization errors
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_403_FORBIDDEN`: Raised by `_is_instructor_or_ta()` method
+        """
+        user = request.user
+
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            errors = serializer.errors
+            logger.error(errors)
+            return Response(errors, status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        filename = os.path.basename(data.pop("filename"))
+        upload = VideoUpload(user=user, **data)
+
+        check = self._is_instructor_or_ta(get_course(upload).id, user)
+        if check is not True:
+            return check
+
+        # Reserves the staging file the chunks are written to
+        upload.video_file.save(filename, ContentFile(b""), save=False)
+        upload.save()
+        serializer = self.get_serializer(upload)
+        return Response(serializer.data, status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["GET"])
+    def retrieve_upload(self, request, pk):
+        """Gets the upload with id as pk, e.g. to resume it from its offset.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Video upload id
+
+        Returns:
+            `Response` with the upload data and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_404_NOT_FOUND`: Raised if the user has no such upload
+        """
+        try:
+            upload = self._get_upload(pk, request.user)
+        except VideoUpload.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        serializer = self.get_serializer(upload)
+        return Response(serializer.data, status.HTTP_200_OK)
+
+    @action(detail=True, methods=["PUT"])
+    def upload_chunk(self, request, pk):
+        """Writes a chunk (the request body) of the upload with id as pk.
+
+        The chunk is written at its offset in the final video file and the
+        checksum of the upload is updated with it.
+
+        Query params:
+            offset (int): Offset of the chunk, which must be the upload's offset
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Video upload id
+
+        Returns:
+            `Response` with the offset of the upload and status HTTP_200_OK.
+
+        Raises:
+            `HTTP_400_BAD_REQUEST`: Raised if the offset is missing or the chunk is
+                empty, too large or beyond the size of the upload
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_404_NOT_FOUND`: Raised if the user has no such upload
+            `HTTP_409_CONFLICT`: Raised if the offset is not the upload's offset
+        """
+        try:
+            offset = int(request.query_params["offset"])
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except (KeyError, ValueError) as e:
+            logger.exception(e)
+            return Response("Invalid offset.", status.HTTP_400_BAD_REQUEST)
+        if not 0 < length <= VIDEO_UPLOAD_MAX_CHUNK_SIZE:
+            error = "Chunk size must be between 1 and {} bytes.".format(
+                VIDEO_UPLOAD_MAX_CHUNK_SIZE
+            )
+            logger.error(error)
+            return Response(error, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            upload = self._get_upload(pk, request.user)
+        except VideoUpload.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        if offset != upload.offset:
+            error = "Chunk offset `{}` does not match the upload offset.".format(offset)
+            logger.error(error)
+            return Response({"offset": upload.offset}, status.HTTP_409_CONFLICT)
+        if offset + length > upload.size:
+            error = "Chunk exceeds the upload size `{}`.".format(upload.size)
+            logger.error(error)
+            return Response(error, status.HTTP_400_BAD_REQUEST)
+
+        # The chunk is received before locking the upload, as the client may be
+        # slow. A partially received chunk is kept, the client resumes after it.
+        crc32 = upload.crc32
+        received = 0
+        with tempfile.TemporaryFile() as chunk:
+            while received < length:
+                block = request.stream.read(
+                    min(VIDEO_UPLOAD_BLOCK_SIZE, length - received)
+                )
+                if not block:
+                    break
+                chunk.write(block)
+                crc32 = zlib.crc32(block, crc32)
+                received += len(block)
+
+            with transaction.atomic():
+                try:
+                    upload = self._get_upload(pk, request.user, lock=True)
+                except VideoUpload.DoesNotExist as e:
+                    logger.exception(e)
+                    return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+                if offset != upload.offset:
+                    error = "Another chunk was written while receiving the chunk."
+                    logger.error(error)
+                    return Response({"offset": upload.offset}, status.HTTP_409_CONFLICT)
+
+                chunk.seek(0)
+                with open(upload.video_file.path, "r+b") as f:
+                    f.seek(offset)
+                    shutil.copyfileobj(chunk, f, VIDEO_UPLOAD_BLOCK_SIZE)
+                upload.offset = offset + received
+                upload.crc32 = crc32
+                upload.save(update_fields=["offset", "crc32", "modified_on"])
+        return Response({"offset": upload.offset}, status.HTTP_200_OK)
+
+    @action(detail=True, methods=["POST"])
+    def finalize_upload(self, request, pk):
+        """Creates the video of the completely uploaded upload with id as pk.
+
+        Request data:
+            crc32 (int, optional): CRC-32 of the video file computed by the client
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Video upload id
+
+        Returns:
+            `Response` with the created video data and status HTTP_201_CREATED.
+
+        Raises:
+            `HTTP_400_BAD_REQUEST`: Raised if the upload is incomplete, the checksum
+                does not match (the upload can then be retried from its offset or
+                aborted) or the duration is neither given nor readable
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_404_NOT_FOUND`: Raised if the user has no such upload
+        """
+        video_file = None
+        try:
+            with transaction.atomic():
+                try:
+                    upload = self._get_upload(pk, request.user, lock=True)
+                except VideoUpload.DoesNotExist as e:
+                    logger.exception(e)
+                    return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+                if upload.offset != upload.size:
+                    error = "The upload is incomplete ({} of {} bytes).".format(
+                        upload.offset, upload.size
+                    )
+                    logger.error(error)
+                    return Response(error, status.HTTP_400_BAD_REQUEST)
+                crc32 = request.data.get("crc32")
+                if crc32 is not None and str(crc32) != str(upload.crc32):
+                    error = "Checksum `{}` does not match the uploaded file.".format(
+                        crc32
+                    )
+                    logger.error(error)
+                    return Response(error, status.HTTP_400_BAD_REQUEST)
+
+                try:
+                    metadata = read_video_metadata(upload.video_file.path)
+                except VideoMetadataError as e:
+                    logger.warning("Could not read the metadata of the video: %s", e)
+                    metadata = {"video_duration": upload.video_duration}
+                if metadata["video_duration"] is None:
+                    error = "Duration could not be read from the video file."
+                    logger.error(error)
+                    return Response(error, status.HTTP_400_BAD_REQUEST)
+
+                # Moves the file instead of copying it, a duplicate costs no space
+                video_file = default_storage.move(
+                    upload.video_file.path,
+                    video_upload_path(upload, os.path.basename(upload.video_file.name)),
+                )
+                video = Video.objects.create(
+                    chapter=upload.chapter,
+                    section=upload.section,
+                    title=upload.title,
+                    description=upload.description,
+                    video_file=video_file,
+                    **metadata,
+                )
+                upload.delete()
+        except Exception:
+            # The upload keeps its file if the video is not created, so that the
+            # finalization can be retried
+            if video_file is not None:
+                default_storage.move_out(video_file, upload.video_file.path)
+            raise
+        serializer = VideoSerializer(video)
+        return Response(serializer.data, status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["DELETE"])
+    def abort_upload(self, request, pk):
+        """Deletes the upload with id as pk and its partial video file.
+
+        Args:
+            request (Request): DRF `Request` object
+            pk (int): Video upload id
+
+        Returns:
+            `Response` with status HTTP_204_NO_CONTENT.
+
+        Raises:
+            `HTTP_401_UNAUTHORIZED`: Raised by `IsInstructorOrTA` permission class
+            `HTTP_404_NOT_FOUND`: Raised if the user has no such upload
+        """
+        try:
+            upload = self._get_upload(pk, request.user)
+        except VideoUpload.DoesNotExist as e:
+            logger.exception(e)
+            return Response(str(e), status.HTTP_404_NOT_FOUND)
+
+        upload.video_file.delete(save=False)
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
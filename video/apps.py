@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class VideoConfig(AppConfig):
     name = "video"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,154 @@
+import time
+
+from django.core.cache import cache
+from django.utils.duration import duration_string
+
+from .models import QuizMarker, SectionMarker
+
+
+MARKERS_VERSION_CACHE_KEY = "video:{}:markers_version"
+
+VIDEO_TIMELINE_CACHE_KEY = "video:{}:timeline:{}"
+
+# Safety net for writes which bypass the signals (e.g. `QuerySet.update()`)
+VIDEO_TIMELINE_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _get_markers_version(video_id):
+    """Gets the version of the markers of a video, which changes on every write of
+    the markers or of their quizzes.
+
+    Args:
+        video_id (int): Video id
+
+    Returns:
+        The version of the markers.
+    """
+    version = cache.get(MARKERS_VERSION_CACHE_KEY.format(video_id))
+    if version is None:
+        version = time.time_ns()
+        cache.set(MARKERS_VERSION_CACHE_KEY.format(video_id), version, None)
+    return version
+
+
+def bump_markers_version(video_ids):
+    """Changes the version of the markers of videos, so that their cached timelines
+    are stale.
+
+    Args:
+        video_ids (iterable): Video ids
+    """
+    version = time.time_ns()
+    cache.set_many(
+        {MARKERS_VERSION_CACHE_KEY.format(video_id): version for video_id in video_ids},
+        None,
+    )
+
+
+def get_timeline_version(video):
+    """Gets the version of the timeline of a video.
+
+    Args:
+        video (Video): `Video` model object
+
+    Returns:
+        The version, which is also used as the ETag of the timeline.
+    """
+    return "{:x}-{:x}".format(
+        int(video.modified_on.timestamp() * 1e6), _get_markers_version(video.id)
+    )
+
+
+def _get_quiz_data(quiz):
+    """Gets the payload of the quiz of a quiz marker.
+
+    Args:
+        quiz (Quiz): `Quiz` model object with prefetched question modules
+
+    Returns:
+        A dictionary with the quiz and its question modules (in the order of the
+        quiz's `question_module_sequence`, the others by id).
+    """
+    sequence = quiz.question_module_sequence or []
+    question_modules = sorted(
+        quiz.questionmodule_set.all(),
+        key=lambda question_module: (
+            sequence.index(question_module.id)
+            if question_module.id in sequence
+            else len(sequence),
+            question_module.id,
+        ),
+    )
+    return {
+        "id": quiz.id,
+        "title": quiz.title,
+        "description": quiz.description,
+        "question_modules": [
+            {
+                "id": question_module.id,
+                "title": question_module.title,
+                "description": question_module.description,
+                "questions_sequence": question_module.questions_sequence,
+            }
+            for question_module in question_modules
+        ],
+    }
+
+
+def build_video_timeline(video_id):
+    """Reads the section and quiz markers of a video in a fixed number of queries.
+
+    Args:
+        video_id (int): Video id
+
+    Returns:
+        A list of markers sorted by time (section markers first on ties).
+    """
+    section_markers = SectionMarker.objects.filter(video=video_id)
+    quiz_markers = (
+        QuizMarker.objects.filter(video=video_id)
+        .select_related("quiz")
+        .prefetch_related("quiz__questionmodule_set")
+    )
+    timeline = [
+        {
+            "type": "section",
+            "id": marker.id,
+            "time": marker.time,
+            "title": marker.title,
+        }
+        for marker in section_markers
+    ]
+    timeline.extend(
+        {
+            "type": "quiz",
+            "id": marker.id,
+            "time": marker.time,
+            "title": marker.title,
+            "quiz": _get_quiz_data(marker.quiz),
+        }
+        for marker in quiz_markers
+    )
+    timeline.sort(key=lambda marker: (marker["time"], marker["type"] != "section"))
+    for marker in timeline:
+        marker["time"] = duration_string(marker["time"])
+    return timeline
+
+
+def get_video_timeline(video):
+    """Gets the timeline of a video from the cache.
+
+    Args:
+        video (Video): `Video` model object
+
+    Returns:
+        (timeline, version) where timeline is as returned by
+        `build_video_timeline()`.
+    """
+    version = get_timeline_version(video)
+    key = VIDEO_TIMELINE_CACHE_KEY.format(video.id, version)
+    timeline = cache.get(key)
+    if timeline is None:
+        timeline = build_video_timeline(video.id)
+        cache.set(key, timeline, VIDEO_TIMELINE_CACHE_TIMEOUT)
+    return timeline, version
@@ -0,0 +1,190 @@
+import mmap
+import struct
+from datetime import timedelta
+
+
+class VideoMetadataError(Exception):
+    """Raised if the metadata of a video file can not be read."""
+
+
+def _iter_boxes(buffer, start, end):
+    """Iterates over the boxes (atoms) of an MP4 file in a byte range.
+
+    Args:
+        buffer (bytes-like): Contents of the file
+        start (int): Start of the range
+        end (int): End of the range
+
+    Yields:
+        (box type, payload start, payload end) of every box in the range.
+
+    Raises:
+        VideoMetadataError: Raised if a box is truncated
+    """
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", buffer, offset)
+        header_size = 8
+        if size == 1:
+            if offset + 16 > end:
+                raise VideoMetadataError("Truncated box `{}`.".format(box_type))
+            size = struct.unpack_from(">Q", buffer, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            # The box extends to the end of the file
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise VideoMetadataError("Truncated box `{}`.".format(box_type))
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+
+def _find_box(buffer, start, end, box_type):
+    """Finds the first box of a type in a byte range of an MP4 file.
+
+    Args:
+        buffer (bytes-like): Contents of the file
+        start (int): Start of the range
+        end (int): End of the range
+        box_type (bytes): Box type, e.g. b"moov"
+
+    Returns:
+        (payload start, payload end) of the box or None if there is no such box.
+    """
+    for current_type, payload_start, payload_end in _iter_boxes(buffer, start, end):
+        if current_type == box_type:
+            return payload_start, payload_end
+    return None
+
+
+def _find_path(buffer, start, end, path):
+    """Finds a box by the types of the boxes nested from the range to it.
+
+    Args:
+        buffer (bytes-like): Contents of the file
+        start (int): Start of the range
+        end (int): End of the range
+        path (list): Box types, e.g. [b"mdia", b"hdlr"]
+
+    Returns:
+        (payload start, payload end) of the box or None if there is no such box.
+    """
+    for box_type in path:
+        box = _find_box(buffer, start, end, box_type)
+        if box is None:
+            return None
+        start, end = box
+    return start, end
+
+
+def parse_mp4_metadata(buffer):
+    """Reads the metadata of an MP4 (or QuickTime) file from its headers.
+
+    Only the `moov` box is read, the media data is neither read nor decoded.
+
+    Args:
+        buffer (bytes-like): Contents of the file, e.g. an `mmap`
+
+    Returns:
+        A dictionary with the `video_duration` (`timedelta`), and the `width`,
+        `height` and `video_codec` of the first video track (None, None and ""
+        if the file has no video track).
+
+    Raises:
+        VideoMetadataError: Raised if the file is not a valid MP4 file
+    """
+    try:
+        moov = _find_box(buffer, 0, len(buffer), b"moov")
+        if moov is None:
+            raise VideoMetadataError("No `moov` box.")
+        mvhd = _find_box(buffer, *moov, b"mvhd")
+        if mvhd is None:
+            raise VideoMetadataError("No `mvhd` box.")
+
+        mvhd_start = mvhd[0]
+        if buffer[mvhd_start] == 1:
+            timescale, duration = struct.unpack_from(">IQ", buffer, mvhd_start + 20)
+        else:
+            timescale, duration = struct.unpack_from(">II", buffer, mvhd_start + 12)
+        if not timescale or not duration:
+            raise VideoMetadataError("No duration in `mvhd` box.")
+
+        metadata = {
+            "video_duration": timedelta(seconds=duration / timescale),
+            "width": None,
+            "height": None,
+            "video_codec": "",
+        }
+        for box_type, trak_start, trak_end in _iter_boxes(buffer, *moov):
+            if box_type != b"trak":
+                continue
+            hdlr = _find_path(buffer, trak_start, trak_end, [b"mdia", b"hdlr"])
+            if hdlr is None or buffer[hdlr[0] + 8 : hdlr[0] + 12] != b"vide":
+                continue
+
+            tkhd = _find_box(buffer, trak_start, trak_end, b"tkhd")
+            if tkhd is not None:
+                # 16.16 fixed-point numbers at the end of the box
+                width, height = struct.unpack_from(">II", buffer, tkhd[1] - 8)
+                metadata["width"] = width >> 16
+                metadata["height"] = height >> 16
+
+            stsd = _find_path(
+                buffer,
+                trak_start,
+                trak_end,
+                [b"mdia", b"minf", b"stbl", b"stsd"],
+            )
+            if stsd is not None and stsd[1] - stsd[0] >= 16:
+                # Format of the first sample entry, e.g. "avc1"
+                codec = bytes(buffer[stsd[0] + 12 : stsd[0] + 16])
+                metadata["video_codec"] = codec.decode("latin-1").strip()
+            break
+        return metadata
+    except (struct.error, IndexError) as e:
+        raise VideoMetadataError(str(e))
+
+
+def read_video_metadata(path):
+    """Reads the metadata of a video file through a memory map of the file.
+
+    Args:
+        path (str): Path of the video file
+
+    Returns:
+        A dictionary as returned by `parse_mp4_metadata()`.
+
+    Raises:
+        VideoMetadataError: Raised if the metadata can not be read
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as buffer:
+            return parse_mp4_metadata(buffer)
+    except (OSError, ValueError) as e:
+        raise VideoMetadataError(str(e))
+
+
+def read_uploaded_video_metadata(video_file):
+    """Reads the metadata of an uploaded video file.
+
+    Args:
+        video_file (UploadedFile): Uploaded video file
+
+    Returns:
+        A dictionary as returned by `parse_mp4_metadata()`.
+
+    Raises:
+        VideoMetadataError: Raised if the metadata can not be read
+    """
+    if hasattr(video_file, "temporary_file_path"):
+        return read_video_metadata(video_file.temporary_file_path())
+
+    # Small uploads are kept in memory
+    video_file.seek(0)
+    data = video_file.read()
+    video_file.seek(0)
+    if not isinstance(data, bytes):
+        raise VideoMetadataError("Unreadable video file.")
+    return parse_mp4_metadata(data)
@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-19 06:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0001_initial'),
+    ]
+
+    operations = [
+        # Keeps only the furthest watched duration of every (video, user) pair
+        migrations.RunSQL(
+            """
+            DELETE FROM video_videohistory a USING video_videohistory b
+            WHERE a.video_id = b.video_id AND a.user_id = b.user_id AND (
+                a.video_watched_duration < b.video_watched_duration
+                OR (a.video_watched_duration = b.video_watched_duration AND a.id < b.id)
+            )
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='videohistory',
+            constraint=models.UniqueConstraint(fields=('video', 'user'), name='unique_video_history'),
+        ),
+    ]
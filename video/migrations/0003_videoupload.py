@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-19 06:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import video.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0004_coursebatchtag_coursebatchtaghistory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('video', '0002_videohistory_unique_video_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoUpload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('video_duration', models.DurationField()),
+                ('video_file', models.FileField(blank=True, upload_to=video.models.video_upload_path)),
+                ('size', models.BigIntegerField()),
+                ('offset', models.BigIntegerField(default=0)),
+                ('crc32', models.BigIntegerField(default=0)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('modified_on', models.DateTimeField(auto_now=True)),
+                ('chapter', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='course.chapter')),
+                ('section', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='course.section')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='videoupload',
+            constraint=models.CheckConstraint(check=models.Q(('chapter__isnull', False), ('section__isnull', False), _connector='OR'), name='both_not_null_in_video_upload'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2 on 2026-10-19 06:38
+
+from django.db import migrations, models
+import utils.storage
+import video.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0004_video_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='videoupload',
+            name='video_file',
+            field=models.FileField(blank=True, storage=utils.storage.get_upload_staging_storage, upload_to=video.models.video_upload_staging_path),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-19 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0005_videoupload_staging_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videohistory',
+            name='modified_on',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
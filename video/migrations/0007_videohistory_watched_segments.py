@@ -0,0 +1,43 @@
+# Generated by Django 3.2 on 2026-10-19 06:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0006_videohistory_modified_on'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videohistory',
+            name='watched_segments',
+            field=models.BinaryField(default=bytes),
+        ),
+        # Bitwise OR of two bitmaps of watched segments (the result is as long as
+        # the longest one), used to merge them in `upsert_video_progress()`
+        migrations.RunSQL(
+            """
+            CREATE OR REPLACE FUNCTION video_bytea_or(a bytea, b bytea)
+            RETURNS bytea AS $$
+            DECLARE
+                result bytea := a;
+                other bytea := b;
+            BEGIN
+                IF length(a) < length(b) THEN
+                    result := b;
+                    other := a;
+                END IF;
+                FOR i IN 0 .. length(other) - 1 LOOP
+                    result := set_byte(
+                        result, i, get_byte(result, i) | get_byte(other, i)
+                    );
+                END LOOP;
+                RETURN result;
+            END;
+            $$ LANGUAGE plpgsql IMMUTABLE STRICT
+            """,
+            "DROP FUNCTION video_bytea_or(bytea, bytea)",
+        ),
+    ]
@@ -3,9 +3,12 @@ import os
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Coalesce
 
-from course.models import Chapter, Section
+from course.models import Chapter, Section, StorageTrackedModel
 from quiz.models import Quiz
+from utils.storage import get_upload_staging_storage
 from utils.utils import get_course_folder
 
 
@@ -28,6 +31,10 @@ def video_upload_path(instance, filename):
     )
 
 
+def video_upload_staging_path(instance, filename):
+    return os.path.join("video_files", str(instance.user_id), filename)
+
+
 def video_doc_upload_path(instance, filename):
     return os.path.join(
         get_course_folder(get_course(instance)), "video_doc_files", filename
@@ -40,7 +47,7 @@ def in_video_quiz_upload_path(instance, filename):
     )
 
 
-class Video(models.Model):
+class Video(StorageTrackedModel):
     chapter = models.ForeignKey(
         Chapter, on_delete=models.CASCADE, blank=True, null=True
     )
@@ -51,13 +58,27 @@ class Video(models.Model):
     description = models.TextField(blank=True)
     video_file = models.FileField(upload_to=video_upload_path)
     doc_file = models.FileField(upload_to=video_doc_upload_path, blank=True, null=True)
+    # Text of `doc_file` for the search index, and the SHA-256 digest of the file
+    # it was extracted from (see the `extract_doc_texts` management command)
+    doc_text = models.TextField(blank=True, editable=False)
+    doc_text_digest = models.CharField(max_length=64, blank=True, editable=False)
     in_video_quiz_file = models.FileField(
         upload_to=in_video_quiz_upload_path, blank=True, null=True
     )
     video_duration = models.DurationField()
+    # Read from the headers of the video file
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    video_codec = models.CharField(max_length=16, blank=True)
     uploaded_on = models.DateTimeField(auto_now_add=True)
     modified_on = models.DateTimeField(auto_now=True)
 
+    storage_fields = {"video_file": "V", "doc_file": "C", "in_video_quiz_file": "C"}
+    storage_user = Coalesce(
+        F("chapter__course__owner"), F("section__chapter__course__owner")
+    )
+    storage_course = Coalesce(F("chapter__course"), F("section__chapter__course"))
+
     class Meta:
         constraints = [
             models.CheckConstraint(
@@ -79,11 +100,61 @@ class VideoHistory(models.Model):
     video = models.ForeignKey(Video, on_delete=models.CASCADE)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     video_watched_duration = models.DurationField()
+    # Bitmap of the watched segments (see `video.segments`)
+    watched_segments = models.BinaryField(default=bytes)
+    # Watermark of the engagement rollups of the `stats` app
+    modified_on = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        # Conflict target of `upsert_video_progress()`
+        constraints = [
+            models.UniqueConstraint(
+                fields=["video", "user"], name="unique_video_history"
+            )
+        ]
 
     def __str__(self):
         return "{}: {}".format(self.user.email, self.video.title)
 
 
+class VideoUpload(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    chapter = models.ForeignKey(
+        Chapter, on_delete=models.CASCADE, blank=True, null=True
+    )
+    section = models.ForeignKey(
+        Section, on_delete=models.CASCADE, blank=True, null=True
+    )
+    title = models.CharField(max_length=settings.MAX_CHARFIELD_LENGTH)
+    description = models.TextField(blank=True)
+    # Read from the video file on finalize if not given
+    video_duration = models.DurationField(null=True, blank=True)
+    # Chunks are written in place to a staging file, which is moved into the
+    # (content-addressed) storage of the video on finalize
+    video_file = models.FileField(
+        upload_to=video_upload_staging_path,
+        storage=get_upload_staging_storage,
+        blank=True,
+    )
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    # CRC-32 of the bytes received so far (it can be resumed from its value)
+    crc32 = models.BigIntegerField(default=0)
+    created_on = models.DateTimeField(auto_now_add=True)
+    modified_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(chapter__isnull=False) | models.Q(section__isnull=False),
+                name="both_not_null_in_video_upload",
+            )
+        ]
+
+    def __str__(self):
+        return "{}: {}".format(self.user.email, self.title)
+
+
 class Marker(models.Model):
     video = models.ForeignKey(Video, on_delete=models.CASCADE)
     time = models.DurationField()
@@ -0,0 +1,138 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.db import connection, transaction
+
+from .models import Video, VideoHistory
+from .segments import merge_bitmaps
+
+
+logger = logging.getLogger(__name__)
+
+# A worker flushes its buffered progress when it holds progress of this many
+# (video, user) pairs ...
+VIDEO_PROGRESS_FLUSH_SIZE = 500
+
+# ... or when this many seconds have passed since its last flush
+VIDEO_PROGRESS_FLUSH_INTERVAL = 30
+
+
+def upsert_video_progress(progress):
+    """Stores the watch progress of many (video, user) pairs in a single query.
+
+    The stored watched duration never decreases and the watched segments are
+    merged with a bitwise OR, so the writes are idempotent and may be applied in
+    any order.
+
+    Args:
+        progress (dict): (watched duration (`timedelta`), watched segments bitmap)
+            by (video id, user id)
+    """
+    # A video may have been deleted since its progress was reported
+    video_ids = set(
+        Video.objects.filter(id__in={video_id for video_id, _ in progress}).values_list(
+            "id", flat=True
+        )
+    )
+    rows = [
+        (video_id, user_id, watched_duration, watched_segments)
+        for (video_id, user_id), (
+            watched_duration,
+            watched_segments,
+        ) in progress.items()
+        if video_id in video_ids
+    ]
+    if not rows:
+        return
+
+    table = VideoHistory._meta.db_table
+    sql = (
+        "INSERT INTO {table} (video_id, user_id, video_watched_duration, "
+        "watched_segments, modified_on) VALUES {values} "
+        "ON CONFLICT (video_id, user_id) DO UPDATE SET video_watched_duration = "
+        "GREATEST({table}.video_watched_duration, EXCLUDED.video_watched_duration), "
+        "watched_segments = video_bytea_or({table}.watched_segments, "
+        "EXCLUDED.watched_segments), modified_on = EXCLUDED.modified_on"
+    ).format(table=table, values=", ".join(["(%s, %s, %s, %s, NOW())"] * len(rows)))
+    params = [value for row in rows for value in row]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+class VideoProgressBuffer:
+    """Coalesces the watch progress reported to a worker.
+
+    Players report their progress every few seconds, but only the furthest
+    watched duration and the union of the watched segments of every (video,
+    user) pair matter. The buffer keeps just that in memory and writes all of it
+    with `upsert_video_progress()` once it is large or old enough, so the
+    database sees one query per flush instead of one read-modify-write per
+    report.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._progress = {}
+        self._last_flush = time.monotonic()
+
+    def _merge(self, progress):
+        """Merges watch progress into the buffer, keeping the furthest duration
+        and all the watched segments.
+
+        Must be called with the lock held.
+
+        Args:
+            progress (iterable): ((video id, user id), (watched duration, watched
+                segments bitmap)) pairs
+        """
+        for key, (watched_duration, watched_segments) in progress:
+            buffered_duration, buffered_segments = self._progress.get(
+                key, (timedelta(), b"")
+            )
+            self._progress[key] = (
+                max(watched_duration, buffered_duration),
+                merge_bitmaps(watched_segments, buffered_segments),
+            )
+
+    def add(self, user_id, progress):
+        """Buffers the watch progress of a user and flushes the buffer if due.
+
+        Args:
+            user_id (int): User id
+            progress (iterable): (video id, watched duration, watched segments
+                bitmap) triples
+        """
+        with self._lock:
+            self._merge(
+                ((video_id, user_id), (watched_duration, watched_segments))
+                for video_id, watched_duration, watched_segments in progress
+            )
+            flush_due = (
+                len(self._progress) >= VIDEO_PROGRESS_FLUSH_SIZE
+                or time.monotonic() - self._last_flush >= VIDEO_PROGRESS_FLUSH_INTERVAL
+            )
+        if flush_due:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered watch progress to the database."""
+        with self._lock:
+            progress, self._progress = self._progress, {}
+            self._last_flush = time.monotonic()
+        if not progress:
+            return
+        try:
+            upsert_video_progress(progress)
+        except Exception as e:
+            logger.exception(e)
+            # Keeps the progress for the next flush (unless newer progress arrived)
+            with self._lock:
+                self._merge(progress.items())
+
+
+video_progress_buffer = VideoProgressBuffer()
+
+atexit.register(video_progress_buffer.flush)
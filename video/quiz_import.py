@@ -0,0 +1,348 @@
+"""Import of the in-video quizzes of a video from its `in_video_quiz_file`.
+
+The file is a YAML (or JSON) document with a list of quiz markers::
+
+    markers:
+      - time: "00:05:30"            # or seconds, e.g. 330
+        title: Recap                # title of the marker and of the quiz
+        description: ...            # optional, description of the quiz
+        question_modules:
+          - title: Loops
+            description: ...        # optional
+            questions:
+              - type: single_correct
+                question_description: ...
+                answer_description: ...
+                options: ["for", "while"]
+                correct_option: 0
+              - type: multiple_correct
+                ...
+                options: ["a", "b", "c"]
+                correct_options: [0, 2]
+              - type: fixed_answer
+                ...
+                answer: "42"
+
+Every question may also have `hint` (default ""), `max_no_of_attempts`
+(default 1), `marks` (default 0), `gradable` and `is_published` (default
+false). The order of the question modules and questions in the file is stored
+as the quiz's `question_module_sequence` and the modules' `questions_sequence`.
+"""
+from datetime import timedelta
+
+import yaml
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_duration
+
+from course.search import index_contents
+from quiz.models import (
+    FixedAnswerQuestion,
+    MultipleCorrectQuestion,
+    QuestionModule,
+    Quiz,
+    SingleCorrectQuestion,
+)
+
+from .cache import bump_markers_version
+from .models import QuizMarker
+
+
+QUESTION_MODELS = {
+    "single_correct": SingleCorrectQuestion,
+    "multiple_correct": MultipleCorrectQuestion,
+    "fixed_answer": FixedAnswerQuestion,
+}
+
+QUESTION_DEFAULTS = {
+    "hint": "",
+    "max_no_of_attempts": 1,
+    "marks": 0,
+    "gradable": False,
+    "is_published": False,
+}
+
+
+class InVideoQuizImportError(Exception):
+    """Raised if the in-video quiz file is invalid, with all the errors found."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def _parse_time(value):
+    """Parses the time of a marker.
+
+    Args:
+        value (str or int or float): "[HH:]MM:SS" or seconds
+
+    Returns:
+        The time as `timedelta` or None if the value is invalid.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return timedelta(seconds=value)
+    if isinstance(value, str):
+        return parse_duration(value)
+    return None
+
+
+def _validate_title(title, path, errors):
+    """Validates the title of a marker or question module of the file.
+
+    Args:
+        title (str): Title as in the file
+        path (str): Position of the marker or question module in the file
+        errors (list): List the errors are appended to
+    """
+    if not isinstance(title, str) or not title:
+        errors.append("{}.title: is required.".format(path))
+    elif len(title) > settings.MAX_CHARFIELD_LENGTH:
+        errors.append(
+            "{}.title: must have at most {} characters.".format(
+                path, settings.MAX_CHARFIELD_LENGTH
+            )
+        )
+
+
+def _validate_question(question, path, errors):
+    """Validates a question of the file and gets its model fields.
+
+    Args:
+        question (dict): Question as in the file
+        path (str): Position of the question in the file, for the errors
+        errors (list): List the errors are appended to
+
+    Returns:
+        (model class, fields) or None if the question is invalid.
+    """
+    if not isinstance(question, dict):
+        errors.append("{}: must be a mapping.".format(path))
+        return None
+    model = QUESTION_MODELS.get(question.get("type"))
+    if model is None:
+        errors.append(
+            "{}.type: must be one of {}.".format(path, ", ".join(QUESTION_MODELS))
+        )
+        return None
+
+    fields = dict(QUESTION_DEFAULTS)
+    for key, default in QUESTION_DEFAULTS.items():
+        value = question.get(key, default)
+        # Exact types, a bool is not a number here
+        if type(value) is not type(default):
+            errors.append(
+                "{}.{}: must be of type {}.".format(path, key, type(default).__name__)
+            )
+        fields[key] = value
+    for key in ["question_description", "answer_description"]:
+        if not isinstance(question.get(key), str) or not question[key]:
+            errors.append("{}.{}: is required.".format(path, key))
+        fields[key] = question.get(key)
+
+    options = question.get("options")
+    if model is FixedAnswerQuestion:
+        if question.get("answer") is None:
+            errors.append("{}.answer: is required.".format(path))
+        fields["answer"] = str(question.get("answer"))
+    elif not isinstance(options, list) or len(options) < 2:
+        errors.append("{}.options: must be a list of two or more options.".format(path))
+    elif model is SingleCorrectQuestion:
+        correct_option = question.get("correct_option")
+        if correct_option not in range(len(options)):
+            errors.append("{}.correct_option: must be an option index.".format(path))
+        fields.update(options=[str(option) for option in options])
+        fields["correct_option"] = correct_option
+    else:
+        correct_options = question.get("correct_options")
+        if (
+            not isinstance(correct_options, list)
+            or not correct_options
+            or any(option not in range(len(options)) for option in correct_options)
+        ):
+            errors.append(
+                "{}.correct_options: must be a list of option indexes.".format(path)
+            )
+        fields.update(options=[str(option) for option in options])
+        fields["correct_options"] = correct_options
+    return model, fields
+
+
+def parse_in_video_quiz_file(data, video, reserved_times=()):
+    """Parses and validates the contents of an in-video quiz file.
+
+    Args:
+        data (bytes or str): Contents of the file
+        video (Video): `Video` model object the quizzes belong to
+        reserved_times (iterable): Times of the existing quiz markers
+
+    Returns:
+        A list of markers, each a dictionary with the `time`, `title` and
+        `description`, and the `question_modules` (each with a `title`,
+        `description` and `questions` as (model class, fields) pairs).
+
+    Raises:
+        InVideoQuizImportError: Raised if the file is invalid
+    """
+    try:
+        document = yaml.safe_load(data)
+    except yaml.YAMLError as e:
+        raise InVideoQuizImportError(["Invalid YAML: {}".format(e)])
+    markers = document.get("markers") if isinstance(document, dict) else None
+    if not isinstance(markers, list) or not markers:
+        raise InVideoQuizImportError(["markers: must be a non-empty list."])
+
+    errors = []
+    times = set(reserved_times)
+    parsed_markers = []
+    for i, marker in enumerate(markers):
+        path = "markers[{}]".format(i)
+        if not isinstance(marker, dict):
+            errors.append("{}: must be a mapping.".format(path))
+            continue
+
+        time = _parse_time(marker.get("time"))
+        if time is None:
+            errors.append("{}.time: must be [HH:]MM:SS or seconds.".format(path))
+        elif not timedelta() <= time <= video.video_duration:
+            errors.append(
+                "{}.time: `{}` is not within the video duration `{}`.".format(
+                    path, time, video.video_duration
+                )
+            )
+        elif time in times:
+            errors.append("{}.time: `{}` already has a quiz marker.".format(path, time))
+        times.add(time)
+        _validate_title(marker.get("title"), path, errors)
+
+        question_modules = []
+        if not isinstance(marker.get("question_modules") or [], list):
+            errors.append("{}.question_modules: must be a list.".format(path))
+            marker["question_modules"] = []
+        for j, question_module in enumerate(marker.get("question_modules") or []):
+            module_path = "{}.question_modules[{}]".format(path, j)
+            if not isinstance(question_module, dict):
+                errors.append("{}: must be a mapping.".format(module_path))
+                continue
+            _validate_title(question_module.get("title"), module_path, errors)
+            questions = question_module.get("questions") or []
+            if not isinstance(questions, list):
+                errors.append("{}.questions: must be a list.".format(module_path))
+                questions = []
+            questions = [
+                _validate_question(
+                    question, "{}.questions[{}]".format(module_path, k), errors
+                )
+                for k, question in enumerate(questions)
+            ]
+            question_modules.append(
+                {
+                    "title": question_module.get("title"),
+                    "description": str(question_module.get("description") or ""),
+                    "questions": questions,
+                }
+            )
+        parsed_markers.append(
+            {
+                "time": time,
+                "title": marker.get("title"),
+                "description": str(marker.get("description") or ""),
+                "question_modules": question_modules,
+            }
+        )
+
+    if errors:
+        raise InVideoQuizImportError(errors)
+    return parsed_markers
+
+
+def import_in_video_quizzes(video):
+    """Creates the quizzes, question modules, questions and quiz markers of the
+    in-video quiz file of a video.
+
+    All the objects are created in a single transaction, with one bulk insert
+    per table (and one bulk update for the sequences), whatever the size of the
+    file.
+
+    Args:
+        video (Video): `Video` model object with an `in_video_quiz_file`
+
+    Returns:
+        A list of the created `QuizMarker` model objects.
+
+    Raises:
+        InVideoQuizImportError: Raised if the file is invalid
+    """
+    with video.in_video_quiz_file.open("rb") as f:
+        data = f.read()
+
+    with transaction.atomic():
+        reserved_times = QuizMarker.objects.filter(video=video).values_list(
+            "time", flat=True
+        )
+        markers = parse_in_video_quiz_file(data, video, reserved_times)
+
+        quizzes = Quiz.objects.bulk_create(
+            Quiz(
+                chapter=video.chapter,
+                section=video.section,
+                title=marker["title"],
+                description=marker["description"],
+            )
+            for marker in markers
+        )
+        quiz_markers = QuizMarker.objects.bulk_create(
+            QuizMarker(
+                video=video, time=marker["time"], title=marker["title"], quiz=quiz
+            )
+            for marker, quiz in zip(markers, quizzes)
+        )
+
+        module_data = [
+            (quiz, question_module)
+            for marker, quiz in zip(markers, quizzes)
+            for question_module in marker["question_modules"]
+        ]
+        question_modules = QuestionModule.objects.bulk_create(
+            QuestionModule(
+                quiz=quiz,
+                title=question_module["title"],
+                description=question_module["description"],
+            )
+            for quiz, question_module in module_data
+        )
+
+        # Questions in the order of the file by module, and by model to insert them
+        module_questions = [
+            [model(question_module=question_module, **fields) for model, fields in data]
+            for question_module, data in zip(
+                question_modules,
+                (question_module["questions"] for _, question_module in module_data),
+            )
+        ]
+        for content_type, model in QUESTION_MODELS.items():
+            created = model.objects.bulk_create(
+                question
+                for questions in module_questions
+                for question in questions
+                if type(question) is model
+            )
+            # Bulk inserts do not send the signals which index the questions
+            index_contents(
+                "{}_question".format(content_type),
+                [question.id for question in created],
+            )
+
+        for quiz in quizzes:
+            quiz.question_module_sequence = []
+        for question_module, questions in zip(question_modules, module_questions):
+            question_module.quiz.question_module_sequence.append(question_module.id)
+            question_module.questions_sequence = [question.id for question in questions]
+        Quiz.objects.bulk_update(quizzes, ["question_module_sequence"])
+        QuestionModule.objects.bulk_update(question_modules, ["questions_sequence"])
+
+        # Bulk inserts do not send the signals which make the timeline stale
+        transaction.on_commit(lambda: bump_markers_version([video.id]))
+    return quiz_markers
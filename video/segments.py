@@ -0,0 +1,92 @@
+"""Watched segments of the videos, stored as bitmaps.
+
+A video is split into segments of `WATCHED_SEGMENT_DURATION`. The bitmap of a
+(video, user) pair has one bit per segment, most significant bit first, set if
+the user watched any part of the segment. Bitmaps are merged with a bitwise
+OR, so merging is idempotent and may be done in any order.
+"""
+import math
+from datetime import timedelta
+
+import numpy as np
+
+
+WATCHED_SEGMENT_DURATION = timedelta(seconds=5)
+
+
+def get_segment_count(video_duration):
+    """Gets the number of segments of a video.
+
+    Args:
+        video_duration (timedelta): Duration of the video
+
+    Returns:
+        The number of segments.
+    """
+    return math.ceil(video_duration / WATCHED_SEGMENT_DURATION)
+
+
+def intervals_to_bitmap(intervals, video_duration):
+    """Gets the bitmap of the segments of watched intervals of a video.
+
+    Args:
+        intervals (iterable): (start, end) pairs of `timedelta`
+        video_duration (timedelta): Duration of the video
+
+    Returns:
+        The bitmap as bytes.
+    """
+    count = get_segment_count(video_duration)
+    bits = np.zeros(count, dtype=bool)
+    for start, end in intervals:
+        # Negative bounds would index the segments from the end
+        first = max(int(start / WATCHED_SEGMENT_DURATION), 0)
+        last = min(math.ceil(end / WATCHED_SEGMENT_DURATION), count)
+        if first < last:
+            bits[first:last] = True
+    return np.packbits(bits).tobytes()
+
+
+def merge_bitmaps(bitmap, other):
+    """Merges two bitmaps of watched segments.
+
+    Args:
+        bitmap (bytes): Bitmap
+        other (bytes): Bitmap, possibly of a different size
+
+    Returns:
+        The bitwise OR of the bitmaps, as long as the longest one.
+    """
+    size = max(len(bitmap), len(other))
+    return (
+        np.frombuffer(bytes(bitmap).ljust(size, b"\0"), dtype=np.uint8)
+        | np.frombuffer(bytes(other).ljust(size, b"\0"), dtype=np.uint8)
+    ).tobytes()
+
+
+def get_watched_heatmap(bitmaps, video_duration):
+    """Counts the viewers of every segment of a video.
+
+    The bitmaps are stacked into a single matrix and the bits are counted column
+    by column, one vectorized pass per bit position, so the cost is a few passes
+    over the raw bitmaps whatever the number of viewers.
+
+    Args:
+        bitmaps (iterable): Bitmaps of the viewers
+        video_duration (timedelta): Duration of the video
+
+    Returns:
+        A NumPy array with the number of viewers of every segment.
+    """
+    count = get_segment_count(video_duration)
+    if not count:
+        return np.zeros(0, dtype=np.int64)
+    size = (count + 7) // 8
+    # Bitmaps stored before a change of the video duration are padded/truncated
+    data = b"".join(bytes(bitmap).ljust(size, b"\0")[:size] for bitmap in bitmaps)
+    matrix = np.frombuffer(data, dtype=np.uint8).reshape(-1, size)
+    counts = np.stack(
+        [((matrix >> shift) & 1).sum(axis=0) for shift in range(7, -1, -1)],
+        axis=1,
+    )
+    return counts.reshape(-1)[:count]
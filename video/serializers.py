@@ -1,9 +1,110 @@
+import logging
+from datetime import timedelta
+
 from rest_framework import serializers
 
-from .models import Video
+from registration.models import SubscriptionHistory
+from utils.subscription import SubscriptionView
+
+from .metadata import VideoMetadataError, read_uploaded_video_metadata
+from .models import Video, VideoUpload, get_course
+
+
+logger = logging.getLogger(__name__)
+
+
+def validate_video_storage(chapter, section, size):
+    """Validates a video file against the subscription limits of the course owner.
+
+    The videos of the owners without a subscription are not limited.
+
+    Args:
+        chapter (Chapter): Chapter of the video
+        section (Section): Section of the video
+        size (int): Size of the video file (in bytes)
+
+    Raises:
+        ValidationError: Raised if the video file exceeds the video limits of the
+            subscription
+    """
+    if chapter is None and section is None:
+        return
+    course = get_course(Video(chapter=chapter, section=section))
+    try:
+        limit_reached = SubscriptionView.is_video_storage_limit_reached(
+            course.owner, size
+        )
+    except SubscriptionHistory.DoesNotExist:
+        return
+    if limit_reached:
+        raise serializers.ValidationError(
+            "The video exceeds the video storage limits of the subscription."
+        )
 
 
 class VideoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Video
+        # The extracted text is only for the search index
+        exclude = ["doc_text", "doc_text_digest"]
+        read_only_fields = ["width", "height", "video_codec"]
+        extra_kwargs = {"video_duration": {"required": False}}
+
+    def validate(self, data):
+        # The metadata read from the video file takes precedence over the
+        # duration given by the client
+        video_file = data.get("video_file")
+        if video_file is not None:
+            validate_video_storage(
+                data.get("chapter", getattr(self.instance, "chapter", None)),
+                data.get("section", getattr(self.instance, "section", None)),
+                video_file.size,
+            )
+            try:
+                data.update(read_uploaded_video_metadata(video_file))
+            except VideoMetadataError as e:
+                logger.warning("Could not read the metadata of the video: %s", e)
+                data.update(width=None, height=None, video_codec="")
+        if self.instance is None and data.get("video_duration") is None:
+            raise serializers.ValidationError(
+                {"video_duration": "Could not be read from the video file."}
+            )
+        return data
+
+
+class WatchedIntervalSerializer(serializers.Serializer):
+    start = serializers.DurationField(min_value=timedelta(0))
+    end = serializers.DurationField(min_value=timedelta(0))
+
+    def validate(self, data):
+        if data["start"] > data["end"]:
+            raise serializers.ValidationError("Start must not be after end.")
+        return data
+
+
+class VideoProgressSerializer(serializers.Serializer):
+    video = serializers.IntegerField()
+    watched_duration = serializers.DurationField(min_value=timedelta(0))
+    watched_intervals = WatchedIntervalSerializer(many=True, required=False)
+
+
+class VideoUploadSerializer(serializers.ModelSerializer):
+    filename = serializers.CharField(write_only=True)
+
+    class Meta:
+        model = VideoUpload
         fields = "__all__"
+        read_only_fields = ["user", "video_file", "offset", "crc32"]
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Size must be positive.")
+        return value
+
+    def validate(self, data):
+        if bool(data.get("chapter")) == bool(data.get("section")):
+            raise serializers.ValidationError(
+                "Exactly one of field (chapter or section) must be given."
+            )
+        validate_video_storage(data.get("chapter"), data.get("section"), data["size"])
+        return data
@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from quiz.models import QuestionModule, Quiz
+
+from .cache import bump_markers_version
+from .models import QuizMarker, SectionMarker
+
+
+@receiver([post_save, post_delete], sender=SectionMarker)
+@receiver([post_save, post_delete], sender=QuizMarker)
+def update_markers_version(sender, instance, **kwargs):
+    """Makes the cached timeline of the marker's video stale.
+
+    The version is changed once the transaction is committed, so that the
+    timeline is never cached from uncommitted markers under the new version.
+    """
+    video_id = instance.video_id
+    transaction.on_commit(lambda: bump_markers_version([video_id]))
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+@receiver([post_save, post_delete], sender=QuestionModule)
+def update_quiz_markers_version(sender, instance, **kwargs):
+    """Makes the cached timelines of the videos with a marker of the quiz stale."""
+    quiz_id = instance.id if sender is Quiz else instance.quiz_id
+    video_ids = list(
+        QuizMarker.objects.filter(quiz=quiz_id).values_list("video", flat=True)
+    )
+    if video_ids:
+        transaction.on_commit(lambda: bump_markers_version(video_ids))
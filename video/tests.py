@@ -1,13 +1,33 @@
 import datetime
+import os
+import shutil
+import struct
+import zlib
 from unittest import mock
+from urllib.parse import quote
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
+from quiz.models import (
+    FixedAnswerQuestion,
+    MultipleCorrectQuestion,
+    QuestionModule,
+    Quiz,
+    SingleCorrectQuestion,
+)
+from registration.models import SubscriptionHistory
 from utils import credentials
-from video.models import Video
+from video.metadata import VideoMetadataError, parse_mp4_metadata
+from video.models import SectionMarker, Video, VideoHistory, VideoUpload
+from video.progress import video_progress_buffer
+from video.segments import intervals_to_bitmap, merge_bitmaps
 
 
 ins_cred = credentials.TEST_INSTRUCTOR_CREDENTIALS
@@ -15,6 +35,55 @@ ta_cred = credentials.TEST_TA_CREDENTIALS
 stu_cred = credentials.TEST_STUDENT_CREDENTIALS
 
 
+def _mp4_box(box_type, payload, large=False):
+    """Builds an MP4 box.
+
+    Args:
+        box_type (bytes): Box type
+        payload (bytes): Payload of the box
+        large (bool): Whether the box has a 64-bit size
+
+    Returns:
+        The box.
+    """
+    if large:
+        return struct.pack(">I4sQ", 1, box_type, 16 + len(payload)) + payload
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _build_mp4(timescale, duration, width, height, codec, version=0):
+    """Builds the headers of an MP4 file with a video track.
+
+    Args:
+        timescale (int): Time units per second
+        duration (int): Duration in time units
+        width (int): Width of the video track
+        height (int): Height of the video track
+        codec (bytes): Format of the video samples, e.g. b"avc1"
+        version (int): Version of the `mvhd` box
+
+    Returns:
+        The MP4 file contents.
+    """
+    if version == 1:
+        mvhd = struct.pack(">B3xQQIQ", 1, 0, 0, timescale, duration)
+    else:
+        mvhd = struct.pack(">B3xIIII", 0, 0, 0, timescale, duration)
+    tkhd = bytes(76) + struct.pack(">II", width << 16, height << 16)
+    hdlr = bytes(8) + b"vide" + bytes(13)
+    stsd = struct.pack(">II", 0, 1) + _mp4_box(codec, bytes(78))
+    stbl = _mp4_box(b"stbl", _mp4_box(b"stsd", stsd))
+    mdia = _mp4_box(b"hdlr", hdlr) + _mp4_box(b"minf", stbl)
+    trak = _mp4_box(b"tkhd", tkhd) + _mp4_box(b"mdia", mdia)
+    moov = _mp4_box(b"mvhd", mvhd + bytes(80)) + _mp4_box(b"trak", trak)
+    return (
+        _mp4_box(b"ftyp", b"isom" + bytes(4))
+        # Media data before the headers (not "fast start")
+        + _mp4_box(b"mdat", bytes(1024), large=True)
+        + _mp4_box(b"moov", moov)
+    )
+
+
 class VideoViewSetTest(APITestCase):
     """Test for `VideoViewSet`."""
 
@@ -24,9 +93,17 @@ class VideoViewSetTest(APITestCase):
         "colleges.test.yaml",
         "courses.test.yaml",
         "coursehistories.test.yaml",
+        "plans.test.yaml",
+        "subscriptions.test.yaml",
+        "subscriptionhistories.test.yaml",
         "chapters.test.yaml",
         "sections.test.yaml",
         "videos.test.yaml",
+        "videohistories.test.yaml",
+        "quiz.test.yaml",
+        "questionmodule.test.yaml",
+        "quizmarker.test.yaml",
+        "sectionmarker.test.yaml",
     ]
 
     def login(self, email, password):
@@ -47,6 +124,7 @@ class VideoViewSetTest(APITestCase):
         # Video mock file
         video_mock = mock.MagicMock(spec=File, name="FileMock")
         video_mock.name = "video.mp4"
+        video_mock.size = 1024
 
         # Document mock file
         doc_mock = mock.MagicMock(spec=File, name="FileMock")
@@ -327,6 +405,7 @@ class VideoViewSetTest(APITestCase):
         # Video mock file
         video_mock = mock.MagicMock(spec=File, name="FileMock")
         video_mock.name = "video.mp4"
+        video_mock.size = 1024
 
         # Document mock file
         doc_mock = mock.MagicMock(spec=File, name="FileMock")
@@ -495,3 +574,681 @@ class VideoViewSetTest(APITestCase):
         self.login(**stu_cred)
         self._delete_video_helper("Video 4", status.HTTP_403_FORBIDDEN)
         self.logout()
+
+    def _report_progress_helper(self, status_code, progress):
+        """Helper function for `test_report_progress()`.
+
+        Args:
+            status_code (int): Expected status code of the API call
+            progress (list): Heartbeats
+        """
+        url = reverse("video:video-report-progress")
+
+        response = self.client.post(url, {"progress": progress}, format="json")
+        self.assertEqual(response.status_code, status_code)
+
+    @mock.patch("video.progress.VIDEO_PROGRESS_FLUSH_INTERVAL", 60 * 60)
+    def test_report_progress(self):
+        """Test: report the watch progress of the videos."""
+        progress = [
+            {
+                "video": 1,
+                "watched_duration": 120,
+                "watched_intervals": [{"start": 0, "end": 10}],
+            },
+            {"video": 2, "watched_duration": 60},
+            {"video": 2, "watched_duration": "00:05:00"},
+            {"video": 3, "watched_duration": 11 * 60 * 60},
+        ]
+
+        # Reported by student
+        self.login(**stu_cred)
+        self._report_progress_helper(status.HTTP_202_ACCEPTED, progress)
+        self._report_progress_helper(
+            status.HTTP_202_ACCEPTED,
+            [
+                {"video": 2, "watched_duration": 180},
+                {
+                    "video": 1,
+                    "watched_duration": 120,
+                    "watched_intervals": [{"start": 7, "end": "00:00:12"}],
+                },
+            ],
+        )
+        self.logout()
+
+        # The progress is written on flush
+        self.assertFalse(VideoHistory.objects.filter(video=2, user=3).exists())
+        video_progress_buffer.flush()
+        watched_durations = dict(
+            VideoHistory.objects.filter(user=3).values_list(
+                "video", "video_watched_duration"
+            )
+        )
+        self.assertEqual(
+            watched_durations,
+            {
+                # The watched duration never decreases
+                1: datetime.timedelta(minutes=10),
+                2: datetime.timedelta(minutes=5),
+                # Clipped to the video duration
+                3: datetime.timedelta(hours=10),
+            },
+        )
+
+        # The watched segments are merged on every flush
+        self.login(**stu_cred)
+        self._report_progress_helper(
+            status.HTTP_202_ACCEPTED,
+            [
+                {
+                    "video": 1,
+                    "watched_duration": 120,
+                    "watched_intervals": [{"start": 60, "end": 65}],
+                }
+            ],
+        )
+        self.logout()
+        video_progress_buffer.flush()
+        watched_segments = bytes(
+            VideoHistory.objects.get(video=1, user=3).watched_segments
+        )
+        self.assertEqual(watched_segments, b"\xe0\x08".ljust(900, b"\0"))
+
+        # `HTTP_400_BAD_REQUEST` due to invalid heartbeats
+        self.login(**stu_cred)
+        self._report_progress_helper(
+            status.HTTP_400_BAD_REQUEST, [{"video": 1, "watched_duration": "abc"}]
+        )
+        self._report_progress_helper(
+            status.HTTP_400_BAD_REQUEST,
+            [
+                {
+                    "video": 1,
+                    "watched_duration": 60,
+                    "watched_intervals": [{"start": 60, "end": 30}],
+                }
+            ],
+        )
+        self._report_progress_helper(
+            status.HTTP_400_BAD_REQUEST, [{"video": 1, "watched_duration": -60}]
+        )
+        self._report_progress_helper(
+            status.HTTP_400_BAD_REQUEST,
+            [
+                {
+                    "video": 1,
+                    "watched_duration": 60,
+                    "watched_intervals": [{"start": -600, "end": -5}],
+                }
+            ],
+        )
+        self._report_progress_helper(status.HTTP_400_BAD_REQUEST, None)
+        response = self.client.post(
+            reverse("video:video-report-progress"), progress, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTA` permission class
+        self._report_progress_helper(status.HTTP_401_UNAUTHORIZED, progress)
+
+        # `HTTP_403_FORBIDDEN` due to the student not registered in course 3
+        self.login(**stu_cred)
+        self._report_progress_helper(
+            status.HTTP_403_FORBIDDEN, [{"video": 4, "watched_duration": 60}]
+        )
+        self.logout()
+
+        # `HTTP_404_NOT_FOUND` due to non-existent video
+        self.login(**stu_cred)
+        self._report_progress_helper(
+            status.HTTP_404_NOT_FOUND, [{"video": 100, "watched_duration": 60}]
+        )
+        self.logout()
+
+    def test_intervals_to_bitmap(self):
+        """Test: bitmap of the watched segments of intervals."""
+        video_duration = datetime.timedelta(minutes=10)
+        seconds = datetime.timedelta(seconds=1)
+        self.assertEqual(
+            intervals_to_bitmap([(7 * seconds, 12 * seconds)], video_duration),
+            b"\x60".ljust(15, b"\0"),
+        )
+        # Out of the video
+        self.assertEqual(
+            intervals_to_bitmap(
+                [(-600 * seconds, -5 * seconds), (-3 * seconds, 2 * seconds)],
+                video_duration,
+            ),
+            b"\x80".ljust(15, b"\0"),
+        )
+        self.assertEqual(
+            intervals_to_bitmap([(700 * seconds, 800 * seconds)], video_duration),
+            bytes(15),
+        )
+
+    def test_retrieve_heatmap(self):
+        """Test: retrieve the heatmap of the watched segments of a video."""
+        bitmaps = {
+            1: intervals_to_bitmap(
+                [(datetime.timedelta(), datetime.timedelta(seconds=12))],
+                datetime.timedelta(hours=10),
+            ),
+            # Stored before the video duration changed
+            2: merge_bitmaps(b"\x40", b"\x00\x01"),
+        }
+        for user_id, bitmap in bitmaps.items():
+            VideoHistory.objects.filter(video=1, user=user_id).update(
+                watched_segments=bitmap
+            )
+        url = reverse("video:video-retrieve-heatmap", args=[1])
+
+        self.login(**ins_cred)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["segment_duration"], 5)
+        self.assertEqual(response.data["viewers"], 2)
+        heatmap = response.data["heatmap"]
+        self.assertEqual(len(heatmap), 7200)
+        self.assertEqual(heatmap[:3], [1, 2, 1])
+        self.assertEqual(heatmap[15], 1)
+        self.assertEqual(sum(heatmap), 5)
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTA` permission class
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # `HTTP_403_FORBIDDEN` due to `_is_instructor_or_ta()` method
+        self.login(**stu_cred)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.logout()
+
+        # `HTTP_404_NOT_FOUND` due to the video not existing
+        self.login(**ins_cred)
+        response = self.client.get(reverse("video:video-retrieve-heatmap", args=[99]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.logout()
+
+    def test_stream_video(self):
+        """Test: stream the video file with range and conditional requests."""
+        content = bytes(range(256)) * 4
+        video = Video.objects.create(
+            chapter_id=1,
+            title="Lecture",
+            video_file=SimpleUploadedFile("lecture.mp4", content),
+            video_duration=datetime.timedelta(minutes=3),
+        )
+        url = reverse("video:video-stream-video", args=[video.id])
+
+        self.login(**stu_cred)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "video/mp4")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(b"".join(response.streaming_content), content)
+        etag = response["ETag"]
+
+        # Range requests
+        for range_header, content_range, body in [
+            ("bytes=10-19", "bytes 10-19/1024", content[10:20]),
+            ("bytes=1000-", "bytes 1000-1023/1024", content[1000:]),
+            ("bytes=-10", "bytes 1014-1023/1024", content[-10:]),
+            ("bytes=1000-5000", "bytes 1000-1023/1024", content[1000:]),
+        ]:
+            response = self.client.get(url, HTTP_RANGE=range_header)
+            self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+            self.assertEqual(response["Content-Range"], content_range)
+            self.assertEqual(int(response["Content-Length"]), len(body))
+            self.assertEqual(b"".join(response.streaming_content), body)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=2000-")
+        self.assertEqual(
+            response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(response["Content-Range"], "bytes */1024")
+
+        # Range is ignored if the file changed
+        response = self.client.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"0-0"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+
+        # Conditional request
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Served by the web server
+        with self.settings(MEDIA_SENDFILE_BACKEND="x-accel-redirect"):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                response["X-Accel-Redirect"],
+                "/protected_media/" + quote(video.video_file.name),
+            )
+            self.assertEqual(response.content, b"")
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTA` permission class
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # `HTTP_403_FORBIDDEN` due to the student not registered in course 3
+        self.login(**stu_cred)
+        response = self.client.get(reverse("video:video-stream-video", args=[4]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.logout()
+
+        try:
+            shutil.rmtree(settings.MEDIA_ROOT)
+        except OSError:
+            pass
+
+    def test_retrieve_timeline(self):
+        """Test: retrieve the merged marker timeline of a video."""
+        cache.clear()
+        url = reverse("video:video-retrieve-timeline", args=[1])
+
+        self.login(**stu_cred)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(marker["type"], marker["time"]) for marker in response.data],
+            [
+                ("section", "00:10:00"),
+                ("quiz", "00:11:00"),
+                ("quiz", "00:12:00"),
+                ("section", "00:15:00"),
+            ],
+        )
+        quiz = response.data[1]["quiz"]
+        self.assertEqual(quiz["id"], 1)
+        self.assertEqual(
+            [question_module["id"] for question_module in quiz["question_modules"]],
+            [1],
+        )
+        etag = response["ETag"]
+
+        # Cached (no marker queries, only the session, user, video and access checks)
+        with self.assertNumQueries(5):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Stale after a marker or a question module changed
+        with self.captureOnCommitCallbacks(execute=True):
+            SectionMarker.objects.create(
+                video_id=1, time=datetime.timedelta(minutes=11), title="Marker"
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(marker["type"], marker["time"]) for marker in response.data][1:3],
+            [("section", "00:11:00"), ("quiz", "00:11:00")],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            QuestionModule.objects.create(quiz_id=1, title="Question module")
+        response = self.client.get(url)
+        self.assertEqual(len(response.data[2]["quiz"]["question_modules"]), 2)
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTA` permission class
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # `HTTP_403_FORBIDDEN` due to the student not registered in course 3
+        self.login(**stu_cred)
+        response = self.client.get(reverse("video:video-retrieve-timeline", args=[4]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        # `HTTP_404_NOT_FOUND` due to the video not existing
+        response = self.client.get(reverse("video:video-retrieve-timeline", args=[99]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.logout()
+
+    def test_import_quizzes(self):
+        """Test: import the in-video quizzes of a video from its quiz file."""
+        quiz_file = b"""
+markers:
+  - time: "00:20:00"
+    title: Recap
+    question_modules:
+      - title: Loops
+        questions:
+          - type: fixed_answer
+            question_description: Iterations of range(3)?
+            answer_description: Three
+            answer: 3
+          - type: single_correct
+            question_description: Loop with a condition?
+            answer_description: while
+            options: [for, while]
+            correct_option: 1
+            marks: 2
+      - title: Functions
+        questions:
+          - type: multiple_correct
+            question_description: Keywords?
+            answer_description: def and return
+            options: [def, return, func]
+            correct_options: [0, 1]
+  - time: 1500
+    title: Final quiz
+"""
+        video = Video.objects.get(id=1)
+        video.in_video_quiz_file = SimpleUploadedFile("quiz.yaml", quiz_file)
+        video.save()
+        url = reverse("video:video-import-quizzes", args=[1])
+
+        self.login(**ins_cred)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(marker["type"], marker["time"]) for marker in response.data],
+            [
+                ("section", "00:10:00"),
+                ("quiz", "00:11:00"),
+                ("quiz", "00:12:00"),
+                ("section", "00:15:00"),
+                ("quiz", "00:20:00"),
+                ("quiz", "00:25:00"),
+            ],
+        )
+        quiz = Quiz.objects.get(quizmarker__time=datetime.timedelta(minutes=20))
+        self.assertEqual(quiz.chapter_id, 1)
+        loops, functions = QuestionModule.objects.filter(quiz=quiz).order_by("id")
+        self.assertEqual(quiz.question_module_sequence, [loops.id, functions.id])
+        fixed_answer = FixedAnswerQuestion.objects.get(question_module=loops)
+        single_correct = SingleCorrectQuestion.objects.get(question_module=loops)
+        self.assertEqual(loops.questions_sequence, [fixed_answer.id, single_correct.id])
+        self.assertEqual(fixed_answer.answer, "3")
+        self.assertEqual(single_correct.marks, 2)
+        self.assertEqual(single_correct.max_no_of_attempts, 1)
+        self.assertEqual(
+            MultipleCorrectQuestion.objects.get(
+                question_module=functions
+            ).correct_options,
+            [0, 1],
+        )
+
+        # `HTTP_400_BAD_REQUEST` due to an invalid file, nothing is created
+        quiz_count = Quiz.objects.count()
+        video.in_video_quiz_file = SimpleUploadedFile(
+            "quiz.yaml",
+            b"""
+markers:
+  - time: "00:11:00"
+    title: Taken
+  - time: "11:00:00"
+    title: Too late
+  - time: "00:30:00"
+    title: Valid
+    question_modules:
+      - title: Module
+        questions:
+          - type: single_correct
+            question_description: Question?
+            answer_description: Answer
+            options: [a, b]
+            correct_option: 2
+""",
+        )
+        video.save()
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data), 3)
+        self.assertTrue(response.data[0].startswith("markers[0].time"))
+        self.assertEqual(Quiz.objects.count(), quiz_count)
+        self.logout()
+
+        # `HTTP_403_FORBIDDEN` due to `_is_instructor_or_ta()` method
+        self.login(**stu_cred)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.logout()
+
+        # `HTTP_400_BAD_REQUEST` due to the video having no quiz file
+        self.login(**ins_cred)
+        response = self.client.post(reverse("video:video-import-quizzes", args=[2]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.logout()
+
+        try:
+            shutil.rmtree(settings.MEDIA_ROOT)
+        except OSError:
+            pass
+
+    def test_video_metadata(self):
+        """Test: metadata of the video read from the video file."""
+        video_file = SimpleUploadedFile(
+            "lecture.mp4", _build_mp4(90000, 90000 * 5430, 1280, 720, b"avc1")
+        )
+        data = {
+            "chapter": 1,
+            "section": "",
+            "title": "Lecture",
+            "video_file": video_file,
+        }
+        url = reverse("video:video-create-video")
+
+        self.login(**ins_cred)
+        response = self.client.post(url, data, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        video = Video.objects.get(id=response.data["id"])
+        self.assertEqual(video.video_duration, datetime.timedelta(seconds=5430))
+        self.assertEqual((video.width, video.height), (1280, 720))
+        self.assertEqual(video.video_codec, "avc1")
+
+        # `HTTP_400_BAD_REQUEST` due to no duration given or readable
+        data["video_file"] = SimpleUploadedFile("lecture.mp4", b"not a video")
+        response = self.client.post(url, data, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.logout()
+
+        try:
+            shutil.rmtree(settings.MEDIA_ROOT)
+        except OSError:
+            pass
+
+    def test_parse_mp4_metadata(self):
+        """Test: `parse_mp4_metadata()` function."""
+        metadata = parse_mp4_metadata(
+            _build_mp4(1000, 2 ** 33, 1920, 1080, b"hvc1", version=1)
+        )
+        self.assertEqual(
+            metadata,
+            {
+                "video_duration": datetime.timedelta(seconds=2 ** 33 / 1000),
+                "width": 1920,
+                "height": 1080,
+                "video_codec": "hvc1",
+            },
+        )
+
+        for data in [b"", b"not a video", _build_mp4(1000, 1000, 1, 1, b"avc1")[:-8]]:
+            with self.assertRaises(VideoMetadataError):
+                parse_mp4_metadata(data)
+
+
+class VideoUploadViewSetTest(APITestCase):
+    """Test for `VideoUploadViewSet`."""
+
+    fixtures = [
+        "users.test.yaml",
+        "departments.test.yaml",
+        "colleges.test.yaml",
+        "courses.test.yaml",
+        "coursehistories.test.yaml",
+        "plans.test.yaml",
+        "subscriptions.test.yaml",
+        "subscriptionhistories.test.yaml",
+        "chapters.test.yaml",
+        "sections.test.yaml",
+    ]
+
+    def login(self, email, password):
+        self.client.login(email=email, password=password)
+
+    def logout(self):
+        self.client.logout()
+
+    def tearDown(self):
+        try:
+            shutil.rmtree(settings.MEDIA_ROOT)
+        except OSError:
+            pass
+
+    def _init_upload_helper(self, status_code, chapter_id, section_id, size):
+        """Helper function for `test_upload_video()`.
+
+        Args:
+            status_code (int): Expected status code of the API call
+            chapter_id (int): Chapter id
+            section_id (int): Section id
+            size (int): Size of the video file
+
+        Returns:
+            The upload data.
+        """
+        data = {
+            "chapter": chapter_id,
+            "section": section_id,
+            "title": "Lecture",
+            "video_duration": "01:00:00",
+            "filename": "lecture.mp4",
+            "size": size,
+        }
+        url = reverse("video:videoupload-init-upload")
+
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status_code)
+        return response.data
+
+    def _upload_chunk_helper(self, status_code, upload_id, offset, chunk):
+        """Helper function for `test_upload_video()`.
+
+        Args:
+            status_code (int): Expected status code of the API call
+            upload_id (int): Video upload id
+            offset (int): Offset of the chunk
+            chunk (bytes): Chunk
+
+        Returns:
+            The response data.
+        """
+        url = "{}?offset={}".format(
+            reverse("video:videoupload-upload-chunk", args=[upload_id]), offset
+        )
+
+        response = self.client.put(url, chunk, content_type="application/octet-stream")
+        self.assertEqual(response.status_code, status_code)
+        return response.data
+
+    def test_upload_video(self):
+        """Test: resumable upload of a video file."""
+        content = bytes(range(256)) * 40
+
+        # Uploaded by ta
+        self.login(**ta_cred)
+        upload = self._init_upload_helper(status.HTTP_201_CREATED, 1, None, 10240)
+        upload_id = upload["id"]
+        self.assertEqual(upload["offset"], 0)
+
+        data = self._upload_chunk_helper(
+            status.HTTP_200_OK, upload_id, 0, content[:4096]
+        )
+        self.assertEqual(data["offset"], 4096)
+
+        # `HTTP_409_CONFLICT` due to chunk not at the upload offset
+        data = self._upload_chunk_helper(
+            status.HTTP_409_CONFLICT, upload_id, 0, content[:4096]
+        )
+        self.assertEqual(data["offset"], 4096)
+
+        # `HTTP_400_BAD_REQUEST` due to incomplete upload
+        url = reverse("video:videoupload-finalize-upload", args=[upload_id])
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Resumed from the offset of the upload
+        url = reverse("video:videoupload-retrieve-upload", args=[upload_id])
+        offset = self.client.get(url).data["offset"]
+        self._upload_chunk_helper(
+            status.HTTP_200_OK, upload_id, offset, content[offset:]
+        )
+
+        # `HTTP_400_BAD_REQUEST` due to chunk beyond the upload size
+        self._upload_chunk_helper(
+            status.HTTP_400_BAD_REQUEST, upload_id, 10240, content[:10]
+        )
+
+        # `HTTP_400_BAD_REQUEST` due to checksum mismatch
+        url = reverse("video:videoupload-finalize-upload", args=[upload_id])
+        response = self.client.post(url, {"crc32": zlib.crc32(content) + 1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # The upload keeps its file if the video is not created
+        path = VideoUpload.objects.get(id=upload_id).video_file.path
+        with mock.patch.object(
+            Video.objects, "create", side_effect=IntegrityError
+        ), self.assertRaises(IntegrityError):
+            self.client.post(url, {"crc32": zlib.crc32(content)})
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), content)
+
+        response = self.client.post(url, {"crc32": zlib.crc32(content)})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        video = Video.objects.get(id=response.data["id"])
+        self.assertEqual(video.chapter_id, 1)
+        # Not an MP4 file, so the duration given by the client is kept
+        self.assertEqual(video.video_duration, datetime.timedelta(hours=1))
+        with video.video_file.open("rb") as f:
+            self.assertEqual(f.read(), content)
+        self.assertFalse(VideoUpload.objects.filter(id=upload_id).exists())
+        self.logout()
+
+        # `HTTP_400_BAD_REQUEST` due to both chapter and section
+        self.login(**ins_cred)
+        self._init_upload_helper(status.HTTP_400_BAD_REQUEST, 1, 1, 10240)
+        self.logout()
+
+        # `HTTP_400_BAD_REQUEST` due to the video size limit of the subscription
+        self.login(**ins_cred)
+        self._init_upload_helper(status.HTTP_400_BAD_REQUEST, 1, None, 2000 * 1024 ** 2)
+
+        # Not limited without a subscription
+        SubscriptionHistory.objects.filter(user=1).delete()
+        self._init_upload_helper(status.HTTP_201_CREATED, 1, None, 2000 * 1024 ** 2)
+        self.logout()
+
+        # `HTTP_401_UNAUTHORIZED` due to `IsInstructorOrTA` permission class
+        self._init_upload_helper(status.HTTP_401_UNAUTHORIZED, 1, None, 10240)
+
+        # `HTTP_403_FORBIDDEN` due to `_is_instructor_or_ta()` method
+        self.login(**stu_cred)
+        self._init_upload_helper(status.HTTP_403_FORBIDDEN, 1, None, 10240)
+        self.logout()
+
+    def test_abort_upload(self):
+        """Test: abort a video upload."""
+        self.login(**ins_cred)
+        upload = self._init_upload_helper(status.HTTP_201_CREATED, 1, None, 100)
+        upload_id = upload["id"]
+        path = VideoUpload.objects.get(id=upload_id).video_file.path
+        self.assertTrue(os.path.exists(path))
+        self.logout()
+
+        # `HTTP_404_NOT_FOUND` due to upload of another user
+        self.login(**ta_cred)
+        url = reverse("video:videoupload-abort-upload", args=[upload_id])
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.logout()
+
+        self.login(**ins_cred)
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(VideoUpload.objects.filter(id=upload_id).exists())
+        self.logout()
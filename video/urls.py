@@ -1,13 +1,14 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .api import VideoViewSet
+from .api import VideoUploadViewSet, VideoViewSet
 
 
 app_name = "video"
 
 router = routers.DefaultRouter()
 router.register(r"videos", VideoViewSet)
+router.register(r"video_uploads", VideoUploadViewSet)
 
 urlpatterns = [
     path("api/", include(router.urls)),